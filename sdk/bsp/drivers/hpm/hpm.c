@@ -0,0 +1,154 @@
+/* ---------------------------------------------------------------
+ * Copyright (c) 2022. Heqing Huang (feipenghhq@gmail.com)
+ *
+ * Author: Heqing Huang
+ * Date Created: 10/18/2026
+ * ---------------------------------------------------------------
+ * HPM
+ * ---------------------------------------------------------------
+ * Hardware performance monitor driver
+ * ---------------------------------------------------------------
+ */
+
+#include <stdio.h>
+#include "hpm.h"
+#include "platform.h"
+
+// read a 64 bits counter. Read the high half again in case the low half overflows in between
+#define read_csr64(reg) ({ uint32_t __hi, __lo; \
+    do { __hi = read_csr(reg##h); __lo = read_csr(reg); } while (__hi != read_csr(reg##h)); \
+    ((uint64_t) __hi << 32) | __lo; })
+
+static const char *event_name[] = {
+    "none", "icache_miss", "dcache_miss", "load_stall", "muldiv_stall", "branch_flush", "ibus_wait", "dbus_wait",
+    "branch"
+};
+
+/**
+ * @brief Select the event counted by a hpm counter
+ *
+ * @param counter hpm counter number (3 ~ 6)
+ * @param event hpm event id
+ */
+void hpm_set_event(uint8_t counter, uint8_t event) {
+    switch (counter) {
+        case 3: write_csr(mhpmevent3, event); break;
+        case 4: write_csr(mhpmevent4, event); break;
+        case 5: write_csr(mhpmevent5, event); break;
+        case 6: write_csr(mhpmevent6, event); break;
+        default: break;
+    }
+}
+
+/**
+ * @brief Get the event counted by a hpm counter
+ *
+ * @param counter hpm counter number (3 ~ 6)
+ */
+uint8_t hpm_get_event(uint8_t counter) {
+    switch (counter) {
+        case 3: return read_csr(mhpmevent3);
+        case 4: return read_csr(mhpmevent4);
+        case 5: return read_csr(mhpmevent5);
+        case 6: return read_csr(mhpmevent6);
+        default: return HPM_EVENT_NONE;
+    }
+}
+
+/**
+ * @brief Read a hpm counter
+ *
+ * @param counter hpm counter number (3 ~ 6)
+ */
+uint64_t hpm_read_counter(uint8_t counter) {
+    switch (counter) {
+        case 3: return read_csr64(mhpmcounter3);
+        case 4: return read_csr64(mhpmcounter4);
+        case 5: return read_csr64(mhpmcounter5);
+        case 6: return read_csr64(mhpmcounter6);
+        default: return 0;
+    }
+}
+
+/**
+ * @brief Read the cycle counter (mcycle)
+ */
+uint64_t hpm_read_cycle(void) {
+    return read_csr64(mcycle);
+}
+
+/**
+ * @brief Read the retired instruction counter (minstret)
+ */
+uint64_t hpm_read_instret(void) {
+    return read_csr64(minstret);
+}
+
+/**
+ * @brief Start all the counters
+ */
+void hpm_start(void) {
+    write_csr(0x320, 0);    // mcountinhibit, older assemblers do not know its name
+}
+
+/**
+ * @brief Stop all the counters
+ */
+void hpm_stop(void) {
+    write_csr(0x320, HPM_INHIBIT_ALL);
+}
+
+/**
+ * @brief Clear minstret and the hpm counters. mcycle is kept as it is used as the system timer
+ */
+void hpm_clear(void) {
+    write_csr(minstret, 0);
+    write_csr(minstreth, 0);
+    write_csr(mhpmcounter3, 0);
+    write_csr(mhpmcounter3h, 0);
+    write_csr(mhpmcounter4, 0);
+    write_csr(mhpmcounter4h, 0);
+    write_csr(mhpmcounter5, 0);
+    write_csr(mhpmcounter5h, 0);
+    write_csr(mhpmcounter6, 0);
+    write_csr(mhpmcounter6h, 0);
+}
+
+/**
+ * @brief Read all the counters
+ *
+ * @param sample
+ */
+void hpm_sample(hpm_sample_s *sample) {
+    sample->cycle = hpm_read_cycle();
+    sample->instret = hpm_read_instret();
+    for (int i = 0; i < HPM_COUNTERS; i++) {
+        sample->counter[i] = hpm_read_counter(HPM_COUNTER_FIRST + i);
+    }
+}
+
+/**
+ * @brief Print the counter difference between two samples and the CPI
+ *
+ * @param start
+ * @param end
+ */
+void hpm_print(hpm_sample_s *start, hpm_sample_s *end) {
+    uint32_t cycle = end->cycle - start->cycle;
+    uint32_t instret = end->instret - start->instret;
+    uint32_t cpi = instret ? cycle / instret : 0;
+    // 32 bits math only, (cycle % instret) * 1000 may overflow so the divisor is scaled down instead
+    uint32_t cpi_frac = instret >= 1000 ? (cycle % instret) / (instret / 1000) :
+                        instret ? (cycle % instret) * 1000 / instret : 0;
+    if (cpi_frac > 999) cpi_frac = 999;
+    printf("cycle: %lu\n", (unsigned long) cycle);
+    printf("instret: %lu\n", (unsigned long) instret);
+    printf("CPI: %lu.%03lu\n", (unsigned long) cpi, (unsigned long) cpi_frac);
+    for (int i = 0; i < HPM_COUNTERS; i++) {
+        uint8_t event = hpm_get_event(HPM_COUNTER_FIRST + i);
+        if (event == HPM_EVENT_NONE) continue;
+        printf("mhpmcounter%d (%s): %lu\n", HPM_COUNTER_FIRST + i,
+               event < sizeof(event_name) / sizeof(event_name[0]) ? event_name[event] : "unknown",
+               (unsigned long) (end->counter[i] - start->counter[i]));
+    }
+}
@@ -0,0 +1,74 @@
+/* ---------------------------------------------------------------
+ * Copyright (c) 2022. Heqing Huang (feipenghhq@gmail.com)
+ *
+ * Author: Heqing Huang
+ * Date Created: 10/18/2026
+ * ---------------------------------------------------------------
+ * HPM
+ * ---------------------------------------------------------------
+ * C Header file for the hardware performance monitor driver
+ * ---------------------------------------------------------------
+ */
+
+#ifndef __HPM_H__
+#define __HPM_H__
+
+#include <stdint.h>
+
+// ---------------------------------------------------------------
+// Defines
+// ---------------------------------------------------------------
+
+// The core implements mhpmcounter3 ~ mhpmcounter6 (HPM_COUNTERS in core_arch.svh)
+#define HPM_COUNTER_FIRST       3
+#define HPM_COUNTERS            4
+
+// hpm event id, same as core_arch.svh
+#define HPM_EVENT_NONE          0   // no event, the counter does not count
+#define HPM_EVENT_ICACHE_MISS   1   // instruction cache miss
+#define HPM_EVENT_DCACHE_MISS   2   // data cache miss
+#define HPM_EVENT_LOAD_STALL    3   // cycles stalled by load-use hazard
+#define HPM_EVENT_MULDIV_STALL  4   // cycles stalled by multiplier/divider
+#define HPM_EVENT_BRANCH_FLUSH  5   // mispredicted branch/jump flushing the pipeline
+#define HPM_EVENT_IBUS_WAIT     6   // cycles the instruction bus request waits on waitrequest
+#define HPM_EVENT_DBUS_WAIT     7   // cycles the data bus request waits on waitrequest
+#define HPM_EVENT_BRANCH        8   // branch/jump executed
+
+// mcountinhibit
+#define HPM_INHIBIT_CYCLE       (1 << 0)
+#define HPM_INHIBIT_INSTRET     (1 << 2)
+#define HPM_INHIBIT_COUNTER(n)  (1 << (n))  // n: hpm counter number (3 ~ 6)
+#define HPM_INHIBIT_ALL         (HPM_INHIBIT_CYCLE | HPM_INHIBIT_INSTRET | \
+                                 (((1 << HPM_COUNTERS) - 1) << HPM_COUNTER_FIRST))
+
+typedef struct _hpm_sample_s {
+    uint64_t    cycle;
+    uint64_t    instret;
+    uint64_t    counter[HPM_COUNTERS];
+} hpm_sample_s;
+
+// ---------------------------------------------------------------
+// Function prototypes
+// ---------------------------------------------------------------
+
+void hpm_set_event(uint8_t counter, uint8_t event);
+
+uint8_t hpm_get_event(uint8_t counter);
+
+uint64_t hpm_read_counter(uint8_t counter);
+
+uint64_t hpm_read_cycle(void);
+
+uint64_t hpm_read_instret(void);
+
+void hpm_start(void);
+
+void hpm_stop(void);
+
+void hpm_clear(void);
+
+void hpm_sample(hpm_sample_s *sample);
+
+void hpm_print(hpm_sample_s *start, hpm_sample_s *end);
+
+#endif /* __HPM_H__ */
@@ -0,0 +1,27 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Header file for cache maintenance
+// ------------------------------------------------------------------------------------------------
+
+#ifndef __CACHE_H__
+#define __CACHE_H__
+
+// The data cache is write-back. The dirty lines stay in the cache till they are replaced.
+//
+// cache_flush: write back all the dirty lines of the data cache into the memory, invalidate the
+// instruction cache and refetch the next instruction (fence.i). Call it before the memory written by
+// the cpu is read by another bus master or executed as instructions (e.g. a program loaded into memory).
+//
+// memory_fence: order the memory accesses (fence). The core executes the memory accesses in order and the
+// non-cacheable accesses wait for the cache write buffer, so it does not need to do anything.
+
+#define cache_flush()       asm volatile ("fence.i" ::: "memory")
+#define memory_fence()      asm volatile ("fence" ::: "memory")
+
+#endif /* __CACHE_H__ */
@@ -34,6 +34,7 @@ C_SRCS += $(ENV_DIR)/trap.c
 C_SRCS += $(ENV_DIR)/syscalls.c
 C_SRCS += $(DRIVER_DIR)/plic/plic.c
 C_SRCS += $(DRIVER_DIR)/uart/uart.c
+C_SRCS += $(DRIVER_DIR)/hpm/hpm.c
 
 # C include directory
 C_INCS += $(ENV_DIR)
@@ -41,6 +42,7 @@ C_INCS += $(DRIVER_DIR)/gpio
 C_INCS += $(DRIVER_DIR)/uart
 C_INCS += $(DRIVER_DIR)/clic
 C_INCS += $(DRIVER_DIR)/plic
+C_INCS += $(DRIVER_DIR)/hpm
 
 INCLUDES += $(addprefix -I, $(C_INCS))
 
@@ -110,4 +112,4 @@ $(C_OBJS): %.o: %.c
 	$(CC) $(CFLAGS) $(INCLUDES) -c -o $@ $<
 
 clean:
-	rm -f $(TARGET) $(CLEAN_OBJS) *.log
+	rm -f $(TARGET) $(CLEAN_OBJS) *.log *.vimg
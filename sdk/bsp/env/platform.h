@@ -14,11 +14,13 @@
 
 #include "board.h"
 #include "encoding.h"
+#include "cache.h"
 
 #include "clic.h"
 #include "plic.h"
 #include "gpio.h"
 #include "uart.h"
+#include "hpm.h"
 
 // SOC component address mapping
 #define CLIC_BASE       (0x80000000)
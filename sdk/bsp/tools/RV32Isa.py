@@ -0,0 +1,192 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# RV32IM + Zicsr architecture definition of the veriRISCV core
+# ------------------------------------------------------------------------------------------------
+
+"""
+Shared by the co-simulation reference model (tests/cocotb-test/RV32Model.py) and the instruction
+set simulator (RV32Sim.py) so both follow the same core behavior:
+- Machine mode only. mstatus.mpp always reads machine mode
+- ECALL, EBREAK and any other unsupported instruction raise illegal instruction
+- FENCE and FENCE.I do nothing
+- The CSR set of mcsr.sv. Unknown CSRs read 0 and ignore writes
+
+The CSRs are kept in a dict of CSR address => value created by csrInit(). mip and the counters
+are not in the dict, the callers provide them.
+"""
+
+MASK32 = 0xFFFFFFFF
+
+# exception code
+EXC_INSTR_ADDR_MISALIGNED = 0
+EXC_ILL_INSTR = 2
+EXC_LOAD_ADDR_MISALIGNED = 4
+EXC_STORE_ADDR_MISALIGNED = 6
+
+# interrupt code and the mip/mie bit
+INT_SOFTWARE, INT_TIMER, INT_EXTERNAL = 3, 7, 11
+MSIP, MTIP, MEIP = 1 << INT_SOFTWARE, 1 << INT_TIMER, 1 << INT_EXTERNAL
+
+# CSR address
+MSTATUS, MISA, MIE, MTVEC = 0x300, 0x301, 0x304, 0x305
+MSCRATCH, MEPC, MCAUSE, MTVAL, MIP = 0x340, 0x341, 0x342, 0x343, 0x344
+MCYCLE, MCYCLEH = 0xB00, 0xB80
+MINSTRET, MINSTRETH = 0xB02, 0xB82
+MCOUNTINHIBIT = 0x320
+MHPMCOUNTER3, MHPMCOUNTER3H, MHPMEVENT3 = 0xB03, 0xB83, 0x323
+HPM_COUNTERS = 4    # HPM_COUNTERS in core_arch.svh
+HPM_EVENT_NUM = 16  # HPM_EVENT_NUM in core_arch.svh
+MISA_VALUE = 0x40000100
+
+# CSR address => write mask. The CSRs not in the table read 0 and ignore writes
+CSR_WRITE_MASK = {
+    MSTATUS:    0x00000088,
+    MIE:        0x00000888,
+    MTVEC:      0xFFFFFFFF,
+    MSCRATCH:   0xFFFFFFFF,
+    MEPC:       0xFFFFFFFF,
+    MCAUSE:     0xFFFFFFFF,
+    MTVAL:      0xFFFFFFFF,
+    MCOUNTINHIBIT: 0x00000005 | (((1 << HPM_COUNTERS) - 1) << 3),
+}
+CSR_WRITE_MASK.update({MHPMEVENT3 + i: 0xF for i in range(HPM_COUNTERS)})
+
+# The counters and their read only shadows (0xCxx = counter + 0x100)
+CSR_COUNTERS = [MCYCLE, MCYCLEH, MINSTRET, MINSTRETH] + \
+               [MHPMCOUNTER3 + i for i in range(HPM_COUNTERS)] + [MHPMCOUNTER3H + i for i in range(HPM_COUNTERS)]
+
+IO_BASE = 0x80000000
+
+MRET_INSTR = 0x30200073
+
+# ---------------------------------
+# Decode
+# ---------------------------------
+
+def decodeOp(instr):
+    """ Return the opcode if the instruction is supported, None for illegal instruction """
+    opcode = instr & 0x7F
+    funct3 = (instr >> 12) & 0x7
+    funct7 = instr >> 25
+    if opcode == 0x33 and funct7 not in (0x00, 0x01, 0x20):
+        return None
+    if opcode == 0x03 and funct3 in (3, 6, 7):
+        return None
+    if opcode == 0x23 and funct3 > 2:
+        return None
+    if opcode == 0x63 and funct3 in (2, 3):
+        return None
+    if opcode == 0x73 and (funct3 == 4 or (funct3 == 0 and instr != MRET_INSTR)):
+        return None
+    if opcode == 0x0F and funct3 > 1:
+        return None
+    if opcode not in (0x33, 0x13, 0x03, 0x23, 0x63, 0x37, 0x17, 0x6F, 0x67, 0x73, 0x0F):
+        return None
+    return opcode
+
+def immI(instr):
+    return sext(instr >> 20, 12)
+
+def immS(instr):
+    return sext(((instr >> 25) << 5) | ((instr >> 7) & 0x1F), 12)
+
+def immB(instr):
+    return sext((((instr >> 31) & 1) << 12) | (((instr >> 7) & 1) << 11) |
+                (((instr >> 25) & 0x3F) << 5) | (((instr >> 8) & 0xF) << 1), 13)
+
+def immJ(instr):
+    return sext((((instr >> 31) & 1) << 20) | (((instr >> 12) & 0xFF) << 12) |
+                (((instr >> 20) & 1) << 11) | (((instr >> 21) & 0x3FF) << 1), 21)
+
+# ---------------------------------
+# CSR and trap
+# ---------------------------------
+
+def csrInit():
+    """ The CSRs after reset """
+    csr = {addr: 0 for addr in CSR_WRITE_MASK}
+    csr[MSTATUS] = 0x8      # mie is set after reset
+    return csr
+
+def csrRead(csr, addr):
+    """ Read the CSRs in the dict. mip and the counters are read by the caller """
+    if addr == MSTATUS:
+        return (csr[MSTATUS] & 0x88) | 0x1800    # mpp is always machine mode
+    if addr == MISA:
+        return MISA_VALUE
+    return csr.get(addr, 0)
+
+def csrWrite(csr, addr, value):
+    """ Write the CSR with its write mask. Return True if the CSR is writable """
+    # an event id that is not implemented selects no event
+    if MHPMEVENT3 <= addr < MHPMEVENT3 + HPM_COUNTERS and value >= HPM_EVENT_NUM:
+        value = 0
+    if addr not in CSR_WRITE_MASK:
+        return False
+    mask = CSR_WRITE_MASK[addr]
+    csr[addr] = (csr[addr] & ~mask) | (value & mask)
+    return True
+
+def trap(csr, cause, epc, tval, interrupt=False):
+    """ Take the trap. Return the new pc """
+    mstatus = csr[MSTATUS]
+    mie = (mstatus >> 3) & 1
+    csr[MSTATUS] = (mstatus & ~0x88) | (mie << 7)
+    csr[MEPC] = epc
+    csr[MCAUSE] = (cause | (1 << 31)) if interrupt else cause
+    csr[MTVAL] = tval
+    mtvec = csr[MTVEC]
+    if interrupt and (mtvec & 0x3) == 1:
+        return (mtvec & ~0x3) + 4 * cause
+    return mtvec & ~0x3
+
+def mret(csr):
+    """ Return from the trap. Return the new pc """
+    mstatus = csr[MSTATUS]
+    mpie = (mstatus >> 7) & 1
+    csr[MSTATUS] = (mstatus & ~0x88) | (mpie << 3) | 0x80
+    return csr[MEPC]
+
+def interruptCode(pending):
+    """ Same as trap_ctrl.sv, the interrupt code is selected from the unmasked interrupts """
+    return INT_SOFTWARE if pending & MSIP else INT_TIMER if pending & MTIP else INT_EXTERNAL
+
+# ---------------------------------
+# Arithmetic helpers
+# ---------------------------------
+
+def sext(value, bits):
+    """ Sign extend the bits wide value to 32 bits """
+    sign = 1 << (bits - 1)
+    return ((value & (sign - 1)) - (value & sign)) & MASK32
+
+def signed(value):
+    return value - (1 << 32) if value & 0x80000000 else value
+
+def div(a, b):
+    if b == 0:
+        return MASK32
+    if a == 0x80000000 and b == MASK32:
+        return a
+    q = abs(signed(a)) // abs(signed(b))
+    return (-q if (a ^ b) & 0x80000000 else q) & MASK32
+
+def divu(a, b):
+    return a // b if b else MASK32
+
+def rem(a, b):
+    if b == 0:
+        return a
+    if a == 0x80000000 and b == MASK32:
+        return 0
+    r = abs(signed(a)) % abs(signed(b))
+    return (-r if a & 0x80000000 else r) & MASK32
+
+def remu(a, b):
+    return a % b if b else a
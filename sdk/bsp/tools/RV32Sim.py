@@ -0,0 +1,610 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Fast RV32IM + Zicsr instruction set simulator of the veriRISCV SoC
+# ------------------------------------------------------------------------------------------------
+
+"""
+Run the sdk programs without the RTL simulation. The simulator loads the same .verilog image
+as the testbench and models the SoC memory map (see src/rtl/soc/veriRISCV_soc.svh):
+- 0x0000_0000 - 0x7FFF_FFFF: main memory. The address wraps around the memory size.
+- 0x8000_0000: CLIC. msip, mtimecmp and mtime. mtime increments once per instruction.
+- 0x8000_1000: PLIC. The uart interrupts are the external interrupt sources.
+- 0x8000_2000: GPIO0, 0x8000_3000: GPIO1. The inputs read 0.
+- 0x8000_4000: UART0. The transmitted characters go to stdout. The rx fifo is always empty.
+
+The instructions are translated to python one block at a time and the compiled blocks are
+cached by pc, so the hot loops are decoded only once. A block ends at a jump, a CSR instruction
+or an IO store. A branch back to the start of the block is compiled into a loop inside the block.
+A store to a page holding compiled code drops the block cache.
+
+The decode, CSR and trap rules of the core come from RV32Isa.py, shared with the co-simulation
+reference model (tests/cocotb-test/RV32Model.py).
+Interrupts are taken between blocks. The program ends at the self loop of _exit (jal x0, 0)
+unless an enabled timer interrupt can still wake it up.
+"""
+
+import sys
+import time
+import argparse
+
+import RV32Isa
+from RV32Isa import (MASK32, IO_BASE, EXC_INSTR_ADDR_MISALIGNED, EXC_ILL_INSTR, EXC_LOAD_ADDR_MISALIGNED,
+                     EXC_STORE_ADDR_MISALIGNED, MSIP, MTIP, MEIP, MSTATUS, MIE, MIP, MCYCLE, MCYCLEH, MINSTRET,
+                     MINSTRETH, csrInit, decodeOp, interruptCode, immI, immS, immB, immJ, signed,
+                     div, divu, rem, remu)
+from VerilogImage import VerilogImage
+
+# Memory map. The IO devices are selected by address[31:12]
+CLIC_BASE   = 0x80000000
+PLIC_BASE   = 0x80001000
+GPIO0_BASE  = 0x80002000
+GPIO1_BASE  = 0x80003000
+UART0_BASE  = 0x80004000
+
+EXIT_INSTR  = 0x0000006F    # jal x0, 0
+
+# ---------------------------------
+# IO devices
+# ---------------------------------
+
+class Clic:
+    """ avalon_clic.sv """
+
+    def __init__(self, sim):
+        self.sim = sim
+        self.msip = 0
+        self.mtimecmp = 0
+        self.offset = 0     # mtime = retired instructions + offset
+
+    @property
+    def mtime(self):
+        return (self.sim.count + self.offset) & 0xFFFFFFFFFFFFFFFF
+
+    @mtime.setter
+    def mtime(self, value):
+        self.offset = value - self.sim.count
+
+    def timerPending(self):
+        return self.mtimecmp != 0 and self.mtime >= self.mtimecmp
+
+    def read(self, offset):
+        if offset == 0x00:
+            return self.msip
+        if offset == 0x10:
+            return self.mtimecmp & MASK32
+        if offset == 0x14:
+            return self.mtimecmp >> 32
+        if offset == 0x18:
+            return self.mtime & MASK32
+        if offset == 0x1C:
+            return self.mtime >> 32
+        return 0
+
+    def write(self, offset, value):
+        if offset == 0x00:
+            self.msip = value & 1
+        elif offset == 0x10:
+            self.mtimecmp = (self.mtimecmp & ~MASK32) | value
+        elif offset == 0x14:
+            self.mtimecmp = (self.mtimecmp & MASK32) | (value << 32)
+        elif offset == 0x18:
+            self.mtime = (self.mtime & ~MASK32) | value
+        elif offset == 0x1C:
+            self.mtime = (self.mtime & MASK32) | (value << 32)
+
+class Plic:
+    """ avalon_plic.sv. sources: list of the functions returning the interrupt input, LSB first """
+
+    def __init__(self, sources):
+        self.sources = sources
+        self.enable = 0
+
+    def mint(self):
+        return sum(source() << i for i, source in enumerate(self.sources)) & self.enable
+
+    def read(self, offset):
+        if offset == 0x0:
+            return self.enable
+        if offset == 0x4:
+            return self.mint()
+        return 0
+
+    def write(self, offset, value):
+        if offset == 0x0:
+            self.enable = value
+
+class Gpio:
+    """ avalon_gpio.sv. Nothing drives the inputs so the input bits read 0 """
+
+    def __init__(self):
+        self.regs = [0] * 4     # value, input_en, output_en, port
+
+    def read(self, offset):
+        if offset == 0x0:
+            return self.regs[0] & ~self.regs[1] & MASK32
+        return self.regs[(offset >> 2) & 0x3] if offset < 0x10 else self.read(0)
+
+    def write(self, offset, value):
+        if offset < 0x10:
+            self.regs[offset >> 2] = value
+
+class Uart:
+    """ avalon_uart.sv. The tx fifo drains immediately into out and the rx fifo is always empty """
+
+    def __init__(self, out):
+        self.out = out
+        self.txctrl = 0
+        self.rxctrl = 0
+        self.ie = 0
+        self.div = 0
+
+    def ip(self):
+        txwm = ((self.txctrl >> 16) & 0x7) > 0 and self.ie & 1
+        return int(bool(txwm))
+
+    def txwm(self):
+        return self.ip() & 1
+
+    def rxwm(self):
+        return 0
+
+    def read(self, offset):
+        if offset == 0x04:
+            return 0x80000000
+        if offset == 0x08:
+            return self.txctrl
+        if offset == 0x0C:
+            return self.rxctrl
+        if offset == 0x10:
+            return self.ie
+        if offset == 0x14:
+            return self.ip()
+        if offset == 0x18:
+            return self.div
+        return 0
+
+    def write(self, offset, value):
+        if offset == 0x00:
+            if self.txctrl & 1:
+                self.out.write(bytes([value & 0xFF]))
+                if value & 0xFF == 0x0A:
+                    self.out.flush()
+        elif offset == 0x08:
+            self.txctrl = value & 0x70003
+        elif offset == 0x0C:
+            self.rxctrl = value & 0x70001
+        elif offset == 0x10:
+            self.ie = value & 0x3
+        elif offset == 0x18:
+            self.div = value & 0xFFFF
+
+# ---------------------------------
+# Simulator
+# ---------------------------------
+
+class RV32Sim:
+
+    MAX_BLOCK = 64          # maximum number of instructions in a block
+    LOOP_LIMIT = 4096       # maximum number of instructions a looping block runs before returning
+    PAGE_SHIFT = 8          # granularity of the self-modifying code check
+
+    def __init__(self, memSize=1 << 20, resetPc=0, out=None):
+        """
+            @param memSize: main memory size in bytes. Must be power of 2
+            @param resetPc: the pc after reset
+            @param out: binary stream receiving the uart output. Default is stdout
+        """
+        if sys.byteorder != 'little':
+            raise RuntimeError("The simulator memory views require a little endian host")
+        self.mem = bytearray(memSize)
+        self.memMask = memSize - 1
+        self.half = memoryview(self.mem).cast('H')
+        self.word = memoryview(self.mem).cast('I')
+        self.code = bytearray((memSize >> self.PAGE_SHIFT) + 1)
+        self.regs = [0] * 32
+        self.pc = resetPc
+        self.csr = csrInit()
+        self.count = 0              # retired instructions
+        self.limit = None
+        self.event = 0              # service() is called when count reaches event
+        self.running = True
+        self.blocks = {}
+        self.compiled = 0
+        self.clic = Clic(self)
+        self.uart = Uart(out or sys.stdout.buffer)
+        self.plic = Plic([self.uart.txwm, self.uart.rxwm])
+        self.devices = {
+            CLIC_BASE:  self.clic,
+            PLIC_BASE:  self.plic,
+            GPIO0_BASE: Gpio(),
+            GPIO1_BASE: Gpio(),
+            UART0_BASE: self.uart,
+        }
+
+    # ---------------------------------
+    # Memory
+    # ---------------------------------
+
+    def load(self, segments):
+        """ Load the program. segments: list of (address, bytes) """
+        for addr, data in segments:
+            addr &= self.memMask
+            self.mem[addr:addr + len(data)] = data
+        self.invalidate()
+
+    def invalidate(self):
+        """ Drop all the compiled blocks """
+        self.blocks.clear()
+        self.code[:] = bytes(len(self.code))
+
+    def ioRead(self, addr, size, sign):
+        device = self.devices.get(addr & 0xFFFFF000)
+        value = device.read(addr & 0xFFC) if device else 0
+        value = (value >> ((addr & 0x3) * 8)) & ((1 << (size * 8)) - 1)
+        if sign and size < 4 and value >> (size * 8 - 1):
+            value |= MASK32 & ~((1 << (size * 8)) - 1)
+        return value
+
+    def ioWrite(self, addr, size, value):
+        device = self.devices.get(addr & 0xFFFFF000)
+        if device:
+            device.write(addr & 0xFFC, (value << ((addr & 0x3) * 8)) & MASK32)
+        self.event = 0      # the write may change an interrupt
+
+    # ---------------------------------
+    # CSR and trap
+    # ---------------------------------
+
+    def pending(self):
+        """ The interrupt pending bits in mip format """
+        return (MSIP if self.clic.msip else 0) | (MTIP if self.clic.timerPending() else 0) | \
+               (MEIP if self.plic.mint() else 0)
+
+    def csrRead(self, addr):
+        if addr == MIP:
+            return self.pending()
+        # one instruction per cycle. The hpm counters have no event to count and read 0
+        if addr in (MCYCLE, MINSTRET, MCYCLE + 0x100, MINSTRET + 0x100):
+            return self.count & MASK32
+        if addr in (MCYCLEH, MINSTRETH, MCYCLEH + 0x100, MINSTRETH + 0x100):
+            return (self.count >> 32) & MASK32
+        return RV32Isa.csrRead(self.csr, addr)
+
+    def csrWrite(self, addr, value):
+        if RV32Isa.csrWrite(self.csr, addr, value):
+            self.event = 0
+
+    def csrOp(self, addr, op, src, read, write):
+        """ CSRRW (op 1), CSRRS (op 2) and CSRRC (op 3). Return the old value """
+        old = self.csrRead(addr) if read else 0
+        if op == 1:
+            self.csrWrite(addr, src)
+        elif write:
+            self.csrWrite(addr, old | src if op == 2 else old & ~src)
+        return old
+
+    def exception(self, cause, pc, tval):
+        return RV32Isa.trap(self.csr, cause, pc, tval)
+
+    def mret(self):
+        self.event = 0
+        return RV32Isa.mret(self.csr)
+
+    def idle(self, pc):
+        """
+        The self loop. Skip the time to the timer interrupt if it can wake up the core,
+        otherwise the program is finished.
+        """
+        self.event = 0
+        enabled = self.csr[MIE] if self.csr[MSTATUS] & 0x8 else 0
+        if self.pending() & enabled:
+            return pc
+        if enabled & MTIP and self.clic.mtimecmp:
+            self.clic.mtime = self.clic.mtimecmp
+            return pc
+        self.running = False
+        return pc
+
+    def service(self):
+        """ Check the instruction limit, take the pending interrupt and schedule the next check """
+        if self.limit is not None and self.count >= self.limit:
+            self.running = False
+        if not self.running:
+            return False
+        pending = self.pending()
+        if self.csr[MSTATUS] & 0x8 and pending & self.csr[MIE]:
+            self.pc = RV32Isa.trap(self.csr, interruptCode(pending), self.pc, 0, interrupt=True)
+        event = self.limit if self.limit is not None else 1 << 64
+        if not pending & MTIP and self.clic.mtimecmp:
+            event = min(event, self.count + self.clic.mtimecmp - self.clic.mtime)
+        self.event = event
+        return True
+
+    # ---------------------------------
+    # Translation
+    # ---------------------------------
+
+    def fetch(self, pc):
+        return self.word[(pc & self.memMask) >> 2]
+
+    def compile(self, pc):
+        """ Translate the block starting at pc to a python function and cache it """
+        instrs = []
+        addr = pc
+        while len(instrs) < self.MAX_BLOCK:
+            instr = self.fetch(addr)
+            opcode = instr & 0x7F
+            if opcode == 0x73 and instrs:   # SYSTEM instruction starts its own block
+                break
+            instrs.append((addr, instr))
+            self.code[(addr & self.memMask) >> self.PAGE_SHIFT] = 1
+            addr = (addr + 4) & MASK32
+            if opcode in (0x6F, 0x67, 0x73) or decodeOp(instr) is None:
+                break
+        loop = any(self.branchTarget(a, i) == pc for a, i in instrs) and instrs[0][1] != EXIT_INSTR
+
+        lines = []
+        for k, (addr, instr) in enumerate(instrs, 1):
+            lines += self.translate(addr, instr, k, pc, loop)
+        last, lastInstr = instrs[-1]
+        if not self.endsBlock(lastInstr):
+            lines += self.jump((last + 4) & MASK32, len(instrs), pc, loop)
+
+        indent = "        " if loop else "    "
+        src = ["def block():"]
+        if loop:
+            src += ["    n = 0", "    while True:"]
+        src += [indent + line for line in lines]
+        namespace = {
+            'x': self.regs, 'W': self.word, 'H': self.half, 'B': self.mem, 'C': self.code, 's': self,
+            'io_r': self.ioRead, 'io_w': self.ioWrite, 'exc': self.exception,
+            'div': div, 'divu': divu, 'rem': rem, 'remu': remu,
+        }
+        exec(compile("\n".join(src), f"<block {pc:08x}>", "exec"), namespace)
+        block = namespace['block']
+        self.blocks[pc] = block
+        self.compiled += 1
+        return block
+
+    @staticmethod
+    def endsBlock(instr):
+        opcode = instr & 0x7F
+        return opcode in (0x6F, 0x67, 0x73) or decodeOp(instr) is None
+
+    @staticmethod
+    def branchTarget(pc, instr):
+        """ Target of a branch or jal, None for the other instructions """
+        opcode = instr & 0x7F
+        if opcode == 0x63 and decodeOp(instr):
+            return (pc + immB(instr)) & MASK32
+        if opcode == 0x6F:
+            return (pc + immJ(instr)) & MASK32
+        return None
+
+    def exit(self, target, k, loop):
+        """ Return statement leaving the block after k instructions """
+        return f"return {target}, {'n + ' if loop else ''}{k}"
+
+    def jump(self, target, k, start, loop):
+        """ Statements continuing at target after k instructions """
+        if loop and target == start:
+            return [f"n += {k}", f"if n >= {self.LOOP_LIMIT}:", f"    return {start}, n", "continue"]
+        return [self.exit(target, k, loop)]
+
+    def translate(self, pc, instr, k, start, loop):
+        """ Translate one instruction. k: number of instructions retired after this one """
+        opcode = decodeOp(instr)
+        rd = (instr >> 7) & 0x1F
+        funct3 = (instr >> 12) & 0x7
+        r1 = (instr >> 15) & 0x1F
+        r2 = (instr >> 20) & 0x1F
+        funct7 = instr >> 25
+        rs1 = f"x[{r1}]" if r1 else "0"
+        rs2 = f"x[{r2}]" if r2 else "0"
+        dst = f"x[{rd}]" if rd else "_"
+        npc = (pc + 4) & MASK32
+        exc = lambda cause, tval: [f"return exc({cause}, {pc}, {tval}), {'n + ' if loop else ''}{k}"]
+
+        if opcode is None:
+            return exc(EXC_ILL_INSTR, instr)
+
+        if opcode == 0x0F:      # FENCE/FENCE.I
+            return []
+
+        if opcode == 0x13:      # OP-IMM
+            if not rd:
+                return []
+            imm = signed(immI(instr))
+            return [f"{dst} = " + self.aluExpr(funct3, rs1, imm, (instr >> 30) & 1 and funct3 == 5, True)]
+
+        if opcode == 0x33:      # OP
+            if not rd:
+                return []
+            if funct7 == 0x01:
+                return [f"{dst} = " + self.muldivExpr(funct3, rs1, rs2)]
+            return [f"{dst} = " + self.aluExpr(funct3, rs1, rs2, funct7 == 0x20, False)]
+
+        if opcode == 0x37:      # LUI
+            return [f"{dst} = {instr & 0xFFFFF000}"] if rd else []
+
+        if opcode == 0x17:      # AUIPC
+            return [f"{dst} = {(pc + (instr & 0xFFFFF000)) & MASK32}"] if rd else []
+
+        if opcode == 0x03:      # LOAD
+            imm = signed(immI(instr))
+            size = 1 << (funct3 & 3)
+            sign = not funct3 & 4 and size < 4
+            mask = self.memMask
+            if size == 4:
+                fast = f"W[(a & {mask}) >> 2]"
+            elif size == 2:
+                fast = f"H[(a & {mask}) >> 1]"
+            else:
+                fast = f"B[a & {mask}]"
+            if sign:
+                bit = 1 << (size * 8 - 1)
+                fast = f"(({fast} ^ {bit}) - {bit}) & {MASK32}"
+            lines = [f"a = ({rs1} + {imm}) & {MASK32}", f"if a & {IO_BASE | (size - 1)}:"]
+            if size > 1:
+                lines += [f"    if a & {size - 1}:"] + ["        " + l for l in exc(EXC_LOAD_ADDR_MISALIGNED, "a")]
+            lines += [f"    {dst} = io_r(a, {size}, {int(sign)})", "else:", f"    {dst} = {fast}"]
+            return lines
+
+        if opcode == 0x23:      # STORE
+            imm = signed(immS(instr))
+            size = 1 << funct3
+            if size == 4:
+                fast = f"W[a >> 2] = {rs2}"
+            elif size == 2:
+                fast = f"H[a >> 1] = {rs2} & 0xFFFF"
+            else:
+                fast = f"B[a] = {rs2} & 0xFF"
+            lines = [f"a = ({rs1} + {imm}) & {MASK32}", f"if a & {IO_BASE | (size - 1)}:"]
+            if size > 1:
+                lines += [f"    if a & {size - 1}:"] + ["        " + l for l in exc(EXC_STORE_ADDR_MISALIGNED, "a")]
+            lines += [f"    io_w(a, {size}, {rs2})", "    " + self.exit(npc, k, loop)]
+            lines += ["a &= " + str(self.memMask), fast, f"if C[a >> {self.PAGE_SHIFT}]:", "    s.invalidate()",
+                      "    " + self.exit(npc, k, loop)]
+            return lines
+
+        if opcode == 0x63:      # BRANCH
+            target = self.branchTarget(pc, instr)
+            if target & 0x3:
+                taken = exc(EXC_INSTR_ADDR_MISALIGNED, target)
+            else:
+                taken = self.jump(target, k, start, loop)
+            return [f"if {self.branchExpr(funct3, rs1, rs2)}:"] + ["    " + l for l in taken]
+
+        if opcode == 0x6F:      # JAL
+            if instr == EXIT_INSTR:
+                return [f"return s.idle({pc}), {'n + ' if loop else ''}{k}"]
+            target = self.branchTarget(pc, instr)
+            if target & 0x3:
+                return exc(EXC_INSTR_ADDR_MISALIGNED, target)
+            return ([f"{dst} = {npc}"] if rd else []) + self.jump(target, k, start, loop)
+
+        if opcode == 0x67:      # JALR
+            imm = signed(immI(instr))
+            lines = [f"t = ({rs1} + {imm}) & {MASK32 & ~1}", "if t & 2:"]
+            lines += ["    " + l for l in exc(EXC_INSTR_ADDR_MISALIGNED, "t")]
+            lines += [f"{dst} = {npc}"] if rd else []
+            return lines + [f"return t, {'n + ' if loop else ''}{k}"]
+
+        # SYSTEM: MRET or CSR. Always the only instruction of the block
+        if funct3 == 0:
+            return ["return s.mret(), 1"]
+        addr = instr >> 20
+        src = r1 if funct3 & 4 else rs1
+        op = funct3 & 3
+        # CSRRW with rd = x0 does not read. CSRRS/CSRRC with rs1 = x0 does not write
+        read = op != 1 or rd != 0
+        return [f"{dst} = s.csrOp({addr}, {op}, {src}, {int(read)}, {int(r1 != 0)})", f"return {npc}, 1"]
+
+    @staticmethod
+    def aluExpr(funct3, a, b, alt, imm):
+        """ b is a python int for the immediate instructions and a register expression otherwise """
+        if imm:
+            b = b & MASK32
+            shamt = b & 0x1F
+        else:
+            shamt = f"({b} & 31)"
+        if funct3 == 0:
+            if alt and not imm:
+                return f"({a} - {b}) & {MASK32}"
+            return f"({a} + {b}) & {MASK32}"
+        if funct3 == 1:
+            return f"({a} << {shamt}) & {MASK32}"
+        if funct3 == 2:
+            sb = signed(b) if imm else f"(({b} ^ 2147483648) - 2147483648)"
+            return f"int((({a} ^ 2147483648) - 2147483648) < {sb})"
+        if funct3 == 3:
+            return f"int({a} < {b})"
+        if funct3 == 4:
+            return f"{a} ^ {b}"
+        if funct3 == 5:
+            if alt:
+                return f"((({a} ^ 2147483648) - 2147483648) >> {shamt}) & {MASK32}"
+            return f"{a} >> {shamt}"
+        if funct3 == 6:
+            return f"{a} | {b}"
+        return f"{a} & {b}"
+
+    @staticmethod
+    def muldivExpr(funct3, a, b):
+        sa = f"(({a} ^ 2147483648) - 2147483648)"
+        sb = f"(({b} ^ 2147483648) - 2147483648)"
+        if funct3 == 0:
+            return f"({a} * {b}) & {MASK32}"
+        if funct3 == 1:
+            return f"(({sa} * {sb}) >> 32) & {MASK32}"
+        if funct3 == 2:
+            return f"(({sa} * {b}) >> 32) & {MASK32}"
+        if funct3 == 3:
+            return f"({a} * {b}) >> 32"
+        return f"{('div', 'divu', 'rem', 'remu')[funct3 - 4]}({a}, {b})"
+
+    @staticmethod
+    def branchExpr(funct3, a, b):
+        if funct3 == 0:
+            return f"{a} == {b}"
+        if funct3 == 1:
+            return f"{a} != {b}"
+        if funct3 in (4, 5):
+            op = '<' if funct3 == 4 else '>='
+            return f"(({a} ^ 2147483648) - 2147483648) {op} (({b} ^ 2147483648) - 2147483648)"
+        return f"{a} {'<' if funct3 == 6 else '>='} {b}"
+
+    # ---------------------------------
+    # Run
+    # ---------------------------------
+
+    def run(self, maxInstr=None):
+        """ Run until the program exits or maxInstr instructions are retired. Return True if the program exits """
+        self.limit = maxInstr
+        self.event = 0
+        self.running = True
+        blocks = self.blocks
+        compile = self.compile
+        pc = self.pc
+        while True:
+            block = blocks.get(pc)
+            if block is None:
+                block = compile(pc)
+            pc, n = block()
+            self.count += n
+            if self.count >= self.event:
+                self.pc = pc
+                if not self.service():
+                    break
+                pc = self.pc
+        self.uart.out.flush()
+        return self.limit is None or self.count < self.limit
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Run a program on the veriRISCV instruction set simulator')
+    parser.add_argument('-file', '-f', type=str, required=True, nargs='?', help='The verilog file of the program')
+    parser.add_argument('-max', '-m', type=int, default=None, nargs='?', help='Maximum number of instructions')
+    parser.add_argument('-mem', type=int, default=1 << 20, nargs='?', help='Main memory size in bytes')
+    parser.add_argument('-stats', '-s', action='store_true', help='Print the simulation statistics')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = cmdParser()
+    sim = RV32Sim(args.mem)
+    sim.load(VerilogImage(args.file))
+    start = time.time()
+    exited = sim.run(args.max)
+    elapsed = time.time() - start
+    if args.stats or not exited:
+        status = f"Exit at pc {hex(sim.pc)}, a0 = {hex(sim.regs[10])}" if exited else \
+                 f"Stopped at instruction limit, pc {hex(sim.pc)}"
+        print(f"\n{status}\nInstructions: {sim.count}, Blocks: {sim.compiled}, Time: {elapsed:.2f}s, "
+              f"MIPS: {sim.count / elapsed / 1e6 if elapsed else 0:.2f}", file=sys.stderr)
+    sys.exit(0 if exited else 1)
@@ -11,10 +11,14 @@
 # ------------------------------------------------------------------------------------------------
 
 import sys
+import time
+import zlib
 import argparse
 import serial
 from serial.tools.list_ports import comports
 
+from VerilogImage import VerilogImage
+
 PORT_NAME = {
     "arty": "Digilent USB Device",
     "de2" : "USB-Serial Controller"
@@ -24,76 +28,134 @@ class UartDownload:
 
     """ NOTE: Make sure to reset the chip before a new download """
 
-    def __init__(self, port, file, baudrate=115200, logFile='download.log'):
+    START_KEY = bytes([0x11, 0x11, 0x11, 0x11, 0x50, 0x50, 0x50, 0x50])  # send LSB first
+    END_KEY   = bytes([0xEE, 0xEE, 0xEE, 0xEE, 0x50, 0x50, 0x50, 0x50])
+    BAUD_KEY  = bytes([0x33, 0x33, 0x33, 0x33, 0x50, 0x50, 0x50, 0x50])
+    BURST_KEY = bytes([0x44, 0x44, 0x44, 0x44, 0x50, 0x50, 0x50, 0x50])
+
+    BURST_WORDS = 1024  # maximum number of words in a burst
+
+    def __init__(self, port, file, baudrate=115200, logFile=None, fastBaudrate=None, clkFreqMHz=50, chunkSize=4096,
+                 burst=True):
         """
-            @param size: instruction rom size in KB
+            @param port: uart port
+            @param file: the verilog file to download
             @param baudrate: uart baudrate
+            @param logFile: write the downloaded address and data to this file. No log if None
+            @param fastBaudrate: switch the uart host to this baudrate before downloading. No switch if None
+            @param clkFreqMHz: clock frequency of the SoC, used to calculate the uart divider
+            @param chunkSize: number of bytes sent in one write
+            @param burst: use the burst write command. Otherwise each word is sent with its address
         """
         self.baudrate = baudrate
         self.port = port
         self.file = file
         self.logFile = logFile
+        self.fastBaudrate = fastBaudrate
+        self.clkFreqMHz = clkFreqMHz
+        self.chunkSize = chunkSize
+        self.burst = burst
 
     def setupUart(self):
         """ Setup uart port """
-        self.serPort = serial.Serial(self.port, self.baudrate)
+        self.serPort = serial.Serial(self.port, self.baudrate, timeout=5)
 
     def uartWrite(self, data):
         return self.serPort.write(data)
 
     def startCmd(self):
-        cmd = [0x11, 0x11, 0x11, 0x11, 0x50, 0x50, 0x50, 0x50] # send LSB first
-        self.uartWrite(cmd)
+        self.uartWrite(self.START_KEY)
 
     def endCmd(self):
-        cmd = [0xEE, 0xEE, 0xEE, 0xEE, 0x50, 0x50, 0x50, 0x50]
-        self.uartWrite(cmd)
+        self.uartWrite(self.END_KEY)
+        self.serPort.flush()
 
-    def downloadFromVerilog(self):
+    def baudCmd(self):
+        """
+        Switch the uart host to the fast baudrate.
+        The uart host takes the new divider after the frame is received, so we wait till
+        the frame is sent before changing the baudrate of the port.
+        """
+        div = self.clkFreqMHz * 1000000 // self.fastBaudrate
+        self.uartWrite(self.BAUD_KEY + div.to_bytes(2, 'little') + bytes(6))
+        self.serPort.flush()
+        time.sleep(0.01)
+        self.serPort.baudrate = self.fastBaudrate
+        print(f"Switched baudrate to {self.fastBaudrate}")
+
+    def buildStream(self, regions):
         """
-        Read the memory content from the verilog file generated by objdump command.
-        and send the data through the uart host
-        Verilog file Format:
-        @00000000
-        73 70 04 30 97 11 00 00 93 81 41 CC 17 01 01 00
-        13 01 41 FF 13 05 00 4D 93 05 00 4D 63 78 B5 00
-        23 20 05 00 13 05 45 00 E3 6C B5 FE 17 05 00 00
-        13 05 C5 35 EF 00 40 3A EF 00 80 08 13 05 00 00
-        93 05 00 00 EF 00 C0 00 6F 00 40 30 6F 00 00 00
-        @00000050
-        13 01 01 FD 23 26 81 02 13 04 01 03 23 2E A4 FC
-        23 2C B4 FC 93 07 F0 FF 23 24 F4 FE B7 17 00 80
+        Build the byte stream sent to the uart host.
+        Each word is sent as 4 byte address + 4 byte data, LSB first.
         """
+        stream = bytearray()
+        for addr, data in regions:
+            for i in range(0, len(data), 4):
+                stream += (addr + i).to_bytes(4, 'little')
+                stream += data[i:i+4]
+        return stream
+
+    def buildBurstStream(self, regions):
+        """
+        Build the byte stream of burst write commands.
+        Each burst is BURST_KEY + start address + length in words + data, LSB first.
+        Return the stream and the expected CRC of each burst.
+        """
+        stream = bytearray()
+        crcs = []
+        burstBytes = self.BURST_WORDS * 4
+        for addr, data in regions:
+            for i in range(0, len(data), burstBytes):
+                chunk = data[i:i+burstBytes]
+                stream += self.BURST_KEY
+                stream += (addr + i).to_bytes(4, 'little')
+                stream += (len(chunk) // 4).to_bytes(4, 'little')
+                stream += chunk
+                crcs.append((addr + i, zlib.crc32(chunk)))
+        return stream, crcs
+
+    def checkCrc(self, crcs):
+        """ Read back the CRC of each burst computed by the uart host and compare with the expected one """
+        resp = self.serPort.read(len(crcs) * 4)
+        errors = 0
+        for i, (addr, crc) in enumerate(crcs):
+            recvCrc = int.from_bytes(resp[i*4:i*4+4], 'little')
+            if recvCrc != crc:
+                errors += 1
+                print(f"CRC mismatch for the burst at address {hex(addr)}. Expected {hex(crc)}. Actual {hex(recvCrc)}")
+        return errors == 0
+
+    def writeLog(self, regions):
+        """ Write the downloaded address and data to the log file """
+        lines = []
+        for addr, data in regions:
+            for i in range(0, len(data), 4):
+                lines.append(f"{hex(addr + i)}: {hex(int.from_bytes(data[i:i+4], 'little'))}\n")
+        with open(self.logFile, "w") as LOG:
+            LOG.write("".join(lines))
+
+    def downloadFromVerilog(self):
+        """ Download the verilog file. The whole stream is built first and sent in large chunks """
         print("Start downloading...")
-        FH = open(self.file, "r")
-        LOG = open(self.logFile, "w")
-        lines  = FH.readlines()
-        for value in lines:
-            if '@' in value:    # this is address line
-                addr = int(value.rstrip()[1:], 16)
-            else:               # this is data line
-                line = value.split()
-                data = [line[i:i+4] for i in range(0, len(line), 4)]
-                for d in data:
-                    word = "".join(reversed(d))
-                    LOG.write(f"{hex(addr)}: {hex(int(word, 16))}\n")
-                    # send the address and data
-                    # send byte by bytes. Need to use [] here
-                    self.uartWrite([(addr >> 0) & 0xFF])
-                    self.uartWrite([(addr >> 8) & 0xFF])
-                    self.uartWrite([(addr >> 16) & 0xFF])
-                    self.uartWrite([(addr >> 25) & 0xFF])
-                    self.uartWrite([int(d[0], 16)])
-                    self.uartWrite([int(d[1], 16)])
-                    self.uartWrite([int(d[2], 16)])
-                    self.uartWrite([int(d[3], 16)])
-                    addr = addr + 4
-        FH.close()
-        LOG.close()
-        print("Download complete...")
+        regions = VerilogImage(self.file).coalesce()
+        if self.burst:
+            stream, crcs = self.buildBurstStream(regions)
+        else:
+            stream, crcs = self.buildStream(regions), []
+        view = memoryview(stream)
+        for i in range(0, len(stream), self.chunkSize):
+            self.uartWrite(view[i:i+self.chunkSize])
+        if self.logFile:
+            self.writeLog(regions)
+        words = sum(len(data) for _, data in regions) // 4
+        if crcs and not self.checkCrc(crcs):
+            raise ValueError("Download failed: CRC mismatch")
+        print(f"Download complete... {words} words in {len(stream)} bytes")
 
     def run(self):
         self.setupUart()
+        if self.fastBaudrate:
+            self.baudCmd()
         self.startCmd()
         self.downloadFromVerilog()
         self.endCmd()
@@ -102,6 +164,10 @@ def cmdParser():
     parser = argparse.ArgumentParser(description='Upload Instruction ROM through Uart')
     parser.add_argument('-file', '-f', type=str, required=True, nargs='?', help='The Instruction ROM file')
     parser.add_argument('-board', '-b',  type=str, required=True, nargs='?', help='The FPGA board')
+    parser.add_argument('-baud', type=int, default=None, help='Switch to a higher baudrate for the download')
+    parser.add_argument('-legacy', action='store_true', help='Send address + data for each word instead of bursts')
+    parser.add_argument('-clk', type=int, default=50, help='SoC clock frequency in MHz')
+    parser.add_argument('-log', type=str, default=None, nargs='?', const='download.log', help='Write the download log')
     return parser.parse_args()
 
 def getComport(board):
@@ -123,5 +189,6 @@ if __name__ == "__main__":
     f = args.file
     board = args.board
     port = getComport(board)
-    uartDownload = UartDownload(port, f)
+    uartDownload = UartDownload(port, f, logFile=args.log, fastBaudrate=args.baud, clkFreqMHz=args.clk,
+                                burst=not args.legacy)
     uartDownload.run()
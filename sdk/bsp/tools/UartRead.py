@@ -15,76 +15,113 @@ import argparse
 import serial
 from serial.tools.list_ports import comports
 
+from VerilogImage import VerilogImage
+
 PORT_NAME = {
     "arty": "Digilent USB Device",
     "de2" : "USB-Serial Controller"
 }
 
 class uartRead:
-    def __init__(self, port, baudrate=115200, inLogFile='download.log', outLogFile='read.log'):
+
+    START_KEY = bytes([0x22, 0x22, 0x22, 0x22, 0x50, 0x50, 0x50, 0x50])  # send LSB first
+    END_KEY   = bytes([0xEE, 0xEE, 0xEE, 0xEE, 0x50, 0x50, 0x50, 0x50])
+
+    WINDOW_WORDS = 512  # number of read requests sent in one write
+
+    def __init__(self, port, file, baudrate=115200, outLogFile=None):
         """
-            @param size: instruction rom size in KB
-            @param baudrate: uart baudrate
+            @param port: uart port
+            @param file: the verilog file to verify against
+            @param baudrate: uart baudrate. Use the baudrate of the last download if it was switched
+            @param outLogFile: write the read address and data to this file. No log if None
         """
         self.baudrate = baudrate
         self.port = port
-        self.inLogFile = inLogFile
+        self.file = file
         self.outLogFile = outLogFile
 
     def setupUart(self):
         """ Setup uart port """
-        self.serPort = serial.Serial(self.port, self.baudrate)
+        self.serPort = serial.Serial(self.port, self.baudrate, timeout=5)
 
     def uartWrite(self, data):
         return self.serPort.write(data)
 
     def startCmd(self):
-        cmd = [0x22, 0x22, 0x22, 0x22, 0x50, 0x50, 0x50, 0x50] # send LSB first
-        self.uartWrite(cmd)
+        self.uartWrite(self.START_KEY)
 
     def endCmd(self):
-        cmd = [0xEE, 0xEE, 0xEE, 0xEE, 0x50, 0x50, 0x50, 0x50]
-        self.uartWrite(cmd)
+        self.uartWrite(self.END_KEY)
+        self.serPort.flush()
+
+    def readWords(self, addrs):
+        """
+        Read the words at the addresses.
+        The requests are sent one window at a time and the responses of the previous window are read
+        after the next window is sent, so the uart host always has requests to process.
+        Return the data as a bytearray.
+        """
+        windows = [addrs[i:i+self.WINDOW_WORDS] for i in range(0, len(addrs), self.WINDOW_WORDS)]
+        data = bytearray()
+        pending = 0
+        for window in windows:
+            # request: 4 byte address + 4 dummy data bytes
+            self.uartWrite(b"".join(addr.to_bytes(4, 'little') + bytes(4) for addr in window))
+            if pending:
+                data += self.serPort.read(pending * 4)
+            pending = len(window)
+        data += self.serPort.read(pending * 4)
+        if len(data) != len(addrs) * 4:
+            raise ValueError(f"Read timeout: received {len(data) // 4} of {len(addrs)} words")
+        return data
+
+    def mismatchRanges(self, addrs, expected, actual):
+        """ Compare the words and merge the consecutive mismatching addresses into [start, end] ranges """
+        ranges = []
+        for i, addr in enumerate(addrs):
+            if expected[i*4:i*4+4] != actual[i*4:i*4+4]:
+                if ranges and ranges[-1][1] + 4 == addr:
+                    ranges[-1][1] = addr
+                else:
+                    ranges.append([addr, addr])
+        return ranges
 
     def read(self):
         """
-        Read data base on the address specified
+        Read back the memory regions of the verilog file and verify them against the image
         """
         print("Start reading...")
-        FH = open(self.inLogFile, "r")
-        LOG = open(self.outLogFile, "w")
-        lines  = FH.readlines()
-        for value in lines:
-            addr, data = value.split(':')
-            addr = int(addr, 16)
-            data = int(data.rstrip(), 16)
-            # send the address
-            self.uartWrite([(addr >> 0) & 0xFF])
-            self.uartWrite([(addr >> 8) & 0xFF])
-            self.uartWrite([(addr >> 16) & 0xFF])
-            self.uartWrite([(addr >> 25) & 0xFF])
-            # send 4 dummy data
-            self.uartWrite([0x00])
-            self.uartWrite([0x00])
-            self.uartWrite([0x00])
-            self.uartWrite([0x00])
-            dataByte = self.serPort.read(4)
-            recvData = int.from_bytes(dataByte, "little")
-            LOG.write(f"{hex(addr)}: {hex(recvData)}\n")
-            if data != recvData:
-                print(f"Received different data at address {hex(addr)}. Expected data {hex(data)}. Actual data {hex(recvData)}")
-        print("Read complete...")
+        regions = VerilogImage(self.file).coalesce()
+        addrs = []
+        expected = bytearray()
+        for addr, data in regions:
+            addrs += range(addr, addr + len(data), 4)
+            expected += data
+        actual = self.readWords(addrs)
+        if self.outLogFile:
+            with open(self.outLogFile, "w") as LOG:
+                LOG.write("".join(f"{hex(addr)}: {hex(int.from_bytes(actual[i*4:i*4+4], 'little'))}\n"
+                                  for i, addr in enumerate(addrs)))
+        ranges = self.mismatchRanges(addrs, expected, actual)
+        for start, end in ranges:
+            print(f"Mismatch at address {hex(start)} - {hex(end)}: {(end - start) // 4 + 1} words")
+        print(f"Read complete... {len(addrs)} words, {len(ranges)} mismatch ranges")
+        return not ranges
 
     def run(self):
         self.setupUart()
         self.startCmd()
-        self.read()
+        passed = self.read()
         self.endCmd()
+        return passed
 
 def cmdParser():
-    parser = argparse.ArgumentParser(description='Upload Instruction ROM through Uart')
+    parser = argparse.ArgumentParser(description='Read back and verify the Instruction ROM through Uart')
     parser.add_argument('-file', '-f', type=str, required=True, nargs='?', help='The Instruction ROM file')
     parser.add_argument('-board', '-b',  type=str, required=True, nargs='?', help='The FPGA board')
+    parser.add_argument('-baud', type=int, default=115200, help='Current baudrate of the uart host')
+    parser.add_argument('-log', type=str, default=None, nargs='?', const='read.log', help='Write the read log')
     return parser.parse_args()
 
 def getComport(board):
@@ -105,5 +142,5 @@ if __name__ == "__main__":
     args = cmdParser()
     board = args.board
     port = getComport(board)
-    uartRead = uartRead(port)
-    uartRead.run()
+    uartRead = uartRead(port, args.file, baudrate=args.baud, outLogFile=args.log)
+    sys.exit(0 if uartRead.run() else 1)
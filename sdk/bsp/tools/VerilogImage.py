@@ -0,0 +1,200 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Memory image of the .verilog file generated by objdump
+# ------------------------------------------------------------------------------------------------
+
+"""
+Shared by the uart tools, the instruction set simulator and the cocotb testbench.
+
+The .verilog file is read line by line into one bytearray per contiguous memory region.
+The parsed image is cached next to the .verilog file as <file>.vimg so the next load maps
+the binary file instead of parsing the text again. The cache is rebuilt when the size or
+the modification time of the .verilog file changes.
+
+Verilog file Format:
+@00000000
+73 70 04 30 97 11 00 00 93 81 41 CC 17 01 01 00
+13 01 41 FF 13 05 00 4D 93 05 00 4D 63 78 B5 00
+@00000050
+13 01 01 FD 23 26 81 02 13 04 01 03 23 2E A4 FC
+
+Cache file format (little endian):
+header:     magic 'VIMG', version, source size, source mtime_ns, number of segments
+table:      (address, length) of each segment
+data:       the segment data back to back
+"""
+
+import os
+import sys
+import mmap
+import struct
+from array import array
+
+MAGIC = b'VIMG'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQI')
+ENTRY = struct.Struct('<II')
+
+class Segment:
+    """ A contiguous memory region. data is a bytearray or a memoryview of the cache file """
+
+    __slots__ = ['addr', 'data']
+
+    def __init__(self, addr, data):
+        self.addr = addr
+        self.data = data
+
+    def __iter__(self):
+        """ Unpack as (address, data) """
+        yield self.addr
+        yield self.data
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def end(self):
+        return self.addr + len(self.data)
+
+    def padded(self, size):
+        """ Return (aligned address, data) with the data aligned and padded to whole size byte words """
+        offset = self.addr % size
+        pad = -(offset + len(self.data)) % size
+        if not offset and not pad:
+            return self.addr, memoryview(self.data)
+        return self.addr - offset, memoryview(bytes(offset) + bytes(self.data) + bytes(pad))
+
+    def view(self, size):
+        """
+            The segment as size byte words, matching the memory width (4 for the ram, 2 for the sram).
+            Return (word address, words). words is a zero copy memoryview on little endian host.
+        """
+        addr, data = self.padded(size)
+        typecode = 'I' if size == 4 else 'H'
+        if sys.byteorder != 'little':
+            words = array(typecode, data)
+            words.byteswap()
+            return addr // size, words
+        return addr // size, data.cast(typecode)
+
+class VerilogImage:
+
+    def __init__(self, file, cache=True):
+        """
+            @param file: the verilog file
+            @param cache: use the binary cache next to the verilog file
+        """
+        self.file = file
+        self.cacheFile = file + '.vimg'
+        self.segments = self.loadCache() if cache else None
+        if self.segments is None:
+            self.segments = self.parse()
+            if cache:
+                self.writeCache()
+
+    def __iter__(self):
+        return iter(self.segments)
+
+    def __len__(self):
+        return len(self.segments)
+
+    @property
+    def size(self):
+        """ Total number of bytes """
+        return sum(len(seg) for seg in self.segments)
+
+    def parse(self):
+        """
+            Stream the verilog file. The contiguous address blocks are merged into one segment.
+            Data before the first address line starts at address 0 like objcopy.
+        """
+        segments = []
+        data = None
+        with open(self.file, "r") as FH:
+            for num, line in enumerate(FH, 1):
+                if line.startswith('@'):    # this is an address line
+                    try:
+                        addr = int(line.strip()[1:], 16)
+                    except ValueError:
+                        raise ValueError(f"{self.file}:{num}: invalid address line: {line.strip()}") from None
+                    if segments and segments[-1].end == addr:
+                        continue
+                    data = bytearray()
+                    segments.append(Segment(addr, data))
+                elif line.strip():          # this is a data line
+                    if data is None:
+                        data = bytearray()
+                        segments.append(Segment(0, data))
+                    try:
+                        data += bytes.fromhex(line)
+                    except ValueError:
+                        raise ValueError(f"{self.file}:{num}: invalid data line: {line.strip()}") from None
+        return segments
+
+    def coalesce(self, size=4):
+        """
+            Return the segments aligned and padded to whole size byte words.
+            Segments sharing a word after the alignment are merged into one segment.
+        """
+        merged = []
+        for seg in sorted(self.segments, key=lambda s: s.addr):
+            addr, data = seg.padded(size)
+            if merged and merged[-1].end >= addr:
+                last = merged[-1]
+                last.data.extend(bytes(max(addr + len(data) - last.end, 0)))
+                offset = seg.addr - last.addr
+                last.data[offset:offset + len(seg)] = seg.data
+            else:
+                merged.append(Segment(addr, bytearray(data)))
+        return merged
+
+    # ---------------------------------
+    # Binary cache
+    # ---------------------------------
+
+    def sourceStamp(self):
+        stat = os.stat(self.file)
+        return stat.st_size, stat.st_mtime_ns
+
+    def loadCache(self):
+        """ Map the cache file. Return None if there is no valid cache """
+        try:
+            with open(self.cacheFile, "rb") as FH:
+                buf = mmap.mmap(FH.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+        if len(buf) < HEADER.size:
+            return None
+        magic, version, size, mtime, count = HEADER.unpack_from(buf)
+        if magic != MAGIC or version != VERSION or (size, mtime) != self.sourceStamp():
+            return None
+        view = memoryview(buf)
+        offset = HEADER.size + count * ENTRY.size
+        segments = []
+        for i in range(count):
+            addr, length = ENTRY.unpack_from(buf, HEADER.size + i * ENTRY.size)
+            segments.append(Segment(addr, view[offset:offset + length]))
+            offset += length
+        return segments
+
+    def writeCache(self):
+        """ Write the cache file. The cache is skipped if the directory is not writable """
+        size, mtime = self.sourceStamp()
+        tmp = f"{self.cacheFile}.{os.getpid()}"
+        try:
+            with open(tmp, "wb") as FH:
+                FH.write(HEADER.pack(MAGIC, VERSION, size, mtime, len(self.segments)))
+                for seg in self.segments:
+                    FH.write(ENTRY.pack(seg.addr, len(seg)))
+                for seg in self.segments:
+                    FH.write(seg.data)
+            os.replace(tmp, self.cacheFile)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
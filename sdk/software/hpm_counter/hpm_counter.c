@@ -0,0 +1,72 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Profile a small workload with the hardware performance counters
+// ------------------------------------------------------------------------------------------------
+
+#include <stdint.h>
+#include <stdio.h>
+#include "platform.h"
+
+#define SIZE 256
+
+typedef struct _node_s {
+    struct _node_s  *next;
+    int             value;
+} node_s;
+
+static int      src[SIZE];
+static int      dst[SIZE];
+static node_s   nodes[SIZE];
+
+int workload(void) {
+    int sum = 0;
+    // copy
+    for (int i = 0; i < SIZE; i++) src[i] = i * 3;
+    for (int i = 0; i < SIZE; i++) dst[i] = src[i];
+    // list walk, the load result is used by the next load
+    for (int i = 0; i < SIZE; i++) {
+        nodes[i].next = &nodes[(i * 7 + 1) % SIZE];
+        nodes[i].value = dst[i];
+    }
+    node_s *node = &nodes[0];
+    for (int i = 0; i < SIZE; i++) {
+        sum += node->value;
+        node = node->next;
+    }
+    // multiply and divide
+    for (int i = 1; i < SIZE; i++) sum += (sum * i) / (i + 3);
+    return sum;
+}
+
+void profile(uint8_t *events) {
+    hpm_sample_s start, end;
+    int sum;
+    for (int i = 0; i < HPM_COUNTERS; i++) hpm_set_event(HPM_COUNTER_FIRST + i, events[i]);
+    hpm_clear();
+    hpm_sample(&start);
+    sum = workload();
+    hpm_sample(&end);
+    printf("workload result: %d\n", sum);
+    hpm_print(&start, &end);
+}
+
+int main(int argc, char **argv)
+{
+    uint8_t events0[HPM_COUNTERS] = {HPM_EVENT_ICACHE_MISS, HPM_EVENT_DCACHE_MISS,
+                                     HPM_EVENT_LOAD_STALL, HPM_EVENT_BRANCH_FLUSH};
+    uint8_t events1[HPM_COUNTERS] = {HPM_EVENT_MULDIV_STALL, HPM_EVENT_IBUS_WAIT,
+                                     HPM_EVENT_DBUS_WAIT, HPM_EVENT_BRANCH};
+    hpm_start();
+    profile(events0);
+    profile(events1);
+    // an event id that is not implemented selects no event
+    hpm_set_event(HPM_COUNTER_FIRST, 0x11);
+    printf("mhpmevent%d = 0x11 reads back %d\n", HPM_COUNTER_FIRST, hpm_get_event(HPM_COUNTER_FIRST));
+    return 0;
+}
@@ -34,18 +34,54 @@ Here is how nru is implemented:
 - When we have a cache hit on a cell or a fill in a cell, we clear the nru bit indicating that we have recently use.
 - If all the nru bits will become zero after the above actions, we reset the nru bit for OTHER cells to 1.
 
+Cache line refill:
+
+The cache line can hold multiple words (CACHE_LINE_SIZE = 4/8/16/32/64 bytes). The avalon bus has no burst
+so the words of the line are requested back to back as pipelined reads, one word per cycle if the memory
+allows it. The line is refilled in wrap order starting from the critical word (the word requested by the core):
+
+- The critical word is requested in the same cycle as the miss is detected and is forwarded to the core.
+- While the rest of the line is refilled, the core reads to the same line are taken if the word is already
+  in the cache or if it is requested from the memory in the same cycle, so sequential instruction fetch
+  follows the refill without waiting for the whole line.
+- The tag and the valid bit are updated when the last word is requested. The last word is written in the next cycle.
+
+Write back and write buffer:
+
+The cache is write-back and write-allocate. A write hit only updates the cache and marks the line dirty.
+A write miss refills the line first and then writes into the cache.
+
+- A dirty victim line is pushed into the write buffer (cache_write_buffer) at one word per cycle, then the
+  refill starts right away. The write buffer drains into the memory in the cycles where the cache does not read.
+  A write stalled by the memory waitrequest is held until it is taken, the refill read waits for it.
+- A refill waits until the write buffer no longer holds a word of the line being refilled.
+- A non-cacheable access waits until the write buffer is empty so it is not reordered with the buffered writes.
+
+Cache maintenance:
+
+- flush: write back all the dirty lines and wait for the write buffer to drain. The cache walks through all
+  the sets (CLEAN state) and writes back the dirty lines through the FLUSH state. The lines stay valid.
+  The request is handshaked with core_avn_resp.waitrequest like a regular access.
+- invalidate: clear the valid bits of all the lines. The dirty lines are NOT written back so it is only used
+  by the instruction cache. The invalidation is done in the next IDLE cycle.
+
 */
 
 `include "core.svh"
 
 module cache #(
-    parameter CACHE_LINE_SIZE = 4,      // cache line size in bytes, support 4 byte only for now
+    parameter CACHE_LINE_SIZE = 4,      // cache line size in bytes. Support 4, 8, 16, 32 and 64 bytes
     parameter CACHE_SET_DEPTH = 32,     // depth of the cache set. Must be power of 2
-    parameter CACHE_WAYS = 2            // cache ways
+    parameter CACHE_WAYS = 2,           // cache ways
+    parameter WRITE_BUFFER_DEPTH = 4    // depth of the write buffer in words. Must be power of 2 and at least 2
 ) (
     input                   clk,
     input                   rst,
 
+    input                   flush,          // write back all the dirty lines
+    input                   invalidate,     // invalidate all the lines
+    output                  miss,           // a cache miss is taken, for the performance counter
+
     input  avalon_req_t     core_avn_req,
     output avalon_resp_t    core_avn_resp,
 
@@ -62,7 +98,12 @@ module cache #(
     localparam DIR_MAPPED = CACHE_WAYS == 1;
     localparam SET_MAPPED = CACHE_WAYS > 1;
     localparam CACHE_WAYS_WIDTH = DIR_MAPPED ? 1 : $clog2(CACHE_WAYS);
-
+    localparam LINE_WORDS = CACHE_LINE_SIZE / NUM_BYTES;
+    localparam WORD_CNT_WIDTH = $clog2(LINE_WORDS) + 1;
+    localparam OFFSET_WIDTH = $clog2(CACHE_LINE_SIZE);
+    localparam SET_WIDTH = $clog2(CACHE_SET_DEPTH);
+    localparam [`DATA_RANGE] OFFSET_MASK = CACHE_LINE_SIZE - 1;
+    localparam [`DATA_RANGE] WORD_MASK = NUM_BYTES - 1;
 
     logic [CACHE_WAYS-1:0]                      set_read;
     logic [CACHE_WAYS-1:0]                      set_write;
@@ -72,15 +113,18 @@ module cache #(
     logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_readdata;
     logic [CACHE_WAYS-1:0]                      set_hit;
     logic [CACHE_WAYS-1:0]                      set_dirty;
-    logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_dirty_data;
+    logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_tag;
     logic [CACHE_WAYS-1:0]                      set_valid;
-    logic [CACHE_WAYS-1:0]                      set_fill;
+    logic [CACHE_WAYS-1:0]                      set_fill_word;
     logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_fill_address;
     logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_fill_data;
-    logic [CACHE_WAYS-1:0][NUM_BYTES-1:0]       set_fill_byteenable;
+    logic [CACHE_WAYS-1:0]                      set_fill;
+    logic [CACHE_WAYS-1:0][`DATA_RANGE]         set_fill_line_address;
     logic [CACHE_WAYS-1:0]                      set_set_nru;
     logic [CACHE_WAYS-1:0]                      set_clr_nru;
     logic [CACHE_WAYS-1:0]                      set_nru;
+    logic [CACHE_WAYS-1:0]                      set_clean;
+    logic                                       set_invalidate;
 
     logic                                       set_hit_agg;
     logic                                       set_dirty_agg;
@@ -92,7 +136,7 @@ module cache #(
     logic [CACHE_WAYS_WIDTH-1:0]                victim_set_id;
 
     // state machine
-    typedef enum logic[1:0] {IDLE, FLUSH, RETRIVE, WRITE} state_t;
+    typedef enum logic[1:0] {IDLE, FLUSH, REFILL, CLEAN} state_t;
     state_t state, state_next;
 
     logic   cache_access;
@@ -100,14 +144,50 @@ module cache #(
     logic   cache_hit;
     logic   non_cacheable;
 
-    logic [`DATA_RANGE]     set_fill_data_common;
-    logic [NUM_BYTES-1:0]   set_fill_byteenable_common;
-
-    reg                             read_from_memory;
-    reg [`DATA_RANGE]               set_address_s1;    // need to store the address for cache update
-
-    reg [CACHE_WAYS_WIDTH-1:0]      hit_set_id_s1;
-    reg [CACHE_WAYS_WIDTH-1:0]      victim_set_id_s1;
+    logic                   forward;            // the core read data comes from the memory read issued in this cycle
+    logic                   refill_issue;       // a word of the refilled line is requested from the memory
+    logic                   refill_line;        // the core request is in the line being refilled
+    logic                   line_fill;          // the last word of the line is requested, update the line
+    logic                   fill_hazard;        // the core request is to the word being written by the fill port
+    logic [`DATA_RANGE]     set_access_address;
+    logic [`DATA_RANGE]     refill_address;
+    logic [`DATA_RANGE]     writeback_address;
+    logic [`DATA_RANGE]     clean_address;
+    logic                   clean_done;         // all the sets are checked by the cache flush
+    logic [CACHE_WAYS-1:0]  clean_set;
+    logic [CACHE_WAYS_WIDTH-1:0] clean_set_id;
+
+    logic                   wb_push;
+    logic                   wb_pop;
+    logic                   wb_full;
+    logic                   wb_empty;
+    logic                   wb_match;           // the write buffer holds a word of the missed line
+    logic                   wb_drain;           // the memory request comes from the write buffer
+    logic [`DATA_RANGE]     wb_address;
+    logic [`DATA_RANGE]     wb_writedata;
+    logic [NUM_BYTES-1:0]   wb_byte_enable;
+
+    logic [`DATA_RANGE]             miss_address;
+    logic [CACHE_WAYS-1:0]          miss_set;
+    logic                           miss_all_ru;
+
+    reg                             forward_s1;
+    reg [CACHE_WAYS_WIDTH-1:0]      read_set_id_s1;
+
+    reg                             fill_pending;       // the read data of a refill word comes back in this cycle
+    reg [`DATA_RANGE]               fill_address_s1;
+
+    reg [`DATA_RANGE]               line_address;       // address of the missed request, its word is the critical word
+    reg [CACHE_WAYS-1:0]            refill_set;
+    reg [CACHE_WAYS_WIDTH-1:0]      refill_set_id;
+    reg                             refill_all_ru;
+    reg [WORD_CNT_WIDTH-1:0]        word_cnt;           // words requested in REFILL, words written in FLUSH
+    reg [LINE_WORDS-1:0]            fill_valid;         // words of the refilled line already written into the cache
+
+    reg [SET_WIDTH:0]               clean_cnt;          // set being checked by the cache flush
+    reg                             cleaning;           // the victim line is written back by the cache flush
+    reg                             invalidate_pending;
+    reg                             wb_stall;           // the write buffer request is stalled by the memory
 
     // ---------------------------------
     // Main logic
@@ -115,17 +195,28 @@ module cache #(
 
     assign cache_access = core_avn_req.read | core_avn_req.write;
     assign cache_miss = cache_access & ~set_hit_agg;
-    assign cache_hit = cache_access & set_hit_agg;
+    assign cache_hit = cache_access & set_hit_agg & ~fill_hazard;
     assign non_cacheable = core_avn_req.address[`DATA_WIDTH-1];
 
     assign set_hit_agg = |set_hit;
     assign set_dirty_agg = |(victim_set & set_dirty); // only when the victim set is dirty we need to flush the victim.
 
+    // cache flush walks through all the sets and writes back the dirty lines one by one
+    assign clean_address = `DATA_WIDTH'(clean_cnt[SET_WIDTH-1:0]) << OFFSET_WIDTH;
+    assign clean_done = clean_cnt[SET_WIDTH];
+    assign clean_set = bit_scan(set_dirty);
+    assign clean_set_id = onehot2binary(clean_set);
+
     assign hit_set_id = onehot2binary(set_hit);
 
+    // A miss is taken in IDLE state when the victim goes to the write buffer or the refill starts.
+    // A clean miss waits in IDLE while the write buffer holds the missed line or its write is stalled.
+    assign miss = (state == IDLE) & cache_miss & ~non_cacheable & ~invalidate_pending &
+                  (set_dirty_agg | ~wb_match & ~wb_stall);
+
     generate
     if (DIR_MAPPED) begin: _dirmap_victim
-        assign victim_set = 0;
+        assign victim_set = 1;
         assign victim_set_id = 0;
     end
     else begin: _setmap_victim
@@ -139,28 +230,97 @@ module cache #(
     assign all_ru_hit = (set_nru == set_hit);
     assign all_ru_miss = (set_nru == victim_set);
 
+    // The line being missed. The miss is taken in IDLE state and the line information is stored for the
+    // FLUSH and REFILL state.
+    assign miss_address = (state == IDLE) ? core_avn_req.address : line_address;
+    assign miss_set = (state == IDLE) ? victim_set : refill_set;
+    assign miss_all_ru = (state == IDLE) ? all_ru_miss : refill_all_ru;
+
+    // The line is refilled in wrap order, starting from the critical word and the victim line is written back
+    // in the same order. The word requested in REFILL state or written in FLUSH state is given by word_cnt.
+    assign refill_address = (state == IDLE) ? wrap_address(core_avn_req.address, 0) : wrap_address(line_address, word_cnt);
+    assign writeback_address = {set_tag[refill_set_id][`DATA_WIDTH-1:OFFSET_WIDTH], refill_address[OFFSET_WIDTH-1:0]};
+
+    assign refill_line = core_avn_req.address[`DATA_WIDTH-1:OFFSET_WIDTH] == line_address[`DATA_WIDTH-1:OFFSET_WIDTH];
+
+    // The last word of a refill is written into the cache in the cycle after the line is updated.
+    // An access to that word has to wait for one cycle.
+    assign fill_hazard = fill_pending & (core_avn_req.address[`DATA_WIDTH-1:2] == fill_address_s1[`DATA_WIDTH-1:2]);
+
     genvar i;
     generate
     for (i = 0; i < CACHE_WAYS; i++) begin: _set
-        assign set_address[i] = core_avn_req.address;
+        assign set_address[i] = set_access_address;
         assign set_writedata[i] = core_avn_req.writedata;
         assign set_byteenable[i] = core_avn_req.byte_enable;
-        assign set_fill_address[i] = set_address_s1;
-        assign set_fill_data[i] = set_fill_data_common;
+        assign set_fill_address[i] = fill_address_s1;
+        assign set_fill_data[i] = mem_avn_resp.readdata;
+        assign set_fill_line_address[i] = miss_address;
+        assign set_fill_word[i] = fill_pending & refill_set[i];
+        assign set_fill[i] = line_fill & miss_set[i];
     end
     endgenerate
 
-    always @(posedge clk) set_address_s1 <= core_avn_req.address;
-    always @(posedge clk) read_from_memory <= mem_avn_req.read & ~mem_avn_resp.waitrequest;
-    always @(posedge clk) hit_set_id_s1 <= hit_set_id;
-    always @(posedge clk) victim_set_id_s1 <= victim_set_id;
+    assign set_invalidate = (state == IDLE) & invalidate_pending;
 
-    assign core_avn_resp.readdata = read_from_memory ? mem_avn_resp.readdata
-                                                     : set_readdata[hit_set_id_s1];   // the read data already has 1 read latency
+    always @(posedge clk) forward_s1 <= forward;
+    always @(posedge clk) read_set_id_s1 <= (state == REFILL) ? refill_set_id : hit_set_id;
+    always @(posedge clk) fill_address_s1 <= mem_avn_req.address;
 
-    always @* begin
-        set_fill = 0;
-        set_fill[victim_set_id_s1] = read_from_memory;
+    always @(posedge clk) begin
+        if (rst) fill_pending <= 1'b0;
+        else fill_pending <= refill_issue;
+    end
+
+    assign core_avn_resp.readdata = forward_s1 ? mem_avn_resp.readdata
+                                               : set_readdata[read_set_id_s1];   // the read data already has 1 read latency
+
+    // miss information
+    always @(posedge clk) begin
+        if (state == IDLE) begin
+            line_address <= core_avn_req.address;
+            refill_set <= victim_set;
+            refill_set_id <= victim_set_id;
+            refill_all_ru <= all_ru_miss;
+        end
+        else if (state == CLEAN) begin
+            line_address <= clean_address;
+            refill_set <= clean_set;
+            refill_set_id <= clean_set_id;
+        end
+    end
+
+    always @(posedge clk) begin
+        if (state == IDLE) word_cnt <= refill_issue ? 1 : 0;
+        else if (state == CLEAN || (state == FLUSH && state_next != FLUSH)) word_cnt <= 0;
+        else if (refill_issue || (wb_push && !wb_full)) word_cnt <= word_cnt + 1;
+    end
+
+    always @(posedge clk) begin
+        if (state == IDLE) clean_cnt <= 0;
+        else if (state == CLEAN && !clean_done && !(|set_dirty)) clean_cnt <= clean_cnt + 1;
+    end
+
+    always @(posedge clk) begin
+        if (state == IDLE) cleaning <= 1'b0;
+        else if (state == CLEAN) cleaning <= 1'b1;
+    end
+
+    always @(posedge clk) begin
+        if (rst) invalidate_pending <= 1'b0;
+        else if (invalidate) invalidate_pending <= 1'b1;
+        else if (state == IDLE) invalidate_pending <= 1'b0;
+    end
+
+    // avalon: the write buffer request stalled by the memory is held until the memory takes it
+    always @(posedge clk) begin
+        if (rst) wb_stall <= 1'b0;
+        else wb_stall <= wb_drain & mem_avn_resp.waitrequest;
+    end
+
+    always @(posedge clk) begin
+        if (state == IDLE) fill_valid <= 0;
+        else if (fill_pending) fill_valid <= fill_valid | word_onehot(fill_address_s1);
     end
 
     // state machine
@@ -176,103 +336,151 @@ module cache #(
 
         set_clr_nru = 0;
         set_set_nru = 0;
+        set_clean = 0;
 
         core_avn_resp.waitrequest = 0;
 
+        // the write buffer drains into the memory when the memory is not used by the cache
         mem_avn_req.read = 0;
-        mem_avn_req.write = 0;
-        mem_avn_req.address = core_avn_req.address;
-        mem_avn_req.byte_enable = core_avn_req.byte_enable;
-        mem_avn_req.writedata = non_cacheable ? core_avn_req.writedata : set_dirty_data[hit_set_id];
+        mem_avn_req.write = ~wb_empty;
+        mem_avn_req.address = wb_address;
+        mem_avn_req.byte_enable = wb_byte_enable;
+        mem_avn_req.writedata = wb_writedata;
+
+        set_access_address = core_avn_req.address;
 
-        set_fill_data_common = mem_avn_resp.readdata;
+        forward = 0;
+        refill_issue = 0;
+        line_fill = 0;
+        wb_push = 0;
 
         state_next = state;
 
         case(state)
 
             // IDLE state: take new cache read/write request from CPU core.
-            // If the address is non-cacheable, we go to RETRIVE state to get the data from memory
+            // If the address is non-cacheable, we access the memory directly once the write buffer is empty
             // If we have a cache hit, we take the request, and we are done. Stay at IDLE state
             // If we have a cache miss, we need to check:
-            // => if it is a write request, we need to grab the data from memory first.
-            // => else if the line is dirty, we go to FLUSH state to flush that line back to memory
-            // => else if the line is not dirty, we go to RETRIVE state to read the new data from memory.
+            // => if the victim line is dirty, we go to FLUSH state to push the line into the write buffer
+            // => else we request the critical word from memory and go to REFILL state to read the rest of the line.
+            //    A read request is taken as soon as the memory takes the critical word request.
+            //    A write request waits for the refill to complete and then hits in the cache.
+            // If we have a flush request, we go to CLEAN state to write back all the dirty lines.
             IDLE: begin
 
                 for (int i = 0; i < CACHE_WAYS; i++) begin
                     set_read[i] = core_avn_req.read;
-                    set_write[i] = core_avn_req.write;
+                    set_write[i] = core_avn_req.write & ~fill_hazard & ~invalidate_pending;
                 end
-                core_avn_resp.waitrequest = non_cacheable & mem_avn_resp.waitrequest
-                                          | ~non_cacheable & cache_miss & (core_avn_req.write | mem_avn_resp.waitrequest);
 
+                // the lines are invalidated in this cycle
+                if (invalidate_pending) begin
+                    core_avn_resp.waitrequest = 1'b1;
+                end
+                // flush does not come with a read or write request
+                else if (flush && !cache_access) begin
+                    core_avn_resp.waitrequest = 1'b1;
+                    state_next = CLEAN;
+                end
                 // if the address is non cachable, we access the memory directly
-                if (non_cacheable) begin
-                    mem_avn_req.read = core_avn_req.read;
-                    mem_avn_req.write = core_avn_req.write;
+                else if (non_cacheable) begin
+                    if (wb_empty) begin
+                        mem_avn_req.read = core_avn_req.read;
+                        mem_avn_req.write = core_avn_req.write;
+                        mem_avn_req.address = core_avn_req.address;
+                        mem_avn_req.byte_enable = core_avn_req.byte_enable;
+                        mem_avn_req.writedata = core_avn_req.writedata;
+                        forward = core_avn_req.read & ~mem_avn_resp.waitrequest;
+                        core_avn_resp.waitrequest = mem_avn_resp.waitrequest;
+                    end
+                    else begin
+                        core_avn_resp.waitrequest = 1'b1;
+                    end
                 end
                 // if cache miss, we start to flush/retrive data from memory
                 else if (cache_miss) begin
-                    mem_avn_req.write = set_dirty_agg;
-                    mem_avn_req.read = ~set_dirty_agg;
-                end
-
-                // if cache hit, clear the NLU bit for the hitting set since we just access this set.
-                if (cache_hit) set_clr_nru = set_hit;
-                if (cache_hit && all_ru_hit) set_set_nru = ~set_hit;
-
-                // for noncachable situlation, we just need to stay at IDLE state
-                // the pipeline stall logic will take care of it
-                if (!non_cacheable && cache_miss) begin
-                    // if set is dirty, we need to flush the data back to the memory.
-                    if (set_dirty_agg)  begin
-                        // if the bus transfer can't be done in one cycle,
-                        // we go to FLUSh state to wait for the transfer to complete
-                        if (mem_avn_resp.waitrequest)   state_next = FLUSH;
-                        // if the bus transfer completes in one cycle, we go to retrive state
-                        else                            state_next = RETRIVE;
+                    core_avn_resp.waitrequest = 1'b1;
+                    if (set_dirty_agg) begin
+                        state_next = FLUSH;
                     end
-                    // 1. we go to RETRIVE state if the bus transfer can't be done in one cycle.
-                    // 2. we go to WRITE state if the bus transfer is done in the same cycle for a write transfer
-                    else begin
-                        if (mem_avn_resp.waitrequest)   state_next = RETRIVE;
-                        else if (core_avn_req.write)    state_next = WRITE;
+                    else if (!wb_match && !wb_stall) begin
+                        mem_avn_req.read = 1'b1;
+                        mem_avn_req.write = 1'b0;
+                        mem_avn_req.address = refill_address;
+                        mem_avn_req.byte_enable = {NUM_BYTES{1'b1}};
+                        refill_issue = ~mem_avn_resp.waitrequest;
+                        forward = core_avn_req.read & refill_issue;
+                        core_avn_resp.waitrequest = ~forward;
+                        line_fill = refill_issue & (LINE_WORDS == 1);
+                        if (!line_fill) state_next = REFILL;
                     end
                 end
+                else begin
+                    core_avn_resp.waitrequest = fill_hazard;
+                    // if cache hit, clear the NLU bit for the hitting set since we just access this set.
+                    if (cache_hit) set_clr_nru = set_hit;
+                    if (cache_hit && all_ru_hit) set_set_nru = ~set_hit;
+                end
             end
 
+            // FLUSH state: push the victim line into the write buffer.
+            // The data ram has one read latency so it reads the word pushed in the next cycle.
             FLUSH: begin
                 core_avn_resp.waitrequest = 1'b1;
-                mem_avn_req.write = 1;
-                if (!mem_avn_resp.waitrequest) state_next = RETRIVE;
+                wb_push = 1'b1;
+                set_access_address = wb_full ? refill_address : wrap_address(line_address, word_cnt + 1);
+                if (!wb_full && word_cnt == WORD_CNT_WIDTH'(LINE_WORDS - 1)) begin
+                    // the line written back by the cache flush stays in the cache and becomes clean
+                    if (cleaning) set_clean = refill_set;
+                    state_next = cleaning ? CLEAN : REFILL;
+                end
             end
 
-            RETRIVE: begin
-                core_avn_resp.waitrequest = mem_avn_resp.waitrequest;
-                mem_avn_req.read = 1;
-                if (!mem_avn_resp.waitrequest) set_clr_nru = victim_set;
-                if (!mem_avn_resp.waitrequest && all_ru_miss) set_set_nru = ~victim_set;
-
-                if (!mem_avn_resp.waitrequest) begin
-                    if (core_avn_req.write)     state_next = WRITE;
-                    else                        state_next = IDLE;
+            // REFILL state: request the words of the line from memory back to back.
+            // The read request to the line being refilled is taken if the word is already in the cache
+            // or if the word is requested from memory in this cycle. Other requests wait for the refill to complete.
+            REFILL: begin
+                if (!wb_match && !wb_stall) begin
+                    mem_avn_req.read = 1'b1;
+                    mem_avn_req.write = 1'b0;
+                    mem_avn_req.address = refill_address;
+                    mem_avn_req.byte_enable = {NUM_BYTES{1'b1}};
+                    refill_issue = ~mem_avn_resp.waitrequest;
                 end
+                // the set is accessed with the set of the refilled line for the nru update
+                set_access_address = (line_address & ~OFFSET_MASK) | (core_avn_req.address & OFFSET_MASK);
+                line_fill = refill_issue & (word_cnt == WORD_CNT_WIDTH'(LINE_WORDS - 1));
+                forward = core_avn_req.read & refill_issue &
+                          (core_avn_req.address[`DATA_WIDTH-1:2] == refill_address[`DATA_WIDTH-1:2]);
+                core_avn_resp.waitrequest = ~(core_avn_req.read & refill_line & (|(fill_valid & word_onehot(core_avn_req.address))))
+                                          & ~forward;
+                if (line_fill) state_next = IDLE;
             end
 
-            WRITE: begin
-                core_avn_resp.waitrequest = 0;
-                // Here we fill the cache with the write data directly
-                for (int i = 0; i < NUM_BYTES; i = i + 1) begin
-                    if(core_avn_req.byte_enable[i]) begin
-                        set_fill_data_common[i*BYTE_WIDTH +: BYTE_WIDTH] = core_avn_req.writedata[i*BYTE_WIDTH +: BYTE_WIDTH];
+            // CLEAN state: check the sets one by one for the cache flush.
+            // A dirty line is written back through the FLUSH state, then the same set is checked again.
+            // The flush request is taken when all the sets are clean and the write buffer is empty.
+            CLEAN: begin
+                core_avn_resp.waitrequest = 1'b1;
+                set_access_address = clean_address;
+                if (clean_done) begin
+                    if (wb_empty) begin
+                        core_avn_resp.waitrequest = 1'b0;
+                        state_next = IDLE;
                     end
                 end
-                state_next = IDLE;
+                else if (|set_dirty) begin
+                    state_next = FLUSH;
+                end
             end
 
             default: ;
         endcase
+
+        // the line is updated when its last word is requested, it becomes the most recently used line
+        if (line_fill) set_clr_nru = miss_set;
+        if (line_fill && miss_all_ru) set_set_nru = ~miss_set;
     end
 
     // ---------------------------------
@@ -294,14 +502,43 @@ module cache #(
         .readdata           (set_readdata),
         .hit                (set_hit),
         .dirty              (set_dirty),
-        .dirty_data         (set_dirty_data),
+        .tag                (set_tag),
         .valid              (set_valid),
-        .fill               (set_fill),
+        .fill               (set_fill_word),
         .fill_address       (set_fill_address),
         .fill_data          (set_fill_data),
+        .fill_line          (set_fill),
+        .fill_line_address  (set_fill_line_address),
         .set_nru            (set_set_nru),
         .clr_nru            (set_clr_nru),
-        .nru                (set_nru)
+        .nru                (set_nru),
+        .clean              (set_clean),
+        .invalidate         (set_invalidate)
+    );
+
+    // the write buffer is popped when the memory takes its write
+    // the memory is used by the write buffer unless the cache reads. Non-cacheable access waits for an empty buffer.
+    assign wb_drain = ~wb_empty & ~mem_avn_req.read;
+    assign wb_pop = wb_drain & ~mem_avn_resp.waitrequest;
+
+    cache_write_buffer #(
+        .CACHE_LINE_SIZE    (CACHE_LINE_SIZE),
+        .DEPTH              (WRITE_BUFFER_DEPTH))
+    u_cache_write_buffer (
+        .clk                (clk),
+        .rst                (rst),
+        .push               (wb_push),
+        .push_address       (writeback_address),
+        .push_writedata     (set_readdata[refill_set_id]),
+        .push_byte_enable   ({NUM_BYTES{1'b1}}),
+        .full               (wb_full),
+        .empty              (wb_empty),
+        .pop                (wb_pop),
+        .address            (wb_address),
+        .writedata          (wb_writedata),
+        .byte_enable        (wb_byte_enable),
+        .match_address      (miss_address),
+        .match              (wb_match)
     );
 
     // ---------------------------------
@@ -320,4 +557,21 @@ module cache #(
         end
     endfunction
 
-endmodule
\ No newline at end of file
+    // the n-th word of the line in wrap order starting from the word of the address
+    function automatic [`DATA_RANGE] wrap_address();
+        input [`DATA_RANGE]         address;
+        input [WORD_CNT_WIDTH-1:0]  n;
+        logic [`DATA_RANGE]         offset;
+        offset = address + (`DATA_WIDTH'(n) << $clog2(NUM_BYTES));
+        wrap_address = (address & ~OFFSET_MASK) | (offset & OFFSET_MASK & ~WORD_MASK);
+    endfunction
+
+    function automatic [LINE_WORDS-1:0] word_onehot();
+        input [`DATA_RANGE] address;
+        word_onehot = 0;
+        for (int i = 0; i < LINE_WORDS; i++) begin
+            if (((address & OFFSET_MASK) >> $clog2(NUM_BYTES)) == i) word_onehot[i] = 1'b1;
+        end
+    endfunction
+
+endmodule
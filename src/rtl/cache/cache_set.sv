@@ -15,13 +15,19 @@ Cache Set logic
 
 - The readdata has a one read latency.
 - The cache use NRU replacemnent policy
+- The address is split into {tag, set, word, byte}. The data ram holds one word per entry and is
+  addressed by {set, word}. The tag ram, the valid, dirty and nru bits are addressed by set.
+- A cache line is refilled one word at a time through the fill port. Once all the words are requested
+  from the memory, fill_line updates the tag of the line, sets the valid bit and clears the dirty bit.
+- clean clears the dirty bit of the line after it is written back by a cache flush.
+  invalidate clears the valid bits of all the lines.
 
 */
 
 `include "core.svh"
 
 module cache_set #(
-    parameter CACHE_LINE_SIZE = 4,  // cache line size in bytes, support 4 byte only for now
+    parameter CACHE_LINE_SIZE = 4,  // cache line size in bytes. Must be power of 2 and at least 4 bytes
     parameter CACHE_SET_DEPTH = 32, // CACHE_SET_DEPTH of the cache set. Must be power of 2
     parameter NRU_LOGIC = 0         // Use NRU logic
 ) (
@@ -40,12 +46,18 @@ module cache_set #(
     output                      hit,
     output                      valid,
     output                      dirty,
-    output [`DATA_RANGE]        dirty_data,
+    output [`DATA_RANGE]        tag,           // the address of the line in the set, word and byte are zero
 
     // cache update from memory
-    input                       fill,
+    input                       fill,          // write one word of the line
     input [`DATA_RANGE]         fill_address,
     input [`DATA_RANGE]         fill_data,
+    input                       fill_line,     // update the tag, set the valid bit and clear the dirty bit
+    input [`DATA_RANGE]         fill_line_address,
+
+    // cache maintenance
+    input                       clean,         // clear the dirty bit of the line
+    input                       invalidate,    // clear the valid bits of all the lines
 
     // NRU
     input                       set_nru,
@@ -57,14 +69,16 @@ module cache_set #(
     // Signal Declaration
     // ---------------------------------
 
-    localparam LINE_WIDTH = CACHE_LINE_SIZE*8;          // cache line CACHE_LINE_SIZE
-    localparam BYTE_WIDTH = $clog2(CACHE_LINE_SIZE);
+    localparam OFFSET_WIDTH = $clog2(CACHE_LINE_SIZE);
+    localparam BYTE_WIDTH = $clog2(`DATA_WIDTH/8);
     localparam SET_WIDTH  = $clog2(CACHE_SET_DEPTH);
-    localparam TAG_WIDTH  = `DATA_WIDTH - BYTE_WIDTH - SET_WIDTH;
+    localparam TAG_WIDTH  = `DATA_WIDTH - OFFSET_WIDTH - SET_WIDTH;
+    localparam RAM_AW     = SET_WIDTH + OFFSET_WIDTH - BYTE_WIDTH;
 
-    logic [BYTE_WIDTH-1:0]  cache_byte_addr;
+    logic [OFFSET_WIDTH-1:0] cache_offset;
     logic [SET_WIDTH-1:0]   cache_set_addr;
     logic [TAG_WIDTH-1:0]   cache_tag;
+    logic [RAM_AW-1:0]      cache_word_addr;
 
     logic                   cache_line_valid;
     logic                   cache_line_dirty;
@@ -77,9 +91,10 @@ module cache_set #(
     reg [CACHE_SET_DEPTH-1:0] cache_mem_valid;
     reg [CACHE_SET_DEPTH-1:0] cache_mem_dirty;
 
-    logic [BYTE_WIDTH-1:0]  fill_byte_addr;
-    logic [SET_WIDTH-1:0]   fill_set_addr;
-    logic [TAG_WIDTH-1:0]   fill_tag;
+    logic [RAM_AW-1:0]      fill_word_addr;
+    logic [OFFSET_WIDTH-1:0] line_offset;
+    logic [SET_WIDTH-1:0]   line_set_addr;
+    logic [TAG_WIDTH-1:0]   line_tag;
     logic [`DATA_WIDTH/8-1:0] fill_byteenable;
 
     // ---------------------------------
@@ -87,8 +102,10 @@ module cache_set #(
     // ---------------------------------
 
     // extract different field from address
-    assign {cache_tag, cache_set_addr, cache_byte_addr} = address;
-    assign {fill_tag, fill_set_addr, fill_byte_addr} = fill_address;
+    assign {cache_tag, cache_set_addr, cache_offset} = address;
+    assign {line_tag, line_set_addr, line_offset} = fill_line_address;
+    assign cache_word_addr = address[OFFSET_WIDTH+SET_WIDTH-1:BYTE_WIDTH];
+    assign fill_word_addr = fill_address[OFFSET_WIDTH+SET_WIDTH-1:BYTE_WIDTH];
 
     // check if we have a cache hit or a cache miss
     assign cache_line_valid = cache_mem_valid[cache_set_addr];
@@ -97,8 +114,8 @@ module cache_set #(
     assign tag_match = cache_line_tag == cache_tag;
     assign hit = cache_line_valid & tag_match;
     assign dirty = cache_line_dirty;
-    assign dirty_data = cache_line_data;
     assign valid = cache_line_valid;
+    assign tag = {cache_line_tag, cache_set_addr, {OFFSET_WIDTH{1'b0}}};
     assign readdata = cache_line_data;
 
     // cache hit and write
@@ -106,14 +123,15 @@ module cache_set #(
 
     // cache line valid
     always @(posedge clk) begin
-        if (rst) cache_mem_valid <= 0;
-        else if (fill) cache_mem_valid[fill_set_addr] <= 1'b1;
+        if (rst || invalidate) cache_mem_valid <= 0;
+        else if (fill_line) cache_mem_valid[line_set_addr] <= 1'b1;
     end
 
     // cache line dirty
     always @(posedge clk) begin
         if (rst) cache_mem_dirty <= 0;
-        else if (fill) cache_mem_dirty[fill_set_addr] <= 1'b0;
+        else if (fill_line) cache_mem_dirty[line_set_addr] <= 1'b0;
+        else if (clean) cache_mem_dirty[cache_set_addr] <= 1'b0;
         else if (cache_write) cache_mem_dirty[cache_set_addr] <= 1'b1;
     end
 
@@ -151,19 +169,19 @@ module cache_set #(
     // fill the data into cache ram, we also need to update the tag ram
 
     cache_data_ram #(
-        .AW             (SET_WIDTH),
+        .AW             (RAM_AW),
         .DW             (`DATA_WIDTH))
     cache_mem_data (
         .clk            (clk),
         // p1 is regular access to cache data.
         .core_write     (cache_write),
-        .core_address   (cache_set_addr),
+        .core_address   (cache_word_addr),
         .core_byte_enable (byteenable),
         .core_writedata (writedata),
         .core_readdata  (cache_line_data),
         // p2 is cache fill.
         .fill_write     (fill),
-        .fill_address   (fill_set_addr),
+        .fill_address   (fill_word_addr),
         .fill_byte_enable (fill_byteenable),
         .fill_writedata (fill_data));
 
@@ -176,9 +194,9 @@ module cache_set #(
         .core_address   (cache_set_addr),
         .core_readdata  (cache_line_tag),
         // p2 is cache fill.
-        .fill_write     (fill),
-        .fill_address   (fill_set_addr),
-        .fill_writedata (fill_tag));
+        .fill_write     (fill_line),
+        .fill_address   (line_set_addr),
+        .fill_writedata (line_tag));
 
 
 endmodule
@@ -0,0 +1,115 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Cache write buffer
+// ------------------------------------------------------------------------------------------------
+
+/**
+
+The write buffer holds the words of the evicted dirty lines until they are written into the memory.
+
+- The buffer is a FIFO of {address, writedata, byte_enable}. The head of the FIFO is presented to the memory
+  and is popped when the memory takes the write.
+- The cache pushes the words of a victim line into the buffer at the cache speed and starts the refill
+  right away. The buffer drains into the memory when the cache does not read from the memory.
+- match is set when a word of the line given by match_address is still in the buffer. The cache must not
+  read that line from the memory before the buffer has written it.
+
+*/
+
+`include "core.svh"
+
+module cache_write_buffer #(
+    parameter CACHE_LINE_SIZE = 4,  // cache line size in bytes, used for the line match
+    parameter DEPTH = 4             // number of words in the buffer. Must be power of 2 and at least 2
+) (
+    input                       clk,
+    input                       rst,
+
+    // push from the cache
+    input                       push,
+    input [`DATA_RANGE]         push_address,
+    input [`DATA_RANGE]         push_writedata,
+    input [`DATA_WIDTH/8-1:0]   push_byte_enable,
+    output                      full,
+    output                      empty,
+
+    // head of the buffer
+    input                       pop,
+    output [`DATA_RANGE]        address,
+    output [`DATA_RANGE]        writedata,
+    output [`DATA_WIDTH/8-1:0]  byte_enable,
+
+    // line lookup
+    input [`DATA_RANGE]         match_address,
+    output logic                match
+);
+
+    // ---------------------------------
+    // Signal Declaration
+    // ---------------------------------
+
+    localparam AWIDTH = $clog2(DEPTH);
+    localparam OFFSET_WIDTH = $clog2(CACHE_LINE_SIZE);
+    localparam WIDTH = `DATA_WIDTH + `DATA_WIDTH / 8;
+
+    reg [WIDTH-1:0]         mem[DEPTH-1:0];             // {writedata, byte_enable}
+    reg [`DATA_RANGE]       mem_address[DEPTH-1:0];     // the address is kept apart for the line match
+    reg [AWIDTH:0]          rdptr;
+    reg [AWIDTH:0]          wtptr;
+
+    logic                   ren;
+    logic                   wen;
+    logic [AWIDTH:0]        wrptr_minus_rdptr;
+
+    // ---------------------------------
+    // main logic
+    // ---------------------------------
+
+    always @(posedge clk) begin
+        if (rst) begin
+            rdptr <= 'b0;
+            wtptr <= 'b0;
+        end
+        else begin
+            if (ren) rdptr <= rdptr + 1'b1;
+            if (wen) wtptr <= wtptr + 1'b1;
+        end
+    end
+
+    assign wen = ~full & push;
+    assign ren = ~empty & pop;
+
+    assign wrptr_minus_rdptr = wtptr - rdptr;
+    assign full  = wrptr_minus_rdptr == DEPTH;
+    assign empty = wrptr_minus_rdptr == 0;
+
+    always @(posedge clk) begin
+        if (wen) begin
+            mem[wtptr[AWIDTH-1:0]] <= {push_writedata, push_byte_enable};
+            mem_address[wtptr[AWIDTH-1:0]] <= push_address;
+        end
+    end
+
+    assign {writedata, byte_enable} = mem[rdptr[AWIDTH-1:0]];
+    assign address = mem_address[rdptr[AWIDTH-1:0]];
+
+    // an entry is valid if it is between the read pointer and the write pointer
+    always @* begin
+        logic [AWIDTH:0] distance;
+        match = 1'b0;
+        for (int i = 0; i < DEPTH; i++) begin
+            distance = i[AWIDTH:0] - {1'b0, rdptr[AWIDTH-1:0]};
+            distance[AWIDTH] = 1'b0;
+            if (distance < wrptr_minus_rdptr &&
+                mem_address[i][`DATA_WIDTH-1:OFFSET_WIDTH] == match_address[`DATA_WIDTH-1:OFFSET_WIDTH])
+                match = 1'b1;
+        end
+    end
+
+endmodule
@@ -16,6 +16,10 @@ EX stages contrains ALU, forwarding logic, and operand selection MUX.
 It also contains an optional multiplier and an optional divider to support RISCV RV32M instruction set.
 This is controlled by the ISA_RV32M macro
 
+The branch unit resolves the branches/jumps. The pc of the next instruction is compared with the pc predicted at
+fetch time, a mismatch is a misprediction and the instructions in IF/ID stage are flushed. The result is also sent
+back to the branch prediction unit in IF stage.
+
 */
 
 `include "core.svh"
@@ -34,7 +38,8 @@ module EX (
     input [`DATA_RANGE]                 wb_forward_data,
     // branch control
     output [`PC_RANGE]                  branch_pc,
-    output                              branch_take,
+    output                              branch_mispredict,
+    output bp_resolve_t                 bp_resolve,
     // others
     output                              ex_mem_read,
     output                              muldiv_stall_req,
@@ -64,6 +69,15 @@ module EX (
     logic [`DATA_RANGE] div_out;
 
 
+    logic               bu_branch_take;
+    logic [`PC_RANGE]   bu_branch_pc;
+    logic [`PC_RANGE]   next_pc;
+    logic               rd_link;
+    logic               rs1_link;
+    logic               resolve_valid;
+    logic               resolve_mispredict;
+    logic               resolve_jump;
+
     logic               stage_run;
     logic               stage_flush;
 
@@ -108,6 +122,7 @@ module EX (
     assign ex_stage_ctrl.mem_write = id2ex_pipeline_ctrl.mem_write;
     assign ex_stage_ctrl.reg_write = id2ex_pipeline_ctrl.reg_write;
     assign ex_stage_ctrl.mret = id2ex_pipeline_ctrl.mret;
+    assign ex_stage_ctrl.fence_i = id2ex_pipeline_ctrl.fence_i;
 
     assign ex_stage_exc.exception_ill_instr = id2ex_pipeline_exc.exception_ill_instr;
 
@@ -123,6 +138,31 @@ module EX (
     assign ex_stage_data.alu_out = id2ex_pipeline_ctrl.mul ? mul_out :
                                    id2ex_pipeline_ctrl.div ? div_out : alu_out;
 
+    // branch prediction check
+    assign next_pc = bu_branch_take ? bu_branch_pc : id2ex_pipeline_data.pc + 4;
+    assign branch_pc = next_pc;
+    // valid/mispredict are driven outside of bp_resolve. branch_mispredict goes into the hdu and back into
+    // ex_stall/ex_flush, reading it from the struct makes verilator see a combinational loop on bp_resolve.
+    assign resolve_valid = id2ex_pipeline_ctrl.valid & ~ex_stall & ~ex_flush & ~muldiv_stall_req;
+    assign resolve_mispredict = next_pc != id2ex_pipeline_data.bp_predict.pc;
+    assign resolve_jump = id2ex_pipeline_ctrl.jal | id2ex_pipeline_ctrl.jalr;
+    assign branch_mispredict = resolve_valid & resolve_mispredict;
+
+    // x1/x5 are the link registers, used to identify call and return (RISCV spec 2.5 Table 2.1)
+    assign rd_link  = id2ex_pipeline_data.instruction[11:7]  == 5'd1 | id2ex_pipeline_data.instruction[11:7]  == 5'd5;
+    assign rs1_link = id2ex_pipeline_data.instruction[19:15] == 5'd1 | id2ex_pipeline_data.instruction[19:15] == 5'd5;
+
+    assign bp_resolve.valid = resolve_valid;
+    assign bp_resolve.mispredict = resolve_mispredict;
+    assign bp_resolve.branch = id2ex_pipeline_ctrl.branch;
+    assign bp_resolve.jump = resolve_jump;
+    assign bp_resolve.call = resolve_jump & rd_link;
+    assign bp_resolve.ret = id2ex_pipeline_ctrl.jalr & rs1_link & ~rd_link;
+    assign bp_resolve.taken = bu_branch_take;
+    assign bp_resolve.pc = id2ex_pipeline_data.pc;
+    assign bp_resolve.target = bu_branch_pc;
+    assign bp_resolve.predict = id2ex_pipeline_data.bp_predict;
+
     // pipeline stage
     assign stage_run = ~ex_stall;
     assign stage_flush = ex_flush | ~id2ex_pipeline_ctrl.valid & stage_run;
@@ -159,8 +199,8 @@ module EX (
         .jal            (id2ex_pipeline_ctrl.jal),
         .jalr           (id2ex_pipeline_ctrl.jalr),
         .branch_opcode  (id2ex_pipeline_data.branch_opcode),
-        .branch_pc      (branch_pc),
-        .branch_take    (branch_take),
+        .branch_pc      (bu_branch_pc),
+        .branch_take    (bu_branch_take),
         .op1            (op1_forwarded),
         .op2            (op2_forwarded),
         .imm_value      (id2ex_pipeline_data.imm_value),
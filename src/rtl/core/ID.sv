@@ -104,6 +104,7 @@ module ID (
     assign id_stage_ctrl.valid       = if2id_pipeline_ctrl.valid;
     assign id_stage_data.instruction = if2id_pipeline_data.instruction;
     assign id_stage_data.pc          = if2id_pipeline_data.pc;
+    assign id_stage_data.bp_predict  = if2id_pipeline_data.bp_predict;
 
     assign id_stage_exc.exception_ill_instr = if2id_pipeline_ctrl.valid & exception_ill_instr;
 
@@ -196,6 +197,7 @@ module ID (
         .mem_write              (id_stage_ctrl.mem_write),
         .mem_opcode             (id_stage_data.mem_opcode),
         .mret                   (id_stage_ctrl.mret),
+        .fence_i                (id_stage_ctrl.fence_i),
         .exception_ill_instr    (exception_ill_instr)
     );
 
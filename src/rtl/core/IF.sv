@@ -11,7 +11,7 @@
 
 /**
 
-IF stage contains the Instruction Fetch Queue (IFQ)
+IF stage contains the Instruction Fetch Queue (IFQ) and the branch prediction unit
 
 */
 
@@ -19,7 +19,11 @@ IF stage contains the Instruction Fetch Queue (IFQ)
 
 module IF #(
     parameter IFQ_DEPTH = 4,    // instruction fetch queue depth
-    parameter IFQ_AFULL_TH = 1  // instruction fetch queue almost full threshold
+    parameter IFQ_AFULL_TH = 1, // instruction fetch queue almost full threshold
+    parameter BTB_DEPTH = 32,   // branch target buffer entries. 0 => no branch prediction
+    parameter BHT_DEPTH = 64,   // branch history table entries
+    parameter BHT_GSHARE = 0,   // 1 => gshare, 0 => bimodal
+    parameter RAS_DEPTH = 4     // return address stack depth. 0 => no return address stack
 ) (
     input                   clk,
     input                   rst,
@@ -30,11 +34,15 @@ module IF #(
     output avalon_req_t     ibus_avalon_req,
     input  avalon_resp_t    ibus_avalon_resp,
     // branch control
-    input                   branch_take,
+    input                   branch_mispredict,
     input [`PC_RANGE]       branch_pc,
+    input bp_resolve_t      bp_resolve,
     // trap control
     input                   trap_take,
     input [`PC_RANGE]       trap_pc,
+    // fence.i control
+    input                   fence_i_take,
+    input [`PC_RANGE]       fence_i_pc,
     // pipelineline stage
     output if2id_pipeline_ctrl_t if2id_pipeline_ctrl,
     output if2id_pipeline_data_t if2id_pipeline_data
@@ -46,19 +54,27 @@ module IF #(
 
     ifu #(
         .IFQ_DEPTH      (IFQ_DEPTH),
-        .IFQ_AFULL_TH   (IFQ_AFULL_TH))
+        .IFQ_AFULL_TH   (IFQ_AFULL_TH),
+        .BTB_DEPTH      (BTB_DEPTH),
+        .BHT_DEPTH      (BHT_DEPTH),
+        .BHT_GSHARE     (BHT_GSHARE),
+        .RAS_DEPTH      (RAS_DEPTH))
     u_ifu (
         .clk                (clk),
         .rst                (rst),
         .ifu_flush          (if_flush),
         .ifu_stall          (if_stall),
-        .branch_take        (branch_take),
+        .branch_mispredict  (branch_mispredict),
         .branch_pc          (branch_pc),
+        .bp_resolve         (bp_resolve),
         .trap_take          (trap_take),
         .trap_pc            (trap_pc),
+        .fence_i_take       (fence_i_take),
+        .fence_i_pc         (fence_i_pc),
         .instruction        (if2id_pipeline_data.instruction),
         .instruction_pc     (if2id_pipeline_data.pc),
         .instruction_valid  (if2id_pipeline_ctrl.valid),
+        .instruction_bp_predict (if2id_pipeline_data.bp_predict),
         .ibus_avalon_req    (ibus_avalon_req),
         .ibus_avalon_resp   (ibus_avalon_resp)
     );
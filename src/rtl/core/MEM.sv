@@ -15,6 +15,9 @@ MEM stage mainly contains the load store unit (LSU)
 
 It also contains a holding logic to hold the read data if the pipeline is stalled.
 
+For FENCE.I, MEM stage requests the data cache to write back all the dirty lines and stalls the pipeline
+till the data cache completes the flush.
+
 */
 
 `include "core.svh"
@@ -33,6 +36,11 @@ module MEM (
     // lsu
     output                              lsu_dbus_busy,
 
+    // data cache flush
+    input                               redirect_pending,
+    output                              dcache_flush,
+    input                               dcache_flush_busy,
+
     // data bus
     output avalon_req_t                 dbus_avalon_req,
     input  avalon_resp_t                dbus_avalon_resp,
@@ -68,6 +76,7 @@ module MEM (
 
     logic                       lsu_mem_read;
     logic                       lsu_mem_write;
+    logic                       lsu_busy;
 
     // ---------------------------------
     // Main logic
@@ -79,6 +88,7 @@ module MEM (
     assign mem_stage_ctrl.csr_read = ex2mem_pipeline_ctrl.csr_read;
     assign mem_stage_ctrl.csr_write = ex2mem_pipeline_ctrl.csr_write;
     assign mem_stage_ctrl.mret = ex2mem_pipeline_ctrl.mret;
+    assign mem_stage_ctrl.fence_i = ex2mem_pipeline_ctrl.fence_i;
 
     assign mem_stage_exc.exception_ill_instr = ex2mem_pipeline_exc.exception_ill_instr;
     assign mem_stage_exc.exception_instr_addr_misaligned = ex2mem_pipeline_exc.exception_instr_addr_misaligned;
@@ -118,6 +128,14 @@ module MEM (
     assign lsu_mem_write = ex2mem_pipeline_ctrl.mem_write & ~mem_flush;
     assign mem_mem_read = lsu_mem_read;
 
+    // data cache flush. Same as the lsu request, the flush request is kept till it is taken
+    // and the pipeline is stalled by the data bus busy in the mean time.
+    // The flush is not started for a fence.i flushed by WB stage. It is masked by redirect_pending instead of
+    // mem_flush: mem_flush depends on wb_stall, which the flush raises through the cache waitrequest.
+    // An interrupt waits till the flush completes.
+    assign dcache_flush = ex2mem_pipeline_ctrl.fence_i & ~redirect_pending;
+    assign lsu_dbus_busy = lsu_busy | dcache_flush & dcache_flush_busy;
+
     // Pipeline Stage
     assign stage_run = ~mem_stall;
     assign stage_flush = mem_flush | ~ex2mem_pipeline_ctrl.valid & stage_run;
@@ -153,7 +171,7 @@ module MEM (
         .lsu_writedata              (ex2mem_pipeline_data.mem_writedata),
         .lsu_readdata               (lsu_readdata),
         .lsu_readdata_valid         (lsu_readdata_valid),
-        .lsu_dbus_busy              (lsu_dbus_busy),
+        .lsu_dbus_busy              (lsu_busy),
         .dbus_avalon_req            (dbus_avalon_req),
         .dbus_avalon_resp           (dbus_avalon_resp),
         .lsu_exception_load_addr_misaligned   (lsu_exception_load_addr_misaligned),
@@ -14,6 +14,9 @@
 
 WB stage contains the csr module and the trap control logic
 
+FENCE.I uses the trap path to flush the pipeline and to refetch the next instruction (pc + 4)
+after the instruction cache is invalidated.
+
 */
 
 `include "core.svh"
@@ -43,7 +46,14 @@ module WB (
     output [`DATA_RANGE]            wb_forward_data,
     // to IF
     output [`PC_RANGE]              trap_pc,
-    output                          trap_take
+    output                          trap_take,
+    // to IF and instruction cache
+    output                          fence_i_take,
+    output [`PC_RANGE]              fence_i_pc,
+    // to MEM
+    output                          redirect_pending,
+    // hardware performance monitor events
+    input [`HPM_EVENT_RANGE]        hpm_event
 );
 
 
@@ -89,6 +99,11 @@ module WB (
     logic                   next_instruction_valid;
     logic [`DATA_RANGE]     next_instruction_pc;
 
+    logic                   trap_ctrl_take;
+    logic [`PC_RANGE]       trap_ctrl_pc;
+
+    logic                   instruction_retire;
+
     // ---------------------------------
     // Main logic
     // ---------------------------------
@@ -116,6 +131,20 @@ module WB (
     assign next_instruction_valid = mem_valid;
     assign next_instruction_pc = mem_instruction_pc;
 
+    // An instruction retires when it leaves WB stage without exception
+    assign instruction_retire = mem2wb_pipeline_ctrl.valid & ~wb_stall & ~(|mem2wb_pipeline_exc);
+
+    assign trap_take = trap_ctrl_take;
+    assign trap_pc = trap_ctrl_pc;
+
+    // FENCE.I: refetch the instructions after fence.i
+    assign fence_i_take = mem2wb_pipeline_ctrl.fence_i & ~wb_stall;
+    assign fence_i_pc = mem2wb_pipeline_data.pc + 4;
+
+    // An exception, mret or fence.i in WB stage is going to flush MEM stage once WB stage is not stalled.
+    // Unlike trap_take/fence_i_take it does not depend on wb_stall. Interrupts are not included.
+    assign redirect_pending = mem2wb_pipeline_ctrl.fence_i | mem2wb_pipeline_ctrl.mret | (|mem2wb_pipeline_exc);
+
     // ---------------------------------
     // Module instantiation
     // ---------------------------------
@@ -126,6 +155,9 @@ module WB (
         .csr_address        (mem2wb_pipeline_data.csr_address),
         .csr_writedata      (mem2wb_pipeline_data.csr_writedata),
         .csr_readdata       (csr_readdata[`DATA_RANGE]),
+        .trap_take          (trap_ctrl_take),
+        .i_minstret_inc     (instruction_retire),
+        .i_hpm_event        (hpm_event[`HPM_EVENT_RANGE]),
     ); */
     csr
     u_csr
@@ -149,7 +181,7 @@ module WB (
      .csr_write_opcode                  (mem2wb_pipeline_data.csr_write_opcode), // Templated
      .csr_address                       (mem2wb_pipeline_data.csr_address), // Templated
      .csr_writedata                     (mem2wb_pipeline_data.csr_writedata), // Templated
-     .trap_take                         (trap_take),
+     .trap_take                         (trap_ctrl_take),        // Templated
      .i_mcause_exception_code           (i_mcause_exception_code[30:0]),
      .i_mcause_interrupt                (i_mcause_interrupt),
      .i_mepc_value                      (i_mepc_value[31:0]),
@@ -162,7 +194,9 @@ module WB (
      .i_mip_mtip_wen                    (i_mip_mtip_wen),
      .i_mip_mtip                        (i_mip_mtip),
      .i_mip_meip_wen                    (i_mip_meip_wen),
-     .i_mip_meip                        (i_mip_meip));
+     .i_mip_meip                        (i_mip_meip),
+     .i_minstret_inc                    (instruction_retire),    // Templated
+     .i_hpm_event                       (hpm_event[`HPM_EVENT_RANGE])); // Templated
 
     // trap_ctrl
     /* trap_ctrl AUTO_TEMPLATE (
@@ -174,6 +208,8 @@ module WB (
         .pc                                (mem2wb_pipeline_data.pc),
         .fault_address                     (mem2wb_pipeline_data.mem_address),
         .fault_instruction                 (mem2wb_pipeline_data.instruction),
+        .trap_take                         (trap_ctrl_take),
+        .trap_pc                           (trap_ctrl_pc[`PC_RANGE]),
 
         .i_\(.*\)                          (o_\1),
         .o_\(.*\)                          (i_\1),
@@ -195,8 +231,8 @@ module WB (
      .o_mip_mtip                        (i_mip_mtip),            // Templated
      .o_mip_meip_wen                    (i_mip_meip_wen),        // Templated
      .o_mip_meip                        (i_mip_meip),            // Templated
-     .trap_take                         (trap_take),
-     .trap_pc                           (trap_pc[`PC_RANGE]),
+     .trap_take                         (trap_ctrl_take),        // Templated
+     .trap_pc                           (trap_ctrl_pc[`PC_RANGE]), // Templated
      // Inputs
      .clk                               (clk),
      .rst                               (rst),
@@ -0,0 +1,201 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Branch Prediction Unit
+// ------------------------------------------------------------------------------------------------
+
+/**
+
+The branch prediction unit predicts the pc of the next instruction at fetch time.
+
+- BTB (branch target buffer): a direct mapped table indexed by the fetch pc. An entry holds the target and the
+  type (branch, jump, call, return) of a branch/jump that was taken before.
+- BHT (branch history table): 2 bits saturating counters predicting the direction of the conditional branches.
+  The BHT is indexed by the pc (bimodal) or by the pc xor the global history (gshare).
+- RAS (return address stack): a call pushes its return address, a return pops it and uses it as the target.
+
+The global history and the RAS are updated speculatively when the instruction is fetched. The prediction,
+the global history and the RAS pointer used by the prediction are carried with the instruction to EX stage.
+EX stage checks the prediction and updates the BTB and the BHT. A mispredicted instruction restores the global
+history and the RAS pointer from the values it carries. The RAS entries overwritten by the wrong path are not
+restored.
+
+When BTB_DEPTH is 0 there is no prediction, the next pc is always pc + 4.
+
+*/
+
+`include "core.svh"
+
+module bpu #(
+    parameter BTB_DEPTH = 32,   // number of BTB entries. Must be power of 2 and at least 2. 0 => no prediction
+    parameter BHT_DEPTH = 64,   // number of BHT counters. Must be power of 2, 2 ~ 256
+    parameter BHT_GSHARE = 0,   // 1 => gshare, 0 => bimodal
+    parameter RAS_DEPTH = 4     // return address stack depth. Must be power of 2, 2 ~ 16. 0 => no RAS
+)(
+    input                       clk,
+    input                       rst,
+    // prediction
+    input  [`PC_RANGE]          fetch_pc,
+    input                       fetch,          // the instruction at fetch_pc is fetched
+    output [`PC_RANGE]          predict_pc,     // pc of the next instruction
+    output bp_predict_t         predict,
+    // update from EX stage
+    input  bp_resolve_t         resolve
+);
+
+generate
+if (BTB_DEPTH == 0) begin: _no_bp
+
+    assign predict_pc = fetch_pc + 4;
+    assign predict.pc = predict_pc;
+    assign predict.ghr = 0;
+    assign predict.ras_ptr = 0;
+
+end
+else begin: _bp
+
+    // ---------------------------------
+    // Signal Declaration
+    // ---------------------------------
+
+    localparam BTB_AW = $clog2(BTB_DEPTH);
+    localparam TAG_WIDTH = `DATA_WIDTH - BTB_AW - 2;
+    localparam BHT_AW = $clog2(BHT_DEPTH);
+    localparam RAS_SIZE = RAS_DEPTH > 1 ? RAS_DEPTH : 2;
+    localparam RAS_AW = $clog2(RAS_SIZE);
+
+    // btb entry type
+    localparam BTB_BRANCH = 2'd0;
+    localparam BTB_JUMP   = 2'd1;
+    localparam BTB_CALL   = 2'd2;
+    localparam BTB_RET    = 2'd3;
+
+    reg [BTB_DEPTH-1:0]         btb_valid;
+    reg [TAG_WIDTH-1:0]         btb_tag[BTB_DEPTH-1:0];
+    reg [`DATA_WIDTH-3:0]       btb_target[BTB_DEPTH-1:0];  // target is 4 bytes aligned
+    reg [1:0]                   btb_type[BTB_DEPTH-1:0];
+
+    reg [1:0]                   bht[BHT_DEPTH-1:0];
+    reg [`BP_GHR_RANGE]         ghr;
+
+    reg [`PC_RANGE]             ras[RAS_SIZE-1:0];
+    reg [RAS_AW-1:0]            ras_ptr;            // points to the next free entry
+
+    logic [BTB_AW-1:0]          fetch_btb_index;
+    logic                       fetch_btb_hit;
+    logic [1:0]                 fetch_type;
+    logic [BHT_AW-1:0]          fetch_bht_index;
+    logic                       fetch_taken;
+    logic [`PC_RANGE]           fetch_target;
+    logic                       fetch_branch;
+    logic                       fetch_call;
+    logic                       fetch_ret;
+
+    logic [BTB_AW-1:0]          resolve_btb_index;
+    logic [BHT_AW-1:0]          resolve_bht_index;
+    logic [1:0]                 resolve_type;
+    logic [RAS_AW-1:0]          resolve_ras_ptr;
+    logic                       resolve_repair;
+    logic                       btb_write;
+
+    // ---------------------------------
+    // Prediction
+    // ---------------------------------
+
+    assign fetch_btb_index = fetch_pc[BTB_AW+1:2];
+    assign fetch_btb_hit = btb_valid[fetch_btb_index] &
+                           (btb_tag[fetch_btb_index] == fetch_pc[`DATA_WIDTH-1:BTB_AW+2]);
+    assign fetch_type = btb_type[fetch_btb_index];
+
+    assign fetch_bht_index = fetch_pc[BHT_AW+1:2] ^ ((BHT_GSHARE != 0) ? ghr[BHT_AW-1:0] : '0);
+
+    assign fetch_branch = fetch_btb_hit & (fetch_type == BTB_BRANCH);
+    assign fetch_call = fetch_btb_hit & (fetch_type == BTB_CALL);
+    assign fetch_ret = fetch_btb_hit & (fetch_type == BTB_RET);
+
+    // jumps are always taken, branches are predicted by the BHT
+    assign fetch_taken = fetch_btb_hit & ((fetch_type != BTB_BRANCH) | bht[fetch_bht_index][1]);
+    assign fetch_target = (fetch_type == BTB_RET && RAS_DEPTH > 0) ? ras[ras_ptr - 1'b1] :
+                          {btb_target[fetch_btb_index], 2'b0};
+
+    assign predict_pc = fetch_taken ? fetch_target : fetch_pc + 4;
+    assign predict.pc = predict_pc;
+    assign predict.ghr = ghr;
+    assign predict.ras_ptr = `BP_RAS_PTR_WIDTH'(ras_ptr);
+
+    // ---------------------------------
+    // Update
+    // ---------------------------------
+
+    assign resolve_btb_index = resolve.pc[BTB_AW+1:2];
+    assign resolve_bht_index = resolve.pc[BHT_AW+1:2] ^ ((BHT_GSHARE != 0) ? resolve.predict.ghr[BHT_AW-1:0] : '0);
+    assign resolve_type = resolve.call ? BTB_CALL :
+                          resolve.ret  ? BTB_RET  :
+                          resolve.jump ? BTB_JUMP : BTB_BRANCH;
+    assign resolve_ras_ptr = resolve.predict.ras_ptr[RAS_AW-1:0];
+    assign resolve_repair = resolve.valid & resolve.mispredict;
+
+    // A taken branch/jump is written into the BTB. A misaligned target raises exception so it is not written.
+    assign btb_write = resolve.valid & resolve.taken & ~resolve.target[1];
+
+    // BTB
+    always @(posedge clk) begin
+        if (rst) btb_valid <= 0;
+        else if (btb_write) btb_valid[resolve_btb_index] <= 1'b1;
+        // predicted taken but it is not a branch/jump (the code is changed)
+        else if (resolve_repair && !resolve.branch && !resolve.jump) btb_valid[resolve_btb_index] <= 1'b0;
+    end
+
+    always @(posedge clk) begin
+        if (btb_write) begin
+            btb_tag[resolve_btb_index] <= resolve.pc[`DATA_WIDTH-1:BTB_AW+2];
+            btb_target[resolve_btb_index] <= resolve.target[`DATA_WIDTH-1:2];
+            btb_type[resolve_btb_index] <= resolve_type;
+        end
+    end
+
+    // BHT. The counter used by the prediction is updated with the branch result
+    always @(posedge clk) begin
+        if (rst) begin
+            for (int i = 0; i < BHT_DEPTH; i++) bht[i] <= 2'b01;    // weakly not taken
+        end
+        else if (resolve.valid && resolve.branch) begin
+            if (resolve.taken && bht[resolve_bht_index] != 2'b11) bht[resolve_bht_index] <= bht[resolve_bht_index] + 1'b1;
+            if (!resolve.taken && bht[resolve_bht_index] != 2'b00) bht[resolve_bht_index] <= bht[resolve_bht_index] - 1'b1;
+        end
+    end
+
+    // global history. Only the branches found in the BTB are shifted in at fetch time.
+    always @(posedge clk) begin
+        if (rst) ghr <= 0;
+        else if (resolve_repair) ghr <= resolve.branch ? {resolve.predict.ghr[`BP_GHR_WIDTH-2:0], resolve.taken} :
+                                                          resolve.predict.ghr;
+        else if (fetch && fetch_branch) ghr <= {ghr[`BP_GHR_WIDTH-2:0], fetch_taken};
+    end
+
+    // RAS
+    always @(posedge clk) begin
+        if (rst) ras_ptr <= 0;
+        else if (resolve_repair) ras_ptr <= resolve.call ? resolve_ras_ptr + 1'b1 :
+                                            resolve.ret  ? resolve_ras_ptr - 1'b1 : resolve_ras_ptr;
+        else if (fetch && fetch_call) ras_ptr <= ras_ptr + 1'b1;
+        else if (fetch && fetch_ret) ras_ptr <= ras_ptr - 1'b1;
+    end
+
+    always @(posedge clk) begin
+        if (rst) begin
+            for (int i = 0; i < RAS_SIZE; i++) ras[i] <= 0;
+        end
+        else if (resolve_repair && resolve.call) ras[resolve_ras_ptr] <= resolve.pc + 4;
+        else if (fetch && fetch_call) ras[ras_ptr] <= fetch_pc + 4;
+    end
+
+end
+endgenerate
+
+endmodule
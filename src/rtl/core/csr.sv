@@ -36,6 +36,8 @@ module csr (
     input           i_mip_mtip,
     input           i_mip_meip_wen,
     input           i_mip_meip,
+    input           i_minstret_inc,
+    input [`HPM_EVENT_RANGE] i_hpm_event,
 
     output          o_mstatus_mpie,
     output          o_mstatus_mie,
@@ -123,6 +125,8 @@ module csr (
           .i_mip_mtip_wen               (i_mip_mtip_wen),        // Templated
           .i_mip_mtip                   (i_mip_mtip),
           .i_mip_meip_wen               (i_mip_meip_wen),        // Templated
-          .i_mip_meip                   (i_mip_meip));
+          .i_mip_meip                   (i_mip_meip),
+          .i_minstret_inc               (i_minstret_inc),
+          .i_hpm_event                  (i_hpm_event[`HPM_EVENT_RANGE]));
 
 endmodule
@@ -82,6 +82,7 @@ module decoder (
 
     // other instruction
     output logic                            mret,
+    output logic                            fence_i,
 
     // exception
     output logic                            exception_ill_instr   // Illegal instruction
@@ -140,6 +141,7 @@ module decoder (
         alu_op1_sel_pc = 1'b0;
         alu_op2_sel_4 = 1'b0;
         mret = 1'b0;
+        fence_i = 1'b0;
 
     `ifdef ISA_RV32M
         mul = 0;
@@ -265,6 +267,14 @@ module decoder (
                     else exception_ill_instr = 1'b1;
                 end
             end
+
+            // FENCE
+            // The core executes the memory accesses in order so FENCE is a NOP.
+            // FENCE.I writes back the data cache, invalidates the instruction cache and refetches the next instruction
+            `DEC_TYPE_FENCE: begin
+                if (func3 == `DEC_FENCE_FENCE_I) fence_i = 1'b1;
+                else if (func3 != `DEC_FENCE_FENCE) exception_ill_instr = 1'b1;
+            end
         default: exception_ill_instr = 1'b1;
         endcase
     end
@@ -37,8 +37,8 @@ Stage of the req: ID
 Affect: 1. Stall IF stage till CSR instruction completes (reach WB stage)
         2. Flush ID stage till CSR instruction completes (reach WB stage)
 
-** branch_take **
-Cause: a taken branch
+** branch_mispredict **
+Cause: a mispredicted branch/jump, or a instruction predicted as a taken branch
 Stage of the req: EX
 Affect: 1. Flush IF, ID stage
 
@@ -47,6 +47,11 @@ Cause: a taken trap
 Stage of the req: WB
 Affect: 1. Flush IF, ID, EX, MEM stage
 
+** fence_i_take **
+Cause: fence.i, the instructions after it are fetched again
+Stage of the req: WB
+Affect: 1. Flush IF, ID, EX, MEM stage
+
 */
 
 module hdu (
@@ -55,8 +60,9 @@ module hdu (
     input       muldiv_stall_req,
     input       ex_csr_read,
     input       mem_csr_read,
-    input       branch_take,
+    input       branch_mispredict,
     input       trap_take,
+    input       fence_i_take,
 
     output      if_flush,
     output      if_stall,
@@ -76,11 +82,11 @@ module hdu (
     // For simplicity, we just let csr complete before excuting the next instruction
     assign csr_stall = ex_csr_read | mem_csr_read;
 
-    // A branch should wait and not flush the if/id sage if lsu data bus is busy
-    assign if_flush  = branch_take & ~lsu_dbus_busy | trap_take;
-    assign id_flush  = branch_take & ~lsu_dbus_busy | trap_take;
-    assign ex_flush  = trap_take;
-    assign mem_flush = trap_take;
+    // A mispredicted branch should wait and not flush the if/id sage if lsu data bus is busy
+    assign if_flush  = branch_mispredict & ~lsu_dbus_busy | trap_take | fence_i_take;
+    assign id_flush  = branch_mispredict & ~lsu_dbus_busy | trap_take | fence_i_take;
+    assign ex_flush  = trap_take | fence_i_take;
+    assign mem_flush = trap_take | fence_i_take;
 
     // If lsu data bus is busy, then we should not insert bubble into ID stage
     assign id_bubble = ~lsu_dbus_busy & (csr_stall | load_stall_req);
@@ -11,14 +11,16 @@
 
 /**
 
-The Instruction fetch unit contrains an instruction fetch queue (IFQ) and a program counter (pc)
+The Instruction fetch unit contrains an instruction fetch queue (IFQ), a program counter (pc)
+and a branch prediction unit (bpu).
 
 The instruction fetch queue is a simply a FIFO.
 - When the FIFO has space, we fetch the next instruction pointed by PC
-  from instruction bus and then push the instruction and its PC into the FIFO.
+  from instruction bus and then push the instruction, its PC and its branch prediction into the FIFO.
+- The next PC is predicted by the bpu when the instruction is fetched.
 - When the FIFO is not empty and IF stage is not stalled, we read the next instruction from the FIFO.
-- If we have a taken branch or a trap, HDU will issue if_flush to IF stage, then the FIFO content will be flushed
-  by resetting its read and write pointer.
+- If we have a mispredicted branch or a trap, HDU will issue if_flush to IF stage, then the FIFO content will be
+  flushed by resetting its read and write pointer.
 
 */
 
@@ -26,7 +28,11 @@ The instruction fetch queue is a simply a FIFO.
 
 module ifu #(
     parameter IFQ_DEPTH = 4,    // instruction fetch queue depth
-    parameter IFQ_AFULL_TH = 1  // instruction fetch queue almost full threshold
+    parameter IFQ_AFULL_TH = 1, // instruction fetch queue almost full threshold
+    parameter BTB_DEPTH = 32,   // branch target buffer entries. 0 => no branch prediction
+    parameter BHT_DEPTH = 64,   // branch history table entries
+    parameter BHT_GSHARE = 0,   // 1 => gshare, 0 => bimodal
+    parameter RAS_DEPTH = 4     // return address stack depth. 0 => no return address stack
 )(
     input                       clk,
     input                       rst,
@@ -34,14 +40,18 @@ module ifu #(
     input                       ifu_flush,
     input                       ifu_stall,
     // pc transfer
-    input                       branch_take,
+    input                       branch_mispredict,
     input  [`PC_RANGE]          branch_pc,
+    input  bp_resolve_t         bp_resolve,
     input                       trap_take,
     input [`PC_RANGE]           trap_pc,
+    input                       fence_i_take,
+    input [`PC_RANGE]           fence_i_pc,
     // output instruction and pc
     output logic [`DATA_RANGE]  instruction,
     output logic [`DATA_RANGE]  instruction_pc,
     output logic                instruction_valid,
+    output bp_predict_t         instruction_bp_predict,
     // instruction bus
     output avalon_req_t         ibus_avalon_req,
     input  avalon_resp_t        ibus_avalon_resp
@@ -53,7 +63,7 @@ module ifu #(
 
     // instruction fetch queue
     localparam IFQ_AWIDTH = $clog2(IFQ_DEPTH);
-    localparam IFQ_WIDTH  = `DATA_WIDTH * 2;
+    localparam IFQ_WIDTH  = `DATA_WIDTH * 2 + $bits(bp_predict_t);
 
     reg [IFQ_WIDTH-1:0]     ifq_mem[IFQ_DEPTH-1:0];
     reg [IFQ_WIDTH-1:0]     ifq_mem_dout;
@@ -72,6 +82,12 @@ module ifu #(
     reg [`PC_RANGE]         pending_pc;
     reg                     pending_pc_valid;
 
+    // branch prediction
+    logic [`PC_RANGE]       predict_pc;
+    bp_predict_t            predict;
+    bp_predict_t            current_predict;
+    logic                   bpu_fetch;
+
     // FLUSH
     reg                     flush_pending_read;
 
@@ -95,7 +111,7 @@ module ifu #(
 
     // PC logic
 
-    // Corner Case: For a taken branch or a trap, we should not take the new pc when the ibus is busy
+    // Corner Case: For a mispredicted branch, a trap or a fence.i, we should not take the new pc when the ibus is busy
     // because we need to keep the address stable after we initiate the bus request for avalon bus.
     // To deal with this corner case, we introduced a pending pc here.
     // The target pc will be stored in pending pc buffer if we can't take the pc right now.
@@ -103,13 +119,14 @@ module ifu #(
 
     always @(posedge clk) begin
         if (rst) pending_pc_valid <= 1'b0;
-        if ((trap_take || branch_take) && ibus_avalon_resp.waitrequest) pending_pc_valid <= 1'b1;
+        if ((trap_take || fence_i_take || branch_mispredict) && ibus_avalon_resp.waitrequest) pending_pc_valid <= 1'b1;
         else if (pending_pc_valid && !ibus_avalon_resp.waitrequest) pending_pc_valid <= 1'b0;
     end
 
     always @(posedge clk) begin
         if (trap_take && ibus_avalon_resp.waitrequest) pending_pc <= trap_pc;
-        else if (branch_take && ibus_avalon_resp.waitrequest) pending_pc <= branch_pc;
+        else if (fence_i_take && ibus_avalon_resp.waitrequest) pending_pc <= fence_i_pc;
+        else if (branch_mispredict && ibus_avalon_resp.waitrequest) pending_pc <= branch_pc;
     end
 
     always @(posedge clk) begin
@@ -118,9 +135,10 @@ module ifu #(
             // we only update PC when the bus is not busy
             if (!ibus_avalon_resp.waitrequest) begin
                 if (trap_take) pc <= trap_pc;
-                else if (branch_take) pc <= branch_pc;
+                else if (fence_i_take) pc <= fence_i_pc;
+                else if (branch_mispredict) pc <= branch_pc;
                 else if (pending_pc_valid) pc <= pending_pc;
-                else if (ibus_avalon_req.read) pc <= pc + 4;
+                else if (ibus_avalon_req.read) pc <= predict_pc;
             end
         end
     end
@@ -169,7 +187,8 @@ module ifu #(
 
     // we need to store the pc into a register to match the latency of the read data. (instruction)
     always @(posedge clk) current_pc <= pc;
-    assign ifq_mem_din = {ibus_avalon_resp.readdata, current_pc};
+    always @(posedge clk) current_predict <= predict;
+    assign ifq_mem_din = {ibus_avalon_resp.readdata, current_pc, current_predict};
 
     // Flush logic
 
@@ -187,7 +206,7 @@ module ifu #(
 
     // Output Instructions from IFU
 
-    assign {instruction, instruction_pc} = ifq_mem_dout;
+    assign {instruction, instruction_pc, instruction_bp_predict} = ifq_mem_dout;
 
     always @(posedge clk) begin
         if (rst) instruction_valid <= 1'b0;
@@ -203,6 +222,26 @@ module ifu #(
 
     assign ibus_read_fire = ibus_avalon_req.read & ~ibus_avalon_resp.waitrequest;
 
+    // Branch prediction
+
+    // The speculative state of the bpu is updated by the instructions pushed into the IFQ
+    assign bpu_fetch = ibus_read_fire & ~flush_pending_read & ~ifu_flush;
+
+    bpu #(
+        .BTB_DEPTH      (BTB_DEPTH),
+        .BHT_DEPTH      (BHT_DEPTH),
+        .BHT_GSHARE     (BHT_GSHARE),
+        .RAS_DEPTH      (RAS_DEPTH))
+    u_bpu (
+        .clk            (clk),
+        .rst            (rst),
+        .fetch_pc       (pc),
+        .fetch          (bpu_fetch),
+        .predict_pc     (predict_pc),
+        .predict        (predict),
+        .resolve        (bp_resolve)
+    );
+
     // ---------------------------------
     // Simulation only
     // ---------------------------------
@@ -11,6 +11,22 @@
 // Register module for mcsr.
 // ------------------------------------------------------------------------------------------------
 
+/**
+
+Performance counters:
+
+- mcycle and minstret count the clock cycles and the retired instructions.
+- mhpmcounter3 ~ mhpmcounter(3 + HPM_COUNTERS - 1) count the event selected by the corresponding mhpmevent.
+  The event ids are defined in core_arch.svh. The other hpm counters and events read 0.
+  Writing an event id >= HPM_EVENT_NUM to mhpmevent selects no event (HPM_EVENT_NONE).
+- mcountinhibit stops the counters. Bit 0: mcycle, bit 2: minstret, bit N: mhpmcounterN.
+- cycle, instret and hpmcounterN are the read only shadows of the machine counters.
+- A CSR write to a counter takes precedence over the increment in the same cycle.
+
+*/
+
+`include "core.svh"
+
 module mcsr
 (
     input               clk,
@@ -51,6 +67,8 @@ module mcsr
     input               i_mip_mtip,
     input               i_mip_meip_wen,
     input               i_mip_meip,
+    input               i_minstret_inc,
+    input [`HPM_EVENT_RANGE] i_hpm_event,
 
     // Hardware value output port
     output              o_mstatus_mpie,
@@ -108,6 +126,20 @@ module mcsr
     logic [31:0]    mcycleh;
     reg [31:0]      mcycleh_value;
 
+    logic [31:0]    minstret;
+    reg [31:0]      minstret_value;
+
+    logic [31:0]    minstreth;
+    reg [31:0]      minstreth_value;
+
+    logic [31:0]    mcountinhibit;
+    reg             mcountinhibit_cy;
+    reg             mcountinhibit_ir;
+    reg [`HPM_COUNTERS-1:0] mcountinhibit_hpm;
+
+    reg [63:0]      mhpmcounter_value[`HPM_COUNTERS-1:0];
+    reg [`HPM_EVENT_ID_RANGE] mhpmevent_value[`HPM_COUNTERS-1:0];
+
     logic [31:0]    mie;
     reg             mie_msie;
     reg             mie_mtie;
@@ -133,6 +165,9 @@ module mcsr
     assign mhartid = {mhartid_value};
     assign mcycle = mcycle_value;
     assign mcycleh = mcycleh_value;
+    assign minstret = minstret_value;
+    assign minstreth = minstreth_value;
+    assign mcountinhibit = {{(29-`HPM_COUNTERS){1'b0}}, mcountinhibit_hpm, mcountinhibit_ir, 1'b0, mcountinhibit_cy};
     assign mie = {20'b0, mie_meie, 3'b0, mie_mtie, 3'b0, mie_msie, 3'b0};
     assign mip = {20'b0, mip_meip, 3'b0, mip_mtip, 3'b0, mip_msip, 3'b0};
 
@@ -171,14 +206,26 @@ module mcsr
             12'h342: csr_readdata = mcause;
             12'h343: csr_readdata = mtval;
             12'h344: csr_readdata = mip;
+            12'h320: csr_readdata = mcountinhibit;
             12'hB00: csr_readdata = mcycle;
             12'hB80: csr_readdata = mcycleh;
+            12'hB02: csr_readdata = minstret;
+            12'hB82: csr_readdata = minstreth;
+            12'hC00: csr_readdata = mcycle;
+            12'hC80: csr_readdata = mcycleh;
+            12'hC02: csr_readdata = minstret;
+            12'hC82: csr_readdata = minstreth;
             12'hf11: csr_readdata = mvendorid;
             12'hf12: csr_readdata = marchid;
             12'hf13: csr_readdata = mimpid;
             12'hf14: csr_readdata = mhartid;
             default: csr_readdata = 0;
         endcase
+        for (int i = 0; i < `HPM_COUNTERS; i++) begin
+            if (csr_address == 12'(12'hB03 + i) || csr_address == 12'(12'hC03 + i)) csr_readdata = mhpmcounter_value[i][31:0];
+            if (csr_address == 12'(12'hB83 + i) || csr_address == 12'(12'hC83 + i)) csr_readdata = mhpmcounter_value[i][63:32];
+            if (csr_address == 12'(12'h323 + i)) csr_readdata = 32'(mhpmevent_value[i]);
+        end
     end
 
     // -- Write Logic -- //
@@ -199,9 +246,16 @@ module mcsr
             mip_msip <= 'b0;
             mip_mtip <= 'b0;
             mip_meip <= 'b0;
+            mcountinhibit_cy <= 'b0;
+            mcountinhibit_ir <= 'b0;
+            mcountinhibit_hpm <= 'b0;
         end
         else begin
 
+            // performance counters. The csr write below takes precedence
+            if (!mcountinhibit_cy) {mcycleh_value, mcycle_value} <= {mcycleh_value, mcycle_value} + 1'b1;
+            if (!mcountinhibit_ir && i_minstret_inc) {minstreth_value, minstret_value} <= {minstreth_value, minstret_value} + 1'b1;
+
             if (i_mstatus_mpie_wen) mstatus_mpie <= i_mstatus_mpie;
             if (i_mstatus_mie_wen) mstatus_mie <= i_mstatus_mie;
             if (i_mepc_value_wen) mepc_value <= i_mepc_value;
@@ -234,15 +288,39 @@ module mcsr
                         mcause_exception_code <= csr_writedata[30:0];
                     end
                     12'h343: mtval_value <= csr_writedata[31:0];
+                    12'h320: begin
+                        mcountinhibit_cy <= csr_writedata[0];
+                        mcountinhibit_ir <= csr_writedata[2];
+                        mcountinhibit_hpm <= csr_writedata[3 +: `HPM_COUNTERS];
+                    end
                     12'hB00: mcycle_value <= csr_writedata[31:0];
                     12'hB80: mcycleh_value <= csr_writedata[31:0];
+                    12'hB02: minstret_value <= csr_writedata[31:0];
+                    12'hB82: minstreth_value <= csr_writedata[31:0];
 
                     default: begin end
                 endcase
             end
+        end
+    end
 
-            // other hardware logic
-            {mcycleh_value, mcycle_value} <= {mcycleh_value, mcycle_value} + 1'b1;
+    // hpm counters
+    always @(posedge clk) begin
+        for (int i = 0; i < `HPM_COUNTERS; i++) begin
+            if (rst) begin
+                mhpmcounter_value[i] <= 'b0;
+                mhpmevent_value[i] <= `HPM_EVENT_NONE;
+            end
+            else begin
+                if (!mcountinhibit_hpm[i] && i_hpm_event[mhpmevent_value[i]]) mhpmcounter_value[i] <= mhpmcounter_value[i] + 1'b1;
+                if (csr_write && csr_address == 12'(12'hB03 + i)) mhpmcounter_value[i][31:0] <= csr_writedata;
+                if (csr_write && csr_address == 12'(12'hB83 + i)) mhpmcounter_value[i][63:32] <= csr_writedata;
+                if (csr_write && csr_address == 12'(12'h323 + i)) begin
+                    // an event id that is not implemented selects no event
+                    if (csr_writedata < `HPM_EVENT_NUM) mhpmevent_value[i] <= csr_writedata[`HPM_EVENT_ID_RANGE];
+                    else mhpmevent_value[i] <= `HPM_EVENT_NONE;
+                end
+            end
         end
     end
 
@@ -13,6 +13,7 @@ VERILOG_SOURCES += $(CPU_CORE_PATH)/ID.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/IF.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/lsu.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/MEM.sv
+VERILOG_SOURCES += $(CPU_CORE_PATH)/bpu.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/ifu.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/regfile.sv
 VERILOG_SOURCES += $(CPU_CORE_PATH)/mcsr.sv
@@ -23,6 +24,7 @@ VERILOG_SOURCES += $(CPU_CORE_PATH)/WB.sv
 VERILOG_SOURCES += $(CACHE_PATH)/cache_tag_ram.sv
 VERILOG_SOURCES += $(CACHE_PATH)/cache_data_ram.sv
 VERILOG_SOURCES += $(CACHE_PATH)/cache_set.sv
+VERILOG_SOURCES += $(CACHE_PATH)/cache_write_buffer.sv
 VERILOG_SOURCES += $(CACHE_PATH)/cache.sv
 
 VERILOG_SOURCES += $(CPU_CORE_PATH)/veriRISCV_core.sv
@@ -14,17 +14,22 @@
 
 module veriRISCV_core #(
 `ifdef USE_ICACHE
-    parameter ICACHE_LINE_SIZE = 4,  // cache line size in bytes, support 4 byte only for now
+    parameter ICACHE_LINE_SIZE = 4,  // cache line size in bytes. 4/8/16/32/64
     parameter ICACHE_DEPTH = 32,     // depth of the cache set. Must be power of 2
     parameter ICACHE_WAYS = 1,       // cache ways. 1 => direct mapped. >=2 set associative
 `endif
 `ifdef USE_DCACHE
-    parameter DCACHE_LINE_SIZE = 4,  // cache line size in bytes, support 4 byte only for now
+    parameter DCACHE_LINE_SIZE = 4,  // cache line size in bytes. 4/8/16/32/64
     parameter DCACHE_DEPTH = 32,     // depth of the cache set. Must be power of 2
     parameter DCACHE_WAYS = 1,       // cache ways. 1 => direct mapped. >=2 set associative
+    parameter DCACHE_WRITE_BUFFER = 8, // write buffer depth in words. Must be power of 2 and at least 2
 `endif
     parameter IFQ_DEPTH = 16,   // instruction fetch queue depth. Set to 16 so it is mapped to FPGA BRAM
-    parameter IFQ_AFULL_TH = 1  // instruction fetch queue almost full threshold
+    parameter IFQ_AFULL_TH = 1, // instruction fetch queue almost full threshold
+    parameter BTB_DEPTH = 32,   // branch target buffer entries. Must be power of 2. 0 => no branch prediction
+    parameter BHT_DEPTH = 64,   // branch history table entries. Must be power of 2, 2 ~ 256
+    parameter BHT_GSHARE = 0,   // 1 => gshare, 0 => bimodal
+    parameter RAS_DEPTH = 4     // return address stack depth. Must be power of 2, 2 ~ 16. 0 => no RAS
 )(
     input                   clk,
     input                   rst,
@@ -86,8 +91,9 @@ module veriRISCV_core #(
 
 
     // common signals
-    logic                   branch_take;
+    logic                   branch_mispredict;
     logic [`PC_RANGE]       branch_pc;
+    bp_resolve_t            bp_resolve;
 
     logic                   trap_take;
     logic [`PC_RANGE]       trap_pc;
@@ -95,6 +101,14 @@ module veriRISCV_core #(
     logic                   lsu_dbus_busy;
     logic                   hdu_load_stall_req;
     logic                   muldiv_stall_req;
+    logic                   dcache_flush;
+    logic                   dcache_flush_busy;
+    logic                   fence_i_take;
+    logic [`PC_RANGE]       fence_i_pc;
+    logic                   redirect_pending;
+    logic                   icache_miss;
+    logic                   dcache_miss;
+    logic [`HPM_EVENT_RANGE] hpm_event;
 
 `ifdef USE_ICACHE
     avalon_req_t            icache_avn_req;
@@ -112,7 +126,11 @@ module veriRISCV_core #(
 
     IF #(
         .IFQ_DEPTH      (IFQ_DEPTH),
-        .IFQ_AFULL_TH   (IFQ_AFULL_TH))
+        .IFQ_AFULL_TH   (IFQ_AFULL_TH),
+        .BTB_DEPTH      (BTB_DEPTH),
+        .BHT_DEPTH      (BHT_DEPTH),
+        .BHT_GSHARE     (BHT_GSHARE),
+        .RAS_DEPTH      (RAS_DEPTH))
     u_IF(
         .clk                    (clk),
         .rst                    (rst),
@@ -125,10 +143,13 @@ module veriRISCV_core #(
         .ibus_avalon_req        (ibus_avalon_req),
         .ibus_avalon_resp       (ibus_avalon_resp),
     `endif
-        .branch_take            (branch_take),
+        .branch_mispredict      (branch_mispredict),
         .branch_pc              (branch_pc),
+        .bp_resolve             (bp_resolve),
         .trap_take              (trap_take),
         .trap_pc                (trap_pc),
+        .fence_i_take           (fence_i_take),
+        .fence_i_pc             (fence_i_pc),
         .if2id_pipeline_ctrl    (if2id_pipeline_ctrl),
         .if2id_pipeline_data    (if2id_pipeline_data)
     );
@@ -173,7 +194,8 @@ module veriRISCV_core #(
         .id2ex_pipeline_data    (id2ex_pipeline_data),
         .wb_forward_data        (wb_forward_data),
         .branch_pc              (branch_pc),
-        .branch_take            (branch_take),
+        .branch_mispredict      (branch_mispredict),
+        .bp_resolve             (bp_resolve),
         .ex_mem_read            (ex_mem_read),
         .muldiv_stall_req       (muldiv_stall_req),
         .ex2mem_pipeline_ctrl   (ex2mem_pipeline_ctrl),
@@ -199,6 +221,9 @@ module veriRISCV_core #(
     `endif
         .mem_mem_read           (mem_mem_read),
         .lsu_dbus_busy          (lsu_dbus_busy),
+        .redirect_pending       (redirect_pending),
+        .dcache_flush           (dcache_flush),
+        .dcache_flush_busy      (dcache_flush_busy),
         .ex2mem_pipeline_ctrl   (ex2mem_pipeline_ctrl),
         .ex2mem_pipeline_exc    (ex2mem_pipeline_exc),
         .ex2mem_pipeline_data   (ex2mem_pipeline_data),
@@ -236,7 +261,11 @@ module veriRISCV_core #(
         .wb_reg_writedata       (wb_reg_writedata),
         .wb_forward_data        (wb_forward_data),
         .trap_take              (trap_take),
-        .trap_pc                (trap_pc)
+        .trap_pc                (trap_pc),
+        .fence_i_take           (fence_i_take),
+        .fence_i_pc             (fence_i_pc),
+        .redirect_pending       (redirect_pending),
+        .hpm_event              (hpm_event)
     );
 
 
@@ -245,8 +274,9 @@ module veriRISCV_core #(
     // ---------------------------------
 
     hdu u_hdu(
-        .branch_take        (branch_take),
+        .branch_mispredict  (branch_mispredict),
         .trap_take          (trap_take),
+        .fence_i_take       (fence_i_take),
         .lsu_dbus_busy      (lsu_dbus_busy),
         .load_stall_req     (hdu_load_stall_req),
         .muldiv_stall_req   (muldiv_stall_req),
@@ -273,30 +303,61 @@ module veriRISCV_core #(
     cache #(
         .CACHE_LINE_SIZE    (ICACHE_LINE_SIZE),
         .CACHE_SET_DEPTH    (ICACHE_DEPTH),
-        .CACHE_WAYS         (ICACHE_WAYS))
+        .CACHE_WAYS         (ICACHE_WAYS),
+        .WRITE_BUFFER_DEPTH (2))
     u_instruction_cache (
         .clk                (clk),
         .rst                (rst),
+        .flush              (1'b0),
+        .invalidate         (fence_i_take),
+        .miss               (icache_miss),
         .core_avn_req       (icache_avn_req),
         .core_avn_resp      (icache_avn_resp),
         .mem_avn_req        (ibus_avalon_req),
         .mem_avn_resp       (ibus_avalon_resp)
     );
+`else
+    assign icache_miss = 1'b0;
 `endif
 
 `ifdef USE_DCACHE
     cache #(
         .CACHE_LINE_SIZE    (DCACHE_LINE_SIZE),
         .CACHE_SET_DEPTH    (DCACHE_DEPTH),
-        .CACHE_WAYS         (DCACHE_WAYS))
+        .CACHE_WAYS         (DCACHE_WAYS),
+        .WRITE_BUFFER_DEPTH (DCACHE_WRITE_BUFFER))
     u_data_cache (
         .clk                (clk),
         .rst                (rst),
+        .flush              (dcache_flush),
+        .invalidate         (1'b0),
+        .miss               (dcache_miss),
         .core_avn_req       (dcache_avn_req),
         .core_avn_resp      (dcache_avn_resp),
         .mem_avn_req        (dbus_avalon_req),
         .mem_avn_resp       (dbus_avalon_resp)
     );
+
+    assign dcache_flush_busy = dcache_avn_resp.waitrequest;
+`else
+    assign dcache_flush_busy = 1'b0;
+    assign dcache_miss = 1'b0;
 `endif
 
+    // ---------------------------------
+    // Hardware performance monitor events
+    // ---------------------------------
+
+    // event id => event, counted by the hpm counters in mcsr
+    assign hpm_event[`HPM_EVENT_NONE]           = 1'b0;
+    assign hpm_event[`HPM_EVENT_ICACHE_MISS]    = icache_miss;
+    assign hpm_event[`HPM_EVENT_DCACHE_MISS]    = dcache_miss;
+    assign hpm_event[`HPM_EVENT_LOAD_STALL]     = hdu_load_stall_req;
+    assign hpm_event[`HPM_EVENT_MULDIV_STALL]   = muldiv_stall_req;
+    assign hpm_event[`HPM_EVENT_BRANCH_FLUSH]   = branch_mispredict & ~lsu_dbus_busy;
+    assign hpm_event[`HPM_EVENT_IBUS_WAIT]      = ibus_avalon_req.read & ibus_avalon_resp.waitrequest;
+    assign hpm_event[`HPM_EVENT_DBUS_WAIT]      = (dbus_avalon_req.read | dbus_avalon_req.write) & dbus_avalon_resp.waitrequest;
+    assign hpm_event[`HPM_EVENT_BRANCH]         = bp_resolve.valid & (bp_resolve.branch | bp_resolve.jump);
+    assign hpm_event[`HPM_EVENT_NUM-1:`HPM_EVENT_BRANCH+1] = 0;
+
 endmodule
@@ -31,7 +31,10 @@ module avalon_ram_1rw #(
 
 `ifdef COCOTB_SIM
 
+    // ram is also written by the testbench backdoor (sim_load/sim_clear) below
+    /* verilator lint_off MULTIDRIVEN */
     reg [DW-1:0] ram[RAM_DEPTH-1:0];
+    /* verilator lint_on MULTIDRIVEN */
     reg [DW-1:0] data;
 
     always @(posedge clk) begin
@@ -45,6 +48,31 @@ module avalon_ram_1rw #(
 
     assign readdata = data;
 
+    // Testbench backdoor: the testbench writes the program image into a $readmemh file and pulses sim_load
+    // to load the whole memory in one shot instead of writing it word by word through the simulator.
+    // Pulsing sim_clear zeros the whole memory.
+    // Pulsing sim_dump writes the words between sim_dump_start and sim_dump_end into a $writememh file.
+    string       sim_image;
+    string       sim_dump_file;
+    reg          sim_load = 1'b0;
+    reg          sim_clear = 1'b0;
+    reg          sim_dump = 1'b0;
+    reg [31:0]   sim_dump_start = 'b0;
+    reg [31:0]   sim_dump_end = 'b0;
+
+    initial begin
+        if (!$value$plusargs("MEMORY_IMAGE=%s", sim_image)) sim_image = "memory.hex";
+        if (!$value$plusargs("MEMORY_DUMP=%s", sim_dump_file)) sim_dump_file = "memory_dump.hex";
+    end
+
+    always @(posedge sim_dump) $writememh(sim_dump_file, ram, sim_dump_start, sim_dump_end);
+
+    always @(posedge sim_load) $readmemh(sim_image, ram);
+
+    always @(posedge sim_clear) begin
+        for (int i = 0; i < RAM_DEPTH; i = i + 1) ram[i] = 'b0;
+    end
+
 `elsif VIVADO
 
     // use seperate ram for each byte
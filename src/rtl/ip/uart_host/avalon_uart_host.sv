@@ -15,6 +15,21 @@
  * content: AB0, AB1, AB2, AB3, DB0, DB1, DB2, DB3
  * AB0 ~ AB3: Address byte 0 ~ byte 3. DB0 ~ DB1: Data byte 0 ~ byte 3
  * Currently only memory write (memWr) access is supported
+ *
+ * Burst write command: BURST_KEY followed by one 8 byte header frame and the data.
+ * Header: AB0 ~ AB3: start address, LB0 ~ LB3: length in words.
+ * Then the data words are sent back to back (DB0 ~ DB3 of each word) without address.
+ * The burst is only accepted in a write session (after WRITE_START_KEY).
+ * When all the words are received, the CRC-32 (IEEE 802.3, same as zlib.crc32) of the data
+ * bytes is sent back through uart tx, LSB first, so the host can check the integrity.
+ * A received word waits in a holding register till the command fifo has room, the address only
+ * advances when the word is pushed. Uart has no flow control, if the next word is received while
+ * the holding register is still occupied the word is lost and the CRC sent back is not inverted
+ * (so it never matches) to report the error.
+ *
+ * Baud rate command: BAUD_KEY followed by one 8 byte frame. The byte 0 ~ byte 1 of
+ * the frame is the new uart divider (CLK_FREQ / BAUD_RATE). The new baud rate takes
+ * effect after the frame is received and stays till reset.
  * ---------------------------------------------------------------
  */
 
@@ -22,7 +37,9 @@
 module avalon_uart_host #(
     parameter WRITE_START_KEY   = 64'h5050505011111111,
     parameter READ_START_KEY    = 64'h5050505022222222,
-    parameter END_KEY           = 64'h50505050EEEEEEEE
+    parameter END_KEY           = 64'h50505050EEEEEEEE,
+    parameter BAUD_KEY          = 64'h5050505033333333,
+    parameter BURST_KEY         = 64'h5050505044444444
 ) (
     input               clk,
     input               rst,
@@ -83,6 +100,27 @@ module avalon_uart_host #(
     logic               write_start_cmd;
     logic               read_start_cmd;
     logic               end_cmd;
+    logic               baud_start_cmd;
+    reg                 baud_cmd;
+    reg                 baud_set;
+    reg [15:0]          baud_div;
+
+    logic               burst_start_cmd;
+    logic               burst_rx;
+    logic               burst_word_cmpl;
+    reg                 burst_hdr;
+    reg                 burst_active;
+    logic               burst_push_req;
+    reg                 burst_push;
+    reg                 burst_pending;
+    reg                 burst_drop;
+    reg                 burst_done;
+    reg [31:0]          burst_data;
+    reg [31:0]          burst_addr;
+    reg [31:0]          burst_remain;
+    reg [31:0]          burst_word;
+    reg [1:0]           burst_byte_cnt;
+    reg [31:0]          burst_crc;
     logic               avn_cmd_type;
     logic               data_count_fire;
 
@@ -100,18 +138,21 @@ module avalon_uart_host #(
     assign cfg_nstop = 0;
     assign cfg_txen = uart_debug_en;
     assign cfg_rxen = uart_debug_en;
-    assign cfg_div = uart_div;
+    assign cfg_div = baud_set ? baud_div : uart_div;
 
     // -- receive command from uart rx and send it to command fifo --//
     assign data_count_fire = data_count == 7;
     assign write_start_cmd = (cmd == WRITE_START_KEY);
     assign read_start_cmd = (cmd == READ_START_KEY);
     assign end_cmd = (cmd == END_KEY);
+    assign baud_start_cmd = (cmd == BAUD_KEY);
+    assign burst_start_cmd = (cmd == BURST_KEY);
 
+    // the bytes of the burst data do not go to the command shift register
     always @(posedge clk) begin
         if (rst) data_count <= 0;
         else begin
-            if (rx_valid) begin
+            if (rx_valid && !burst_active) begin
                 if (data_count_fire) data_count <= 0;
                 else data_count <= data_count + 1'b1;
             end
@@ -120,7 +161,7 @@ module avalon_uart_host #(
 
     always @(posedge clk) begin
         cmd_cmpl <= 0;
-        if (rx_valid) begin
+        if (rx_valid && !burst_active) begin
             cmd <= {rx_data, cmd[WIDTH-1:8]};
             if (data_count_fire) cmd_cmpl <= 1;
         end
@@ -147,12 +188,96 @@ module avalon_uart_host #(
         end
     end
 
+    // -- baud rate command --//
+    always @(posedge clk) begin
+        if (rst) begin
+            baud_cmd <= 1'b0;
+            baud_set <= 1'b0;
+        end
+        else begin
+            if (cmd_cmpl && baud_cmd) begin
+                baud_cmd <= 1'b0;
+                baud_set <= 1'b1;
+            end
+            else if (cmd_cmpl && baud_start_cmd) baud_cmd <= 1'b1;
+        end
+    end
+
+    always @(posedge clk) begin
+        if (cmd_cmpl && baud_cmd) baud_div <= cmd[15:0];
+    end
+
+    // -- burst write command --//
+    assign burst_rx = rx_valid & burst_active;
+    assign burst_word_cmpl = burst_rx & (burst_byte_cnt == 3);
+
+    always @(posedge clk) begin
+        if (rst) begin
+            burst_hdr <= 1'b0;
+            burst_active <= 1'b0;
+        end
+        else begin
+            if (cmd_cmpl && burst_hdr) begin
+                burst_hdr <= 1'b0;
+                burst_active <= (cmd[63:32] != 0);
+            end
+            else if (cmd_cmpl && burst_start_cmd && uart_host_writing) burst_hdr <= 1'b1;
+            if (burst_word_cmpl && burst_remain == 1) burst_active <= 1'b0;
+        end
+    end
+
+    always @(posedge clk) begin
+        if (cmd_cmpl && burst_hdr) begin
+            burst_addr <= cmd[31:0];
+            burst_remain <= cmd[63:32];
+            burst_byte_cnt <= 0;
+            burst_crc <= 32'hFFFFFFFF;
+        end
+        else begin
+            // the address advances only when the word is pushed into the command fifo
+            if (burst_push) burst_addr <= burst_addr + 4;
+            if (burst_rx) begin
+                burst_word <= {rx_data, burst_word[31:8]};
+                burst_byte_cnt <= burst_byte_cnt + 1'b1;
+                burst_crc <= crc32_byte(burst_crc, rx_data);
+            end
+            if (burst_word_cmpl) burst_remain <= burst_remain - 1'b1;
+        end
+    end
+
+    // a completed word waits in burst_data till the command fifo has room
+    assign burst_push_req = burst_pending & ~cmd_fifo_full;
+
+    always @(posedge clk) begin
+        if (burst_word_cmpl) burst_data <= {rx_data, burst_word[31:8]};
+    end
+
+    always @(posedge clk) begin
+        if (rst) begin
+            burst_push <= 1'b0;
+            burst_pending <= 1'b0;
+            burst_drop <= 1'b0;
+            burst_done <= 1'b0;
+        end
+        else begin
+            burst_push <= burst_push_req;
+            if (burst_word_cmpl) burst_pending <= 1'b1;
+            else if (burst_push_req) burst_pending <= 1'b0;
+            // the previous word is still waiting for the fifo, it is overwritten by the new word
+            if (cmd_cmpl && burst_hdr) burst_drop <= 1'b0;
+            else if (burst_word_cmpl && burst_pending && !burst_push_req) burst_drop <= 1'b1;
+            burst_done <= burst_word_cmpl & (burst_remain == 1);
+        end
+    end
+
     always @(posedge clk) begin
         if (rst) cmd_fifo_push <= 1'b0;
-        else cmd_fifo_push <= cmd_cmpl & ~cmd_fifo_full & ~end_cmd & (uart_host_writing | uart_host_reading);
+        else cmd_fifo_push <= (cmd_cmpl & ~cmd_fifo_full & ~end_cmd & ~baud_start_cmd & ~baud_cmd &
+                               ~burst_start_cmd & ~burst_hdr & (uart_host_writing | uart_host_reading)) |
+                              burst_push_req;
     end
 
-    assign cmd_fifo_din = {cmd_type, cmd};
+    assign cmd_fifo_din = burst_push ? {1'b0, burst_data, burst_addr} : {cmd_type, cmd};
 
     //-- Get the command from command fifo and send it to the avalon bus --//
     assign cmd_fifo_pop = (avn_write | avn_read) & ~avn_waitrequest;
@@ -169,8 +294,9 @@ module avalon_uart_host #(
         else read_data_valid <= avn_read & ~avn_waitrequest; // read latency is 1
     end
 
-    assign read_fifo_push = read_data_valid;    // ideally the FIFO should not be full when we push
-    assign read_fifo_din = avn_readdata;
+    // the CRC of a burst is sent back the same way as the read data
+    assign read_fifo_push = read_data_valid | burst_done;    // ideally the FIFO should not be full when we push
+    assign read_fifo_din = burst_done ? (burst_drop ? burst_crc : ~burst_crc) : avn_readdata;
 
     //-- read the data from read FIFO and send it through uart tx --//
 
@@ -231,6 +357,19 @@ module avalon_uart_host #(
         endcase
     end
 
+    // --------------------------------------------
+    //  CRC-32 (reflected, polynomial 0xEDB88320)
+    // --------------------------------------------
+
+    function automatic logic [31:0] crc32_byte(input logic [31:0] crc, input logic [7:0] data);
+        logic [31:0] c;
+        c = crc ^ {24'b0, data};
+        for (int i = 0; i < 8; i++) begin
+            c = c[0] ? ((c >> 1) ^ 32'hEDB88320) : (c >> 1);
+        end
+        return c;
+    endfunction
+
     // --------------------------------------------
     //  Module instantiation
     // --------------------------------------------
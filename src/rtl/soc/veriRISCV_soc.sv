@@ -23,17 +23,22 @@ module veriRISCV_soc #(
     parameter SRAM_DW = 16,
 `endif
 `ifdef USE_ICACHE
-    parameter ICACHE_LINE_SIZE = 4, // cache line size in bytes, support 4 byte only for now
+    parameter ICACHE_LINE_SIZE = 4, // cache line size in bytes. 4/8/16/32/64
     parameter ICACHE_DEPTH = 64,    // depth of the cache set. Must be power of 2
     parameter ICACHE_WAYS = 2,      // cache ways. 1 => direct mapped. >=2 set associative
 `endif
 `ifdef USE_DCACHE
-    parameter DCACHE_LINE_SIZE = 4, // cache line size in bytes, support 4 byte only for now
+    parameter DCACHE_LINE_SIZE = 4, // cache line size in bytes. 4/8/16/32/64
     parameter DCACHE_DEPTH = 64,    // depth of the cache set. Must be power of 2
     parameter DCACHE_WAYS = 1,      // cache ways. 1 => direct mapped. >=2 set associative
+    parameter DCACHE_WRITE_BUFFER = 8, // write buffer depth in words. Must be power of 2 and at least 2
 `endif
     parameter IFQ_DEPTH = 16,       // instruction fetch queue depth. Set to 16 so it is mapped to FPGA BRAM
     parameter IFQ_AFULL_TH = 1,     // instruction fetch queue almost full threshold
+    parameter BTB_DEPTH = 32,       // branch target buffer entries. Must be power of 2. 0 => no branch prediction
+    parameter BHT_DEPTH = 64,       // branch history table entries. Must be power of 2, 2 ~ 256
+    parameter BHT_GSHARE = 0,       // 1 => gshare, 0 => bimodal
+    parameter RAS_DEPTH = 4,        // return address stack depth. Must be power of 2, 2 ~ 16. 0 => no RAS
     parameter GPIO0_WIDTH = 32,
     parameter GPIO1_WIDTH = 32,
     parameter UART_BAUD_RATE = 115200,
@@ -186,9 +191,14 @@ module veriRISCV_soc #(
         .DCACHE_LINE_SIZE   (DCACHE_LINE_SIZE),
         .DCACHE_DEPTH       (DCACHE_DEPTH),
         .DCACHE_WAYS        (DCACHE_WAYS),
+        .DCACHE_WRITE_BUFFER(DCACHE_WRITE_BUFFER),
     `endif
         .IFQ_DEPTH          (IFQ_DEPTH),
-        .IFQ_AFULL_TH       (IFQ_AFULL_TH))
+        .IFQ_AFULL_TH       (IFQ_AFULL_TH),
+        .BTB_DEPTH          (BTB_DEPTH),
+        .BHT_DEPTH          (BHT_DEPTH),
+        .BHT_GSHARE         (BHT_GSHARE),
+        .RAS_DEPTH          (RAS_DEPTH))
     u_veriRISCV_core(
         .clk,
         .rst(core_rst),
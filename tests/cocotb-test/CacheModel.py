@@ -0,0 +1,361 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Trace driven cache model
+# ------------------------------------------------------------------------------------------------
+
+"""
+Replay a bus access trace (CACHE_TRACE=<file>, see the cache access trace in tb_top) on a grid of
+cache configurations and report the hit rates and an estimate of the memory stall cycles.
+The RTL sweep (CacheSweep.py) is then only needed to confirm the best candidates.
+
+The model follows src/rtl/cache/cache.sv:
+- Address bit 31 = 1 is non-cacheable and bypasses the cache
+- CACHE_LINE_SIZE byte cache line, CACHE_SET_DEPTH sets, CACHE_WAYS ways (1 way: direct mapped, no NRU)
+- NRU replacement: the victim is the lowest way with the nru bit set, the valid bit is not considered.
+  A hit clears the nru bit of the way. If it was the only way with the bit set, the bit of the other ways is set.
+  The line fill does the same to the victim.
+- Write hit sets the dirty bit. A miss on a dirty line pushes the line into the write buffer first.
+- Write miss refills the line, then the write hits the line so the line is dirty after a write miss.
+- The accesses to the line while it is being refilled are hits (they wait for their word at most).
+
+All the configurations are simulated together with NumPy. The accesses of each (configuration, set)
+pair only depend on each other, so the model processes the n-th access of every pair in one vector step.
+
+The trace is captured at the core side of the bus, so it is independent of the cache configuration
+except for the fetches on the wrong path, which depend on the timing of the run.
+The stall estimate uses fixed penalties per memory type (see MEMORY) and is meant to rank the
+configurations, not to predict the cycle count.
+
+Usage:
+    make SRAM=1 MODULE=test_software TESTCASE=coremark CACHE_TRACE=coremark.ctrace
+    python3 CacheModel.py coremark.ctrace -icache-depth 32 64 128 -icache-ways 1 2 4 -memory sram [-csv model.csv]
+    python3 CacheModel.py coremark.ctrace -icache-depth 16 32 64 -icache-ways 2 -icache-line 4 16 32
+"""
+
+import sys
+import csv
+import argparse
+from collections import namedtuple
+
+import numpy as np
+
+# trace line: 'i 0000abcd\n'
+TRACE_LINE = 11
+FETCH, LOAD, STORE = ord('i'), ord('r'), ord('w')
+
+# estimated stall cycles used by the model
+# miss: refill of the critical word, word: each following word of the line (the refill is pipelined),
+# writeback: write back of each word of a dirty line. The word is pushed into the write buffer in one cycle
+# and written into the memory in the background, uncached: an uncached access
+MEMORY = {
+    'sram': {'miss': 3, 'word': 2, 'writeback': 1, 'uncached': 3},
+    'bram': {'miss': 1, 'word': 1, 'writeback': 1, 'uncached': 1},
+}
+
+CacheConfig = namedtuple('CacheConfig', ['cache', 'depth', 'ways', 'line'])
+
+FIELDS = ['cache', 'depth', 'ways', 'line', 'size', 'accesses', 'hits', 'hit_rate', 'read_miss', 'write_miss',
+          'writeback', 'uncached', 'stall']
+
+def readTrace(file):
+    """ Read the trace. Return (kinds, addresses) as arrays """
+    raw = np.fromfile(file, dtype=np.uint8)
+    raw = raw[:len(raw) // TRACE_LINE * TRACE_LINE].reshape(-1, TRACE_LINE)
+    # hex digit lookup, the simulator may write x/z for an undriven address which reads as 0
+    lookup = np.zeros(256, dtype=np.uint32)
+    lookup[np.frombuffer(b'0123456789', dtype=np.uint8)] = np.arange(10)
+    lookup[np.frombuffer(b'abcdef', dtype=np.uint8)] = np.arange(10, 16)
+    lookup[np.frombuffer(b'ABCDEF', dtype=np.uint8)] = np.arange(10, 16)
+    digits = lookup[raw[:, 2:10]]
+    addrs = np.zeros(len(raw), dtype=np.uint32)
+    for i in range(8):
+        addrs = (addrs << np.uint32(4)) | digits[:, i]
+    return raw[:, 0], addrs
+
+class NruCache:
+    """
+    Access by access model of cache.sv for one configuration. Used to check the vectorized model (-verify).
+    """
+
+    def __init__(self, depth, ways, line=4):
+        self.depth = depth
+        self.ways = ways
+        self.line = line
+        self.tags = [[None] * ways for _ in range(depth)]
+        self.dirty = [[False] * ways for _ in range(depth)]
+        self.nru = [[ways > 1] * ways for _ in range(depth)]
+
+    def updateNru(self, s, way):
+        nru = self.nru[s]
+        if self.ways == 1:
+            return
+        allRu = all(nru[i] == (i == way) for i in range(self.ways))
+        for i in range(self.ways):
+            nru[i] = (i != way) if allRu else (nru[i] and i != way)
+
+    def access(self, address, write):
+        """ Return (hit, write back) """
+        line = address // self.line
+        s = line % self.depth
+        tag = line // self.depth
+        if tag in self.tags[s]:
+            way = self.tags[s].index(tag)
+            self.updateNru(s, way)
+            if write:
+                self.dirty[s][way] = True
+            return True, False
+        way = self.nru[s].index(True) if True in self.nru[s] else 0
+        writeback = self.dirty[s][way]
+        self.updateNru(s, way)
+        self.tags[s][way] = tag
+        self.dirty[s][way] = write
+        return False, writeback
+
+def simulate(configs, addrs, writes, maxEntries=1 << 24):
+    """
+        Simulate the cacheable accesses on all the configurations.
+        Return a list of (hits, read misses, write misses, write backs) per configuration.
+        The configurations are simulated in batches of about maxEntries accesses to bound the memory.
+    """
+    addrs = addrs.astype(np.int64)
+    results = [None] * len(configs)
+    batch = []
+    size = 0
+    for i, c in enumerate(configs):
+        streams = compress(c, addrs, writes)
+        batch.append((i, c, streams))
+        size += len(streams[0])
+        if size >= maxEntries or i == len(configs) - 1:
+            for j, result in zip([b[0] for b in batch], simulateBatch(batch)):
+                results[j] = result
+            batch = []
+            size = 0
+    return results
+
+def compress(config, addrs, writes):
+    """
+        Group the accesses by set, in time order within a set, and shorten the runs of accesses to the same line.
+        After the first access of a run, the following ones are hits that do not change the nru bits.
+        They are counted as hits, and a write among them sets the dirty bit at the first access instead.
+        Return (set, tag, write, dirty, extra hits) of the kept accesses. dirty: the run has a write.
+    """
+    lines = addrs >> int(np.log2(config.line))
+    sets = lines & (config.depth - 1)
+    order = np.argsort(sets, kind='stable')
+    sets = sets[order]
+    tags = lines[order] >> int(np.log2(config.depth))
+    write = writes[order]
+    if len(sets) == 0:
+        return sets, tags, write, write, 0
+    newRun = np.ones(len(sets), dtype=bool)
+    newRun[1:] = (sets[1:] != sets[:-1]) | (tags[1:] != tags[:-1])
+    runId = np.cumsum(newRun) - 1
+    dirty = np.bincount(runId, weights=write) > 0
+    return sets[newRun], tags[newRun], write[newRun], dirty, int((~newRun).sum())
+
+def simulateBatch(batch):
+    """ batch: list of (index, config, compressed accesses). Return a list of (hits, read misses, write misses, write backs) """
+    depths = np.array([c.depth for _, c, _ in batch], dtype=np.int64)
+    ways = np.array([c.ways for _, c, _ in batch], dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(depths)[:-1]))
+    W = int(ways.max())
+
+    # a stream is a (configuration, set) pair. The accesses of a stream only depend on each other
+    st = np.concatenate([sets + offsets[i] for i, (_, _, (sets, _, _, _, _)) in enumerate(batch)])
+    tg = np.concatenate([tags for _, _, (_, tags, _, _, _) in batch])
+    wr = np.concatenate([write for _, _, (_, _, write, _, _) in batch])
+    dt = np.concatenate([dirty for _, _, (_, _, _, dirty, _) in batch])
+    config = np.repeat(np.arange(len(batch)), [len(sets) for _, _, (sets, _, _, _, _) in batch])
+    extraHits = np.array([extra for _, _, (_, _, _, _, extra) in batch], dtype=np.int64)
+
+    # rank of each access within its stream. st is sorted since the sets and the offsets are sorted
+    n = len(st)
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(st)) + 1)) if n else np.zeros(0, dtype=np.int64)
+    rank = np.arange(n) - np.repeat(starts, np.diff(np.concatenate((starts, [n]))))
+    # process by rank: each step holds the n-th access of every stream, the streams are distinct
+    order = np.argsort(rank, kind='stable')
+    steps = np.bincount(rank)
+    st, tg, wr, dt, config = st[order], tg[order], wr[order], dt[order], config[order]
+    del order, starts, rank
+
+    # cache state per stream
+    streamConfig = np.repeat(np.arange(len(batch)), depths)
+    mask = (np.arange(W)[None, :] < ways[streamConfig][:, None]) & (ways[streamConfig][:, None] > 1)
+    tags = np.full((len(streamConfig), W), -1, dtype=np.int64)
+    dirty = np.zeros((len(streamConfig), W), dtype=bool)
+    nru = mask.copy()
+
+    hitOut = np.zeros(n, dtype=bool)
+    wbOut = np.zeros(n, dtype=bool)
+    wayIds = np.arange(W)
+    pos = 0
+    for size in steps:
+        sl = slice(pos, pos + size)
+        pos += size
+        s = st[sl]
+        t = tg[sl]
+        rowTag = tags[s]
+        rowNru = nru[s]
+        hitWay = rowTag == t[:, None]
+        hit = hitWay.any(axis=1)
+        miss = ~hit
+        victim = rowNru.argmax(axis=1)
+        way = np.where(hit[:, None], hitWay, wayIds == victim[:, None])
+
+        writeback = miss & dirty[s, victim]
+        allRu = (rowNru == way).all(axis=1)
+        newNru = np.where(allRu[:, None], mask[s] & ~way, rowNru & ~way)
+        nru[s] = newNru
+
+        tags[s[miss], victim[miss]] = t[miss]
+        dirty[s[miss], victim[miss]] = dt[sl][miss]
+        writeHit = hit & dt[sl]
+        dirty[s[writeHit], hitWay[writeHit].argmax(axis=1)] = True
+
+        hitOut[sl] = hit
+        wbOut[sl] = writeback
+
+    count = lambda sel: np.bincount(config[sel], minlength=len(batch))
+    hits = count(hitOut) + extraHits
+    readMiss = count(~hitOut & ~wr)
+    writeMiss = count(~hitOut & wr)
+    writebacks = count(wbOut)
+    return [tuple(int(v[i]) for v in (hits, readMiss, writeMiss, writebacks)) for i in range(len(batch))]
+
+class CacheModel:
+
+    def __init__(self, file, memory='sram', penalty=None):
+        """
+            @param file: the cache access trace
+            @param memory: main memory type, see MEMORY
+            @param penalty: override the stall penalties of the memory. dict of miss/writeback/uncached
+        """
+        self.memory = dict(MEMORY[memory], **(penalty or {}))
+        kinds, addrs = readTrace(file)
+        self.streams = {
+            'icache': (addrs[kinds == FETCH], np.zeros(int((kinds == FETCH).sum()), dtype=bool)),
+            'dcache': (addrs[kinds != FETCH], kinds[kinds != FETCH] == STORE),
+        }
+
+    def cacheable(self, cache):
+        """ Return (addresses, writes) of the cacheable accesses and the number of uncached accesses """
+        addrs, writes = self.streams[cache]
+        cacheable = addrs < np.uint32(0x80000000)
+        return addrs[cacheable], writes[cacheable], int((~cacheable).sum())
+
+    def run(self, configs):
+        """ Return a list of result dicts (see FIELDS) """
+        results = []
+        for cache in ['icache', 'dcache']:
+            group = [c for c in configs if c.cache == cache]
+            if not group:
+                continue
+            addrs, writes, uncached = self.cacheable(cache)
+            cached = [c for c in group if c.depth]
+            stats = dict(zip(cached, simulate(cached, addrs, writes)))
+            for c in group:
+                hits, readMiss, writeMiss, writebacks = stats.get(c, (0, 0, 0, 0))
+                if not c.depth:     # no cache: every access goes to the memory
+                    uncachedAll = uncached + len(addrs)
+                    stall = uncachedAll * self.memory['uncached']
+                else:
+                    uncachedAll = uncached
+                    words = c.line // 4
+                    refill = self.memory['miss'] + (words - 1) * self.memory['word']
+                    stall = (readMiss * refill + writeMiss * (refill + 1) +
+                             writebacks * words * self.memory['writeback'] + uncached * self.memory['uncached'])
+                accesses = len(addrs) if c.depth else 0
+                results.append({
+                    'cache': cache, 'depth': c.depth, 'ways': c.ways if c.depth else 0,
+                    'line': c.line if c.depth else 0,
+                    'size': c.depth * c.ways * c.line, 'accesses': accesses, 'hits': hits,
+                    'hit_rate': hits / accesses if accesses else None,
+                    'read_miss': readMiss, 'write_miss': writeMiss, 'writeback': writebacks,
+                    'uncached': uncachedAll, 'stall': stall,
+                })
+        return results
+
+    def verify(self, configs, count):
+        """ Check the vectorized model against NruCache on the first count accesses. Return True if they match """
+        ok = True
+        for cache in ['icache', 'dcache']:
+            addrs, writes, _ = self.cacheable(cache)
+            addrs, writes = addrs[:count], writes[:count]
+            group = [c for c in configs if c.cache == cache and c.depth]
+            for c, result in zip(group, simulate(group, addrs, writes)):
+                ref = NruCache(c.depth, c.ways, c.line)
+                hits = readMiss = writeMiss = writebacks = 0
+                for address, write in zip(addrs.tolist(), writes.tolist()):
+                    hit, writeback = ref.access(address, write)
+                    hits += hit
+                    readMiss += not hit and not write
+                    writeMiss += not hit and write
+                    writebacks += writeback
+                if result != (hits, readMiss, writeMiss, writebacks):
+                    print(f"MISMATCH {c}: vectorized {result} reference {(hits, readMiss, writeMiss, writebacks)}")
+                    ok = False
+        print(f"Verify: {'PASS' if ok else 'FAIL'}")
+        return ok
+
+def printResults(results):
+    print(f"{'cache':<7} {'depth':>6} {'ways':>5} {'line':>5} {'size':>7} {'accesses':>10} {'hit rate':>9} "
+          f"{'read miss':>10} {'write miss':>11} {'writeback':>10} {'uncached':>9} {'stall':>10}")
+    for r in results:
+        rate = f"{100 * r['hit_rate']:8.2f}%" if r['hit_rate'] is not None else f"{'-':>9}"
+        print(f"{r['cache']:<7} {r['depth']:>6} {r['ways']:>5} {r['line']:>5} {r['size']:>7} {r['accesses']:>10} {rate} "
+              f"{r['read_miss']:>10} {r['write_miss']:>11} {r['writeback']:>10} {r['uncached']:>9} {r['stall']:>10}")
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Replay a cache access trace on a grid of cache configurations')
+    parser.add_argument('trace', type=str, help='The cache access trace (CACHE_TRACE=<file>)')
+    parser.add_argument('-icache-depth', type=int, nargs='+', default=[0, 32, 64, 128, 256], help='I-cache depths. 0: no cache')
+    parser.add_argument('-icache-ways', type=int, nargs='+', default=[1, 2, 4], help='I-cache ways')
+    parser.add_argument('-icache-line', type=int, nargs='+', default=[4], help='I-cache line sizes in bytes')
+    parser.add_argument('-dcache-depth', type=int, nargs='*', default=[], help='D-cache depths. 0: no cache')
+    parser.add_argument('-dcache-ways', type=int, nargs='+', default=[1, 2, 4], help='D-cache ways')
+    parser.add_argument('-dcache-line', type=int, nargs='+', default=[4], help='D-cache line sizes in bytes')
+    parser.add_argument('-memory', type=str, default='sram', choices=MEMORY.keys(), help='Main memory type')
+    parser.add_argument('-miss-penalty', type=int, default=None, help='Stall cycles of the critical word refill')
+    parser.add_argument('-word-penalty', type=int, default=None, help='Stall cycles of each following word of a refill')
+    parser.add_argument('-wb-penalty', type=int, default=None, help='Stall cycles of a dirty word write back')
+    parser.add_argument('-uncached-penalty', type=int, default=None, help='Stall cycles of an uncached access')
+    parser.add_argument('-csv', type=str, default=None, help='Write the results to a csv file')
+    parser.add_argument('-verify', type=int, default=0, help='Check the model against the reference model on the first N accesses')
+    return parser.parse_args()
+
+def configGrid(cache, depths, ways, lines):
+    grid = []
+    for line in lines:
+        if line not in (4, 8, 16, 32, 64):
+            raise ValueError(f"{cache} line size {line} is not supported")
+    for depth in depths:
+        if depth and depth & (depth - 1):
+            raise ValueError(f"{cache} depth {depth} is not a power of 2")
+        grid += [CacheConfig(cache, 0, 1, 4)] if not depth else \
+                [CacheConfig(cache, depth, w, line) for line in lines for w in ways]
+    return grid
+
+if __name__ == "__main__":
+    args = cmdParser()
+    penalty = {name: value for name, value in [('miss', args.miss_penalty), ('word', args.word_penalty),
+                                               ('writeback', args.wb_penalty), ('uncached', args.uncached_penalty)]
+               if value is not None}
+    model = CacheModel(args.trace, args.memory, penalty)
+    configs = configGrid('icache', args.icache_depth, args.icache_ways, args.icache_line) + \
+              configGrid('dcache', args.dcache_depth, args.dcache_ways, args.dcache_line)
+    if args.verify and not model.verify(configs, args.verify):
+        sys.exit(1)
+    results = model.run(configs)
+    printResults(results)
+    if args.csv:
+        with open(args.csv, "w", newline='') as FH:
+            writer = csv.DictWriter(FH, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(results)
@@ -0,0 +1,286 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Cache design space sweep
+# ------------------------------------------------------------------------------------------------
+
+"""
+Sweep the cache parameters of the SoC over a grid and run the software workloads on each configuration.
+
+- One verilator model is built per configuration in its own sim build directory. The builds run in parallel.
+- Each workload runs in its own run directory (sweep/<config>/<workload>). The runs are in parallel too.
+- The result of each run is collected from the UART log (coremark Total ticks, Iterations/Sec)
+  and the performance monitor report (cycles, CPI, cache hit rates).
+- Runs that do not complete (timeout, simulator crash, coremark validation error) are reported as failures.
+- The results are written to sweep.csv and the table in doc/cache_performance.md is regenerated.
+
+A depth of 0 removes the cache. The cache size is depth x ways x line size.
+
+Usage:
+    python3 CacheSweep.py -j 8 -icache-depth 0 32 64 128 -icache-ways 1 2 4 -workload coremark SRAM=1
+    python3 CacheSweep.py -j 8 -icache-depth 64 16 8 -icache-line 4 16 32 -workload coremark SRAM=1
+"""
+
+import os
+import re
+import sys
+import json
+import argparse
+import itertools
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.abspath(os.path.join(TEST_DIR, '../..'))
+MAKEFILE = os.path.join(TEST_DIR, 'makefile')
+DOC = os.path.join(REPO_ROOT, 'doc/cache_performance.md')
+
+WORKLOADS = ['coremark', 'fibonacci', 'hello_riscv']
+
+# coremark report => result field
+COREMARK_PATTERNS = {
+    'ticks':            re.compile(r'Total ticks\s*:\s*(\d+)'),
+    'secs':             re.compile(r'Total time \(secs\)\s*:\s*([\d.]+)'),
+    'iterations_sec':   re.compile(r'Iterations/Sec\s*:\s*([\d.]+)'),
+}
+COREMARK_ERROR = re.compile(r'ERROR|Errors detected')
+
+# the generated table in doc/cache_performance.md is placed between these markers
+TABLE_BEGIN = '<!-- CacheSweep begin -->'
+TABLE_END = '<!-- CacheSweep end -->'
+
+FIELDS = ['config', 'workload', 'status', 'cycles', 'cpi', 'ticks', 'secs', 'iterations_sec',
+          'icache_hit_rate', 'dcache_hit_rate']
+
+class Config:
+    """ One point of the parameter grid """
+
+    def __init__(self, icacheDepth, icacheWays, dcacheDepth, dcacheWays, ifqDepth, icacheLine=4, dcacheLine=4):
+        self.icacheDepth = icacheDepth
+        self.icacheWays = icacheWays
+        self.icacheLine = icacheLine
+        self.dcacheDepth = dcacheDepth
+        self.dcacheWays = dcacheWays
+        self.dcacheLine = dcacheLine
+        self.ifqDepth = ifqDepth
+
+    @property
+    def name(self):
+        icache = f'i{self.icacheDepth}x{self.icacheWays}l{self.icacheLine}' if self.icacheDepth else 'inone'
+        dcache = f'd{self.dcacheDepth}x{self.dcacheWays}l{self.dcacheLine}' if self.dcacheDepth else 'dnone'
+        return f'{icache}_{dcache}_ifq{self.ifqDepth}'
+
+    def makeArgs(self):
+        """ make variables selecting this configuration """
+        params = [f'IFQ_DEPTH={self.ifqDepth}']
+        args = []
+        if self.icacheDepth:
+            params += [f'ICACHE_DEPTH={self.icacheDepth}', f'ICACHE_WAYS={self.icacheWays}',
+                       f'ICACHE_LINE_SIZE={self.icacheLine}']
+        else:
+            args.append('ICACHE=0')
+        if self.dcacheDepth:
+            params += [f'DCACHE_DEPTH={self.dcacheDepth}', f'DCACHE_WAYS={self.dcacheWays}',
+                       f'DCACHE_LINE_SIZE={self.dcacheLine}']
+            args.append('DCACHE=1')
+        return args + [f'PARAMS={" ".join(params)}']
+
+    def cacheSize(self, depth, ways, line):
+        return str(depth * ways * line) if depth else 'No cache'
+
+class CacheSweep:
+
+    def __init__(self, jobs, configs, workloads, timeouts=None, outDir='sweep', csvFile='sweep.csv', makeArgs=None):
+        """
+            @param jobs: number of parallel builds and simulator processes
+            @param configs: list of Config to sweep
+            @param workloads: software workloads in sdk/software
+            @param timeouts: workload => timeout in us. Default to the timeout in test_software.py
+            @param outDir: directory holding the build and run directories of each configuration
+            @param csvFile: the result file
+            @param makeArgs: extra make variables. Example: ['SRAM=1']
+        """
+        self.jobs = jobs
+        self.configs = configs
+        self.workloads = workloads
+        self.timeouts = timeouts or {}
+        self.outDir = os.path.join(TEST_DIR, outDir)
+        self.csvFile = os.path.join(TEST_DIR, csvFile)
+        self.makeArgs = makeArgs or []
+
+    def makeCmd(self, config, *args):
+        simBuild = os.path.join(self.outDir, config.name, 'sim_build')
+        return ['make', '-f', MAKEFILE, f'SIM_BUILD={simBuild}'] + self.makeArgs + config.makeArgs() + list(args)
+
+    def build(self, config):
+        """ Build the verilator model of a configuration. Return True if the build passed """
+        configDir = os.path.join(self.outDir, config.name)
+        os.makedirs(configDir, exist_ok=True)
+        simBuild = os.path.join(configDir, 'sim_build')
+        with open(os.path.join(configDir, 'build.log'), 'w') as LOG:
+            proc = subprocess.run(self.makeCmd(config, f'{simBuild}/Vtop'), cwd=TEST_DIR, stdout=LOG,
+                                  stderr=subprocess.STDOUT)
+        print(f"Build {config.name}: {'PASS' if proc.returncode == 0 else 'FAIL'}")
+        return proc.returncode == 0
+
+    def runWorkload(self, config, workload):
+        """ Run a workload on a configuration and collect the result """
+        runDir = os.path.join(self.outDir, config.name, workload)
+        os.makedirs(runDir, exist_ok=True)
+        for file in ['uart.log', f'{workload}.perf.json']:
+            if os.path.exists(os.path.join(runDir, file)):
+                os.remove(os.path.join(runDir, file))
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [TEST_DIR, env.get('PYTHONPATH')]))
+        cmd = self.makeCmd(config, 'MODULE=test_software', f'TESTCASE={workload}')
+        if workload in self.timeouts:
+            cmd.append(f'SOFTWARE_TIMEOUT={self.timeouts[workload]}')
+        with open(os.path.join(runDir, 'sim.log'), 'w') as LOG:
+            subprocess.run(cmd, cwd=runDir, env=env, stdout=LOG, stderr=subprocess.STDOUT)
+        result = self.collect(runDir, workload)
+        result['config'] = config
+        result['workload'] = workload
+        print(f"Run {config.name}/{workload}: {result['status']}")
+        return result
+
+    def collect(self, runDir, workload):
+        """ Collect the result of a run from the perf report and the UART log """
+        result = {'status': 'PASS'}
+        perfFile = os.path.join(runDir, f'{workload}.perf.json')
+        if not os.path.exists(perfFile):
+            result['status'] = 'CRASH'
+            return result
+        with open(perfFile, 'r') as FH:
+            perf = json.load(FH)
+        result['cycles'] = perf['counters']['cycles']
+        result['cpi'] = perf['cpi']
+        result['icache_hit_rate'] = perf['icache_hit_rate']
+        result['dcache_hit_rate'] = perf['dcache_hit_rate']
+        if not perf.get('finished', True):
+            result['status'] = 'TIMEOUT'
+        uartLog = os.path.join(runDir, 'uart.log')
+        uart = open(uartLog, 'r', errors='replace').read() if os.path.exists(uartLog) else ''
+        if workload == 'coremark':
+            for field, pattern in COREMARK_PATTERNS.items():
+                match = pattern.search(uart)
+                result[field] = float(match.group(1)) if match else None
+            if result['status'] == 'PASS' and (COREMARK_ERROR.search(uart) or result['ticks'] is None):
+                result['status'] = 'ERROR'
+        return result
+
+    def run(self):
+        os.makedirs(self.outDir, exist_ok=True)
+        print(f"Building {len(self.configs)} configurations...")
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            built = list(pool.map(self.build, self.configs))
+        runs = []
+        for config, ok in zip(self.configs, built):
+            runs += [(config, workload, ok) for workload in self.workloads]
+        print(f"Running {len(runs)} workloads...")
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(lambda r: self.runWorkload(r[0], r[1]) if r[2] else
+                                    {'config': r[0], 'workload': r[1], 'status': 'BUILD FAIL'}, runs))
+        self.writeCsv(results)
+        self.writeTable(results)
+        failed = [r for r in results if r['status'] != 'PASS']
+        for r in failed:
+            print(f"FAILED: {r['config'].name}/{r['workload']}: {r['status']}")
+        print(f"PASS: {len(results) - len(failed)}, FAIL: {len(failed)}")
+        return len(failed) == 0
+
+    def writeCsv(self, results):
+        with open(self.csvFile, 'w') as FH:
+            FH.write(",".join(FIELDS) + "\n")
+            for r in results:
+                row = [r['config'].name] + [fmt(r.get(field)) for field in FIELDS[1:]]
+                FH.write(",".join(row) + "\n")
+        print(f"Results written to {self.csvFile}")
+
+    def writeTable(self, results):
+        """ Regenerate the sweep table in doc/cache_performance.md """
+        lines = [TABLE_BEGIN, '',
+                 '## Cache Sweep', '',
+                 f'- Generated by tests/cocotb-test/CacheSweep.py. Options: {" ".join(self.makeArgs) or "default"}',
+                 '- Hit rates are from the simulation performance monitor', '',
+                 '| Workload | I-Cache Size (Bytes) | I-Ways | I-Line | D-Cache Size (Bytes) | D-Ways | D-Line | IFQ Depth | '
+                 'Cycles | CPI | Total ticks | Iterations/Sec | I-Cache Hit | D-Cache Hit | Status |',
+                 '| :------: |' + ' :---: |' * 14]
+        for r in sorted(results, key=lambda r: self.workloads.index(r['workload'])):
+            c = r['config']
+            row = [r['workload'],
+                   c.cacheSize(c.icacheDepth, c.icacheWays, c.icacheLine),
+                   str(c.icacheWays) if c.icacheDepth else 'x', str(c.icacheLine) if c.icacheDepth else 'x',
+                   c.cacheSize(c.dcacheDepth, c.dcacheWays, c.dcacheLine),
+                   str(c.dcacheWays) if c.dcacheDepth else 'x', str(c.dcacheLine) if c.dcacheDepth else 'x',
+                   str(c.ifqDepth), fmt(r.get('cycles')), fmt(r.get('cpi'), '.3f'), fmt(r.get('ticks')),
+                   fmt(r.get('iterations_sec')), pct(r.get('icache_hit_rate')), pct(r.get('dcache_hit_rate')),
+                   r['status']]
+            lines.append('| ' + ' | '.join(row) + ' |')
+        lines += ['', TABLE_END]
+        table = "\n".join(lines)
+        content = open(DOC, 'r').read()
+        if TABLE_BEGIN in content and TABLE_END in content:
+            begin = content.index(TABLE_BEGIN)
+            end = content.index(TABLE_END) + len(TABLE_END)
+            content = content[:begin] + table + content[end:]
+        else:
+            content = content.rstrip('\n') + '\n\n' + table + '\n'
+        with open(DOC, 'w') as FH:
+            FH.write(content)
+        print(f"Table regenerated in {DOC}")
+
+def fmt(value, spec='g'):
+    if value is None:
+        return ''
+    if isinstance(value, str):
+        return value
+    if isinstance(value, float) and value.is_integer() and spec == 'g':
+        return str(int(value))
+    return format(value, spec)
+
+def pct(value):
+    return '' if value is None else f'{value * 100:.2f}%'
+
+def cmdParser():
+    # make variables (upper case NAME=value) can be mixed with the grid options
+    makeVar = re.compile(r'^[A-Z_][A-Z0-9_]*=')
+    argv = [arg for arg in sys.argv[1:] if not makeVar.match(arg)]
+    makeArgs = [arg for arg in sys.argv[1:] if makeVar.match(arg)]
+    parser = argparse.ArgumentParser(description='Sweep the cache parameters and run the software workloads')
+    parser.add_argument('-jobs', '-j', type=int, default=os.cpu_count(), help='Number of parallel builds and runs')
+    parser.add_argument('-icache-depth', type=int, nargs='+', default=[64], help='I-cache set depth. 0 => no cache')
+    parser.add_argument('-icache-ways', type=int, nargs='+', default=[2], help='I-cache ways')
+    parser.add_argument('-icache-line', type=int, nargs='+', default=[4], help='I-cache line size in bytes')
+    parser.add_argument('-dcache-depth', type=int, nargs='+', default=[0], help='D-cache set depth. 0 => no cache')
+    parser.add_argument('-dcache-ways', type=int, nargs='+', default=[1], help='D-cache ways')
+    parser.add_argument('-dcache-line', type=int, nargs='+', default=[4], help='D-cache line size in bytes')
+    parser.add_argument('-ifq-depth', type=int, nargs='+', default=[16], help='Instruction fetch queue depth')
+    parser.add_argument('-workload', '-w', type=str, nargs='+', default=WORKLOADS, help='Software workloads')
+    parser.epilog = 'Extra make variables can be appended. Example: SRAM=1'
+    parser.add_argument('-timeout', type=str, nargs='*', default=[], help='Workload timeout in us. Example: coremark=50000')
+    args = parser.parse_args(argv)
+    args.makeArgs = makeArgs
+    return args
+
+def buildGrid(args):
+    """ Build the configuration grid. The ways and line sizes are not swept when the cache is removed """
+    configs = {}
+    for idepth, iways, iline, ddepth, dways, dline, ifq in itertools.product(
+            args.icache_depth, args.icache_ways, args.icache_line,
+            args.dcache_depth, args.dcache_ways, args.dcache_line, args.ifq_depth):
+        config = Config(idepth, iways if idepth else 1, ddepth, dways if ddepth else 1, ifq,
+                        iline if idepth else 4, dline if ddepth else 4)
+        configs.setdefault(config.name, config)
+    return list(configs.values())
+
+if __name__ == "__main__":
+    args = cmdParser()
+    timeouts = dict(t.split('=') for t in args.timeout)
+    sweep = CacheSweep(args.jobs, buildGrid(args), args.workload, timeouts, makeArgs=args.makeArgs)
+    sys.exit(0 if sweep.run() else 1)
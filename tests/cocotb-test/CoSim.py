@@ -0,0 +1,135 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Lockstep co-simulation against the RV32IM reference model
+# ------------------------------------------------------------------------------------------------
+
+"""
+Each instruction leaving the WB stage (see the co-simulation monitor in tb_top) is compared with the
+instruction executed by the reference model (RV32Model.py):
+- pc
+- exception and exception cause
+- destination register and the write back value
+
+Interrupts are asynchronous, so the model takes an interrupt when the design takes it.
+The register file is not reset, so the model starts from the design register file at the reset release
+(in batch mode the registers keep the values of the previous test).
+The values the model can not predict (IO loads, mcycle, mip) are taken from the design.
+
+The co-simulation is enabled with COSIM=1. It stops comparing at the first mismatch and sets the
+mismatch event so the test can end early. The mismatch is raised by stop() with the last instructions
+executed, after the test has torn down its monitors.
+"""
+
+import logging
+from collections import deque
+
+import cocotb
+from cocotb.triggers import Edge, Event, FallingEdge
+
+from RV32Model import RV32Model
+
+class CoSimError(Exception):
+    pass
+
+class CoSim:
+
+    def __init__(self, dut, segments, history=16):
+        """
+            @param dut: the tb_top
+            @param segments: the program loaded to memory. list of (address, bytes)
+            @param history: number of instructions reported before a mismatch
+        """
+        self._log = logging.getLogger("cocotb.CoSim")
+        self.dut = dut
+        self.model = RV32Model()
+        self.model.load(segments)
+        self.history = deque(maxlen=history)
+        self.retired = 0
+        self.error = None
+        self.task = None
+        self.mismatch = Event("cosim_mismatch")
+
+    def start(self):
+        """ Start the monitor. Call before the reset is released """
+        self.task = cocotb.fork(self.monitor())
+
+    def stop(self):
+        """ Stop the monitor and raise the mismatch if there is one """
+        if self.task:
+            self.task.kill()
+            self.task = None
+        self._log.info(f"Co-simulation compared {self.retired} instructions")
+        if self.error:
+            raise CoSimError(self.error)
+
+    def syncRegisters(self):
+        """ Copy the design register file into the model """
+        regfile = self.dut.u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.register_file
+        for i in range(1, 32):
+            value = regfile[i].value
+            self.model.regs[i] = value.integer if value.is_resolvable else 0
+
+    async def monitor(self):
+        dut = self.dut
+        await FallingEdge(dut.rst)
+        self.syncRegisters()
+        while True:
+            await Edge(dut.cosim_seq)
+            if dut.rst.value.integer:
+                continue
+            if dut.cosim_retire.value.integer:
+                self.compare()
+            if self.error:
+                # an exception in a forked task fails the whole test, so only record the mismatch here
+                self._log.error(self.error)
+                self.mismatch.set()
+                return
+            if dut.cosim_interrupt.value.integer:
+                self.model.interrupt(dut.cosim_cause.value.integer)
+                self.history.append(f"interrupt {dut.cosim_cause.value.integer} => pc {hex(self.model.pc)}")
+
+    def compare(self):
+        """ Execute one instruction in the model and compare it with the instruction retired by the design """
+        dut = self.dut
+        pc = dut.cosim_pc.value.integer
+        instruction = dut.cosim_instruction.value.integer
+        exception = dut.cosim_exception.value.integer
+        regWrite = dut.cosim_reg_write.value.integer
+        regid = dut.cosim_reg_regid.value.integer
+        writedata = dut.cosim_reg_writedata.value.integer
+        retire = self.model.step()
+        self.retired += 1
+        self.history.append(f"pc {hex(pc)} instr {instruction:08x} " +
+                            (f"exception {dut.cosim_cause.value.integer}" if exception else
+                             f"x{regid} <= {hex(writedata)}" if regWrite and regid else ""))
+
+        mismatch = []
+        if retire.pc != pc:
+            mismatch.append(f"pc: expected {hex(retire.pc)} actual {hex(pc)}")
+        elif retire.exception != bool(exception):
+            mismatch.append(f"exception: expected {retire.exception} actual {bool(exception)}")
+        elif exception:
+            cause = dut.cosim_cause.value.integer
+            if retire.cause != cause:
+                mismatch.append(f"exception cause: expected {retire.cause} actual {cause}")
+        else:
+            rd = retire.rd
+            actualRd = regid if regWrite else 0
+            if rd != actualRd:
+                mismatch.append(f"rd: expected x{rd} actual x{actualRd}")
+            elif rd:
+                if retire.value is None:
+                    self.model.regs[rd] = writedata
+                elif retire.value != writedata:
+                    mismatch.append(f"x{rd}: expected {hex(retire.value)} actual {hex(writedata)}")
+
+        if mismatch:
+            self.error = f"Co-simulation mismatch at instruction {self.retired}, pc {hex(pc)}, " \
+                         f"instruction {instruction:08x}: " + ", ".join(mismatch) + \
+                         "\nLast instructions:\n" + "\n".join(self.history)
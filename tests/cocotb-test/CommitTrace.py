@@ -0,0 +1,91 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Instruction commit trace
+# ------------------------------------------------------------------------------------------------
+
+"""
+Record each instruction leaving the WB stage and each interrupt taken (see the co-simulation
+monitor in tb_top) into <test>.trace. The records are packed into a buffer and written to the
+file in large chunks so the tracer does not slow down the simulation much.
+The trace format is defined in TraceAnalyzer.py, which also analyzes the trace offline.
+
+The trace is enabled with TRACE=1 (all tests) or TRACE=test1,test2 (the listed tests only).
+"""
+
+import logging
+
+import cocotb
+from cocotb.triggers import Edge
+
+from TraceAnalyzer import MAGIC, VERSION, HEADER, RECORD, FLAG_RETIRE, FLAG_REG_WRITE, FLAG_EXCEPTION, FLAG_INTERRUPT
+
+class CommitTrace:
+
+    def __init__(self, dut, file, flush=65536):
+        """
+            @param dut: the tb_top
+            @param file: the trace file
+            @param flush: number of records buffered before writing to the file
+        """
+        self._log = logging.getLogger("cocotb.CommitTrace")
+        self.dut = dut
+        self.file = file
+        self.flushSize = flush * RECORD.size
+        self.buffer = bytearray()
+        self.records = 0
+        self.task = None
+        self.FH = None
+
+    def start(self):
+        """ Open the trace file and start the monitor. Call before the reset is released """
+        self.FH = open(self.file, "wb")
+        self.FH.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self.task = cocotb.fork(self.monitor())
+
+    def stop(self):
+        """ Stop the monitor and write the remaining records """
+        if self.task:
+            self.task.kill()
+            self.task = None
+        if self.FH:
+            self.flush()
+            self.FH.close()
+            self.FH = None
+        self._log.info(f"Commit trace: {self.records} records written to {self.file}")
+
+    def flush(self):
+        self.FH.write(self.buffer)
+        self.buffer = bytearray()
+
+    async def monitor(self):
+        dut = self.dut
+        # resolve the handles once, the lookup is expensive compared to the value read
+        rst = dut.rst
+        retire = dut.cosim_retire
+        exception = dut.cosim_exception
+        regWrite = dut.cosim_reg_write
+        interrupt = dut.cosim_interrupt
+        pc = dut.cosim_pc
+        instruction = dut.cosim_instruction
+        regid = dut.cosim_reg_regid
+        writedata = dut.cosim_reg_writedata
+        address = dut.cosim_mem_address
+        cycle = dut.cosim_cycle
+        pack = RECORD.pack
+        while True:
+            await Edge(dut.cosim_seq)
+            if rst.value.integer:
+                continue
+            flags = (FLAG_RETIRE * retire.value.integer) | (FLAG_REG_WRITE * regWrite.value.integer) | \
+                    (FLAG_EXCEPTION * exception.value.integer) | (FLAG_INTERRUPT * interrupt.value.integer)
+            self.buffer += pack(pc.value.integer, instruction.value.integer, writedata.value.integer,
+                                address.value.integer, cycle.value.integer, regid.value.integer, flags)
+            self.records += 1
+            if len(self.buffer) >= self.flushSize:
+                self.flush()
@@ -0,0 +1,269 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Merge, report and rank the per-test verilator coverage
+# ------------------------------------------------------------------------------------------------
+
+"""
+With COVR=1 each test writes its own coverage file coverage/<test>.dat in its run directory
+(see the per test coverage in tb_top). This script keeps a coverage database (coverage_db):
+
+- index.json:   all the coverage points seen so far, the merged hit counts and, for each test,
+                the source file it was merged from and the bitmap of the points it covers
+- merged.dat:   the merged coverage in verilator format, for verilator_coverage --annotate
+
+Merging is incremental: a test file already merged with the same modification time is skipped,
+so merging after a partial re-run only parses the tests that ran. A re-merged test replaces the
+covered bitmap of the test. The hit counts are only ever added up, a point is reported as covered
+when at least one test covers it.
+
+Report: line/toggle/branch coverage per module of src/rtl/core, src/rtl/cache and src/rtl/ip.
+Rank:   greedy ranking of the tests by the new points each adds to the tests ranked before it,
+        with the points only covered by that test. The smoke subset is the shortest prefix of the
+        ranking reaching -target of the total coverage.
+
+Usage:
+    make parallel COVR=1
+    python3 Coverage.py -merge regression coverage -report -rank [-target 0.95]
+    verilator_coverage --annotate annotated coverage_db/merged.dat
+"""
+
+import os
+import json
+import argparse
+from collections import defaultdict
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# coverage file header written by verilator
+DAT_HEADER = "# SystemC::Coverage-3\n"
+
+# reported rtl directories
+CATEGORIES = {'core': 'src/rtl/core/', 'cache': 'src/rtl/cache/', 'ip': 'src/rtl/ip/'}
+
+# verilator coverage types
+TYPES = ['line', 'toggle', 'branch']
+
+def popcount(x):
+    return bin(x).count('1')
+
+def readDat(file):
+    """ Read a verilator coverage file. Return a list of (point key, count) """
+    points = []
+    with open(file, "r", errors="surrogateescape") as FH:
+        for line in FH:
+            if not line.startswith("C '"):
+                continue
+            end = line.rindex("'")
+            points.append((line[3:end], int(line[end + 1:])))
+    return points
+
+def parseKey(key):
+    """ The fields of a point key: \\x01name\\x02value... """
+    fields = {}
+    for field in key.split('\x01'):
+        name, _, value = field.partition('\x02')
+        if name:
+            fields[name] = value
+    return fields
+
+def pointInfo(key):
+    """ Return (category, module, type) of a coverage point. category is None outside of the reported rtl """
+    fields = parseKey(key)
+    page = fields.get('page', '')
+    kind, _, module = page.partition('/')
+    kind = kind[2:] if kind.startswith('v_') else kind
+    file = fields.get('f', '').replace('\\', '/')
+    category = next((name for name, path in CATEGORIES.items() if path in file), None)
+    module = module or os.path.splitext(os.path.basename(file))[0]
+    return category, module, kind
+
+class CoverageDB:
+
+    def __init__(self, dbDir='coverage_db'):
+        """
+            @param dbDir: the coverage database directory
+        """
+        self.dbDir = os.path.join(TEST_DIR, dbDir)
+        self.indexFile = os.path.join(self.dbDir, 'index.json')
+        self.mergedFile = os.path.join(self.dbDir, 'merged.dat')
+        self.points = []        # point keys
+        self.pointId = {}       # point key => index
+        self.counts = []        # merged hit count of each point
+        self.tests = {}         # test => {'source', 'mtime', 'covered'}, covered is a bitmap int
+        self.load()
+
+    def load(self):
+        if not os.path.exists(self.indexFile):
+            return
+        with open(self.indexFile, "r") as FH:
+            index = json.load(FH)
+        self.points = index['points']
+        self.pointId = {key: i for i, key in enumerate(self.points)}
+        self.counts = index['counts']
+        self.tests = {name: dict(test, covered=int(test['covered'], 16)) for name, test in index['tests'].items()}
+
+    def save(self):
+        os.makedirs(self.dbDir, exist_ok=True)
+        index = {
+            'points': self.points,
+            'counts': self.counts,
+            'tests': {name: dict(test, covered=hex(test['covered'])) for name, test in self.tests.items()},
+        }
+        tmp = self.indexFile + '.tmp'
+        with open(tmp, "w") as FH:
+            json.dump(index, FH)
+        os.replace(tmp, self.indexFile)
+        covered = self.covered()
+        with open(self.mergedFile, "w", errors="surrogateescape") as FH:
+            FH.write(DAT_HEADER)
+            for i, key in enumerate(self.points):
+                FH.write(f"C '{key}' {self.counts[i] if covered >> i & 1 else 0}\n")
+
+    def findFiles(self, paths):
+        """ The per-test coverage files: <path>/**/coverage/<test>.dat or the files given directly """
+        files = []
+        for path in paths:
+            if os.path.isfile(path):
+                files.append(path)
+                continue
+            for root, _, names in os.walk(path):
+                if os.path.basename(root) == 'coverage':
+                    files += [os.path.join(root, name) for name in sorted(names) if name.endswith('.dat')]
+        return files
+
+    def mergeFile(self, file):
+        """ Merge one test coverage file. Return the test name, or None if it is already merged """
+        name = os.path.splitext(os.path.basename(file))[0]
+        source = os.path.abspath(file)
+        mtime = os.stat(file).st_mtime_ns
+        test = self.tests.get(name)
+        if test and test['source'] == source and test['mtime'] == mtime:
+            return None
+        bitmap = bytearray((len(self.points) + 8) // 8)
+        for key, count in readDat(file):
+            i = self.pointId.get(key)
+            if i is None:
+                i = len(self.points)
+                self.pointId[key] = i
+                self.points.append(key)
+                self.counts.append(0)
+                if i // 8 >= len(bitmap):
+                    bitmap.extend(bytes(i // 8 - len(bitmap) + 1))
+            self.counts[i] += count
+            if count:
+                bitmap[i // 8] |= 1 << (i % 8)
+        self.tests[name] = {'source': source, 'mtime': mtime, 'covered': int.from_bytes(bitmap, 'little')}
+        return name
+
+    def merge(self, paths):
+        """ Merge the new or updated test coverage files found in paths. Return the merged tests """
+        merged = [name for name in map(self.mergeFile, self.findFiles(paths)) if name]
+        if merged:
+            self.save()
+        print(f"Merged {len(merged)} tests into {self.dbDir} ({len(self.tests)} tests, {len(self.points)} points)")
+        return merged
+
+    def covered(self):
+        covered = 0
+        for test in self.tests.values():
+            covered |= test['covered']
+        return covered
+
+    def summary(self):
+        """ Return {category: {module: {type: [covered, total]}}} """
+        covered = self.covered()
+        summary = defaultdict(lambda: defaultdict(lambda: {kind: [0, 0] for kind in TYPES}))
+        for i, key in enumerate(self.points):
+            category, module, kind = pointInfo(key)
+            if category is None or kind not in TYPES:
+                continue
+            stats = summary[category][module][kind]
+            stats[0] += covered >> i & 1
+            stats[1] += 1
+        return summary
+
+    def report(self, jsonFile=None):
+        summary = self.summary()
+        fmt = lambda s: f"{100 * s[0] / s[1]:6.2f}% {s[0]:>6}/{s[1]:<6}" if s[1] else f"{'-':>7} {'':>13}"
+        header = f"{'module':<32}" + "".join(f"{kind:>22}" for kind in TYPES)
+        for category in CATEGORIES:
+            modules = summary.get(category)
+            if not modules:
+                continue
+            total = {kind: [sum(m[kind][0] for m in modules.values()), sum(m[kind][1] for m in modules.values())]
+                     for kind in TYPES}
+            print(f"\n{category} ({CATEGORIES[category]})")
+            print(header)
+            for module in sorted(modules):
+                print(f"{module:<32}" + "".join(f"{fmt(modules[module][kind]):>22}" for kind in TYPES))
+            print(f"{'total':<32}" + "".join(f"{fmt(total[kind]):>22}" for kind in TYPES))
+        if jsonFile:
+            with open(jsonFile, "w") as FH:
+                json.dump(summary, FH, indent=2)
+
+    def rank(self, target=0.95):
+        """
+            Greedy ranking of the tests by the new points each adds.
+            Return a list of (test, new points, cumulative points, unique points) and the smoke subset.
+        """
+        once = twice = 0
+        for test in self.tests.values():
+            twice |= once & test['covered']
+            once |= test['covered']
+        unique = once & ~twice
+        total = popcount(once)
+
+        remaining = {name: test['covered'] for name, test in self.tests.items()}
+        covered = 0
+        ranking = []
+        while remaining:
+            gain, name = max((popcount(mask & ~covered), name) for name, mask in remaining.items())
+            if gain == 0:
+                break
+            covered |= remaining.pop(name)
+            ranking.append((name, gain, popcount(covered), popcount(self.tests[name]['covered'] & unique)))
+        ranking += [(name, 0, popcount(covered), popcount(mask & unique)) for name, mask in sorted(remaining.items())]
+
+        smoke = []
+        for name, gain, cumulative, _ in ranking:
+            if gain == 0 or (smoke and cumulative - gain >= target * total):
+                break
+            smoke.append(name)
+        return ranking, smoke, total
+
+    def printRank(self, target=0.95):
+        ranking, smoke, total = self.rank(target)
+        print(f"\n{'rank':>4} {'test':<40} {'new':>8} {'cumulative':>18} {'unique':>8}")
+        for i, (name, gain, cumulative, unique) in enumerate(ranking):
+            percent = 100 * cumulative / total if total else 0
+            print(f"{i + 1:>4} {name:<40} {gain:>8} {cumulative:>10} {percent:6.2f}% {unique:>8}")
+        covered = ranking[len(smoke) - 1][2] if smoke else 0
+        print(f"\nSmoke subset: {len(smoke)} of {len(ranking)} tests cover {covered} of {total} points")
+        print(f"    python3 RunTests.py -t {' '.join(smoke)}")
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Merge, report and rank the per-test verilator coverage')
+    parser.add_argument('-db', type=str, default='coverage_db', help='The coverage database directory')
+    parser.add_argument('-merge', type=str, nargs='*', default=[], help='Directories or files holding the test coverage')
+    parser.add_argument('-report', action='store_true', help='Report the coverage per module')
+    parser.add_argument('-json', type=str, default=None, help='Write the per module coverage as json')
+    parser.add_argument('-rank', action='store_true', help='Rank the tests by their coverage contribution')
+    parser.add_argument('-target', type=float, default=0.95, help='Coverage ratio reached by the smoke subset')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = cmdParser()
+    db = CoverageDB(args.db)
+    if args.merge:
+        db.merge(args.merge)
+    if args.report or args.json:
+        db.report(args.json)
+    if args.rank:
+        db.printRank(args.target)
@@ -0,0 +1,91 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Read the code symbols from the program ELF file
+# ------------------------------------------------------------------------------------------------
+
+"""
+Minimal ELF32 little endian symbol table reader, so the trace and profile tools do not need
+the toolchain or an ELF library. Only the functions and the labels in the executable sections
+are kept. An address is mapped to the closest symbol at or below it.
+"""
+
+import os
+import re
+import bisect
+import struct
+
+ELF_HEADER = struct.Struct('<16sHHIIIIIHHHHHH')
+SECTION_HEADER = struct.Struct('<IIIIIIIIII')
+SYMBOL = struct.Struct('<IIIBBH')
+
+SHT_SYMTAB = 2
+SHF_EXECINSTR = 0x4
+STT_NOTYPE, STT_FUNC = 0, 2
+
+class ElfSymbols:
+
+    def __init__(self, file):
+        """
+            @param file: the ELF file
+        """
+        self.file = file
+        self.symbols = self.load(file)
+        self.addrs = [addr for addr, _, _ in self.symbols]
+
+    def load(self, file):
+        """ Return a sorted list of (address, size, name) """
+        with open(file, "rb") as FH:
+            elf = FH.read()
+        ident = ELF_HEADER.unpack_from(elf)
+        if ident[0][:4] != b'\x7fELF' or ident[0][4] != 1 or ident[0][5] != 1:
+            raise ValueError(f"{file} is not an ELF32 little endian file")
+        shoff, shentsize, shnum = ident[6], ident[11], ident[12]
+        sections = [SECTION_HEADER.unpack_from(elf, shoff + i * shentsize) for i in range(shnum)]
+        symbols = {}
+        for _, shtype, _, _, offset, size, link, _, _, entsize in sections:
+            if shtype != SHT_SYMTAB:
+                continue
+            strtab = sections[link][4]
+            for i in range(0, size, entsize):
+                name, value, symSize, info, _, shndx = SYMBOL.unpack_from(elf, offset + i)
+                if info & 0xF not in (STT_NOTYPE, STT_FUNC) or not name or shndx >= len(sections):
+                    continue
+                if not sections[shndx][2] & SHF_EXECINSTR:
+                    continue
+                end = elf.index(b'\0', strtab + name)
+                symName = elf[strtab + name:end].decode(errors='replace')
+                # prefer the function over the labels at the same address
+                if value not in symbols or info & 0xF == STT_FUNC:
+                    symbols[value] = (value, symSize, symName)
+        return sorted(symbols.values())
+
+    def lookup(self, addr):
+        """ Return (name, offset) of the symbol containing addr. (None, addr) if there is no symbol below """
+        i = bisect.bisect_right(self.addrs, addr) - 1
+        if i < 0:
+            return None, addr
+        base, _, name = self.symbols[i]
+        return name, addr - base
+
+    def function(self, addr):
+        """ Name of the symbol containing addr, or the address in hex """
+        name, _ = self.lookup(addr)
+        return name or hex(addr)
+
+    def label(self, addr):
+        """ addr as symbol+offset """
+        name, offset = self.lookup(addr)
+        if name is None:
+            return hex(addr)
+        return f"{name}+{hex(offset)}" if offset else name
+
+def elfFromImage(ramFile):
+    """ The ELF file next to a .verilog image: prog.verilog => prog, test.elf.verilog => test.elf. None if not found """
+    elf = re.sub(r'\.verilog$', '', ramFile)
+    return elf if elf != ramFile and os.path.isfile(elf) else None
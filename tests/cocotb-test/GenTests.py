@@ -9,6 +9,7 @@
 # Generate test function for riscv-tests
 # ------------------------------------------------------------------------------------------------
 
+import re
 from datetime import date
 
 HEADER = \
@@ -26,6 +27,32 @@ from env import riscv_tests, riscv_arch_test, sanity_test, dedicated_tests
 import cocotb
 """
 
+BATCH_HEADER = \
+f"""
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: {date.today()}
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Batch mode: run all the tests back to back in one simulation
+# ------------------------------------------------------------------------------------------------
+
+from env import batch_tests, riscv_tests_env, riscv_arch_test_env, sanity_test_env, dedicated_tests_env
+import cocotb
+
+@cocotb.test()
+async def batch(dut):
+    envs = []
+"""
+
+BATCH_FOOTER = \
+"""
+    await batch_tests(dut, envs)
+"""
+
 # SANITY TEST
 sanity_test = ['logic_simple', 'logic_forward', 'load_store', 'branch', 'lui_auipc', 'load_stall', 'jal_jalr']
 
@@ -34,7 +61,7 @@ riscv_tests__rv32ui_p = [
 'jal', 'jalr', 'beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu', 'lui', 'auipc',
 'addi', 'slti', 'sltiu', 'xori', 'ori', 'andi', 'slli', 'srli', 'srai',
 'add', 'sub', 'sll', 'slt', 'sltu', 'xor', 'srl', 'sra', 'or', 'and',
-'lb', 'lbu', 'lh', 'lhu', 'lw', 'sb', 'sh', 'sw'
+'lb', 'lbu', 'lh', 'lhu', 'lw', 'sb', 'sh', 'sw', 'fence_i'
 ]
 riscv_tests__rv32mi_p = ['mcsr', 'csr', 'illegal', 'ma_addr']
 riscv_tests__rv32um_p = ['mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu']
@@ -100,42 +127,87 @@ async def dedicated_tests_{name}(dut):
     return func
 
 
-def gen_tests():
-    OUTPUT = 'tests.py'
-    FH = open(OUTPUT, "w")
-    FH.write(HEADER)
+def gen_tests(output='tests.py', write=True):
+    """
+        Generate the test functions into the output file.
+        Return the name of the generated test functions in order.
+        If write is False, only the test names are returned.
+    """
+    content = HEADER
 
     if GEN_SANITY_TEST:
-        FH.write("\n# sanity Test\n")
+        content += "\n# sanity Test\n"
         for test in sanity_test:
-            FH.write(gen_sanity_tests(test))
+            content += gen_sanity_tests(test)
 
     if GEN_RISCV_TESTS:
-        FH.write("\n# riscv-tests Test\n")
+        content += "\n# riscv-tests Test\n"
         for test in riscv_tests__rv32ui_p:
             name = f"rv32ui-p-{test}"
-            FH.write(gen_riscv_tests(name, test))
+            content += gen_riscv_tests(name, test)
         for test in riscv_tests__rv32mi_p:
             name = f"rv32mi-p-{test}"
-            FH.write(gen_riscv_tests(name, test))
+            content += gen_riscv_tests(name, test)
         for test in riscv_tests__rv32um_p:
             name = f"rv32um-p-{test}"
-            FH.write(gen_riscv_tests(name, test))
+            content += gen_riscv_tests(name, test)
 
     if GEN_RISCV_ARCH_TEST:
-        FH.write("\n# riscv-arch-test Test\n")
+        content += "\n# riscv-arch-test Test\n"
         for test in riscv_arch_test__rv32i_m_i_instruction:
-            FH.write(gen_riscv_arch_tests('I', test))
+            content += gen_riscv_arch_tests('I', test)
         for test in riscv_arch_test__rv32i_m_m_instruction:
-            FH.write(gen_riscv_arch_tests('M', test))
+            content += gen_riscv_arch_tests('M', test)
 
 
     if GEN_DEDICATED_TEST:
-        FH.write("\n# dedicated-tests Test\n")
+        content += "\n# dedicated-tests Test\n"
+        for test in dedicated_test:
+            content += gen_dedicated_tests(test)
+
+    if write:
+        FH = open(output, "w")
+        FH.write(content)
+        FH.close()
+
+    return re.findall(r"async def (\w+)\(dut\)", content)
+
+def gen_batch_tests(output='tests_batch.py'):
+    """
+        Generate a single test running all the tests back to back in one simulation
+    """
+    FH = open(output, "w")
+    FH.write(BATCH_HEADER)
+
+    if GEN_SANITY_TEST:
+        FH.write("\n    # sanity Test\n")
+        for test in sanity_test:
+            FH.write(f"    envs.append(sanity_test_env(dut, '{test}'))\n")
+
+    if GEN_RISCV_TESTS:
+        FH.write("\n    # riscv-tests Test\n")
+        for test in riscv_tests__rv32ui_p:
+            FH.write(f"    envs.append(riscv_tests_env(dut, 'rv32ui-p-{test}'))\n")
+        for test in riscv_tests__rv32mi_p:
+            FH.write(f"    envs.append(riscv_tests_env(dut, 'rv32mi-p-{test}'))\n")
+        for test in riscv_tests__rv32um_p:
+            FH.write(f"    envs.append(riscv_tests_env(dut, 'rv32um-p-{test}'))\n")
+
+    if GEN_RISCV_ARCH_TEST:
+        FH.write("\n    # riscv-arch-test Test\n")
+        for test in riscv_arch_test__rv32i_m_i_instruction:
+            FH.write(f"    envs.append(riscv_arch_test_env(dut, 'I', '{test}-01'))\n")
+        for test in riscv_arch_test__rv32i_m_m_instruction:
+            FH.write(f"    envs.append(riscv_arch_test_env(dut, 'M', '{test}-01'))\n")
+
+    if GEN_DEDICATED_TEST:
+        FH.write("\n    # dedicated-tests Test\n")
         for test in dedicated_test:
-            FH.write(gen_dedicated_tests(test))
+            FH.write(f"    envs.append(dedicated_tests_env(dut, '{test}'))\n")
 
+    FH.write(BATCH_FOOTER)
     FH.close()
 
 if __name__ == '__main__':
     gen_tests()
+    gen_batch_tests()
@@ -0,0 +1,137 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Performance monitor: read the perf_monitor counters and generate the performance report
+# ------------------------------------------------------------------------------------------------
+
+import os
+import json
+import logging
+
+# counter name in the report => counter register in tb/perf_monitor.sv
+COUNTERS = {
+    'cycles':           'cycle_cnt',
+    'retired':          'retire_cnt',
+    'if_stall':         'if_stall_cnt',
+    'id_stall':         'id_stall_cnt',
+    'id_empty':         'id_empty_cnt',
+    'dbus_busy':        'dbus_busy_cnt',
+    'load_stall':       'load_stall_cnt',
+    'muldiv_stall':     'muldiv_stall_cnt',
+    'csr_stall':        'csr_stall_cnt',
+    'branch':           'branch_cnt',
+    'branch_flush':     'branch_flush_cnt',
+    'trap_flush':       'trap_flush_cnt',
+    'ibus_req':         'ibus_req_cnt',
+    'ibus_wait':        'ibus_wait_cnt',
+    'dbus_req':         'dbus_req_cnt',
+    'dbus_wait':        'dbus_wait_cnt',
+    'ram_req':          'ram_req_cnt',
+    'ram_wait':         'ram_wait_cnt',
+    'icache_hit':       'icache_hit_cnt',
+    'icache_miss':      'icache_miss_cnt',
+    'icache_refill':    'icache_refill_cnt',
+    'icache_uncached':  'icache_uncached_cnt',
+    'dcache_hit':       'dcache_hit_cnt',
+    'dcache_miss':      'dcache_miss_cnt',
+    'dcache_refill':    'dcache_refill_cnt',
+    'dcache_uncached':  'dcache_uncached_cnt',
+    'dcache_writeback': 'dcache_writeback_cnt',
+}
+
+# hpm event id => name. Same as src/rtl/core/include/core_arch.svh
+HPM_EVENTS = ['none', 'icache_miss', 'dcache_miss', 'load_stall', 'muldiv_stall', 'branch_flush', 'ibus_wait', 'dbus_wait',
+              'branch']
+
+# stall causes in the CPI breakdown
+STALL_CAUSES = ['dbus_busy', 'load_stall', 'muldiv_stall', 'csr_stall', 'branch_flush', 'trap_flush', 'id_empty']
+
+class HpmCounters:
+    """
+    Read the hardware performance counters of the core (mcsr.sv): mcycle, minstret and the hpm counters
+    with the event programmed by the software. These are the counters the software sees on the FPGA.
+    """
+
+    def __init__(self, dut):
+        self.mcsr = dut.u_veriRISCV_soc.u_veriRISCV_core.u_WB.u_csr.mcsr
+
+    def read(self):
+        """ Read all the counters. Return a dict of counter name => value, hpm counter name => (event, value) """
+        mcsr = self.mcsr
+        counters = {
+            'mcycle':   (mcsr.mcycleh_value.value.integer << 32) | mcsr.mcycle_value.value.integer,
+            'minstret': (mcsr.minstreth_value.value.integer << 32) | mcsr.minstret_value.value.integer,
+        }
+        for i in range(len(mcsr.mhpmcounter_value)):
+            event = mcsr.mhpmevent_value[i].value.integer
+            name = HPM_EVENTS[event] if event < len(HPM_EVENTS) else str(event)
+            counters[f'mhpmcounter{i + 3}'] = (name, mcsr.mhpmcounter_value[i].value.integer)
+        return counters
+
+    def dump(self, log):
+        """ Log the counters. Return the counters """
+        counters = self.read()
+        log.info(f"mcycle: {counters['mcycle']}, minstret: {counters['minstret']}")
+        for name, value in counters.items():
+            if isinstance(value, tuple) and value[0] != 'none':
+                log.info(f"{name} ({value[0]}): {value[1]}")
+        return counters
+
+class PerfMonitor:
+    """
+    Read the performance counters of tb/perf_monitor.sv at the end of a test
+    and write the report as json (one file per test) and csv (one row per test).
+    """
+
+    def __init__(self, dut, name, csvFile='perf.csv'):
+        self._log = logging.getLogger("cocotb.PerfMonitor")
+        self.monitor = dut.u_perf_monitor
+        self.hpm = HpmCounters(dut)
+        self.name = name
+        self.jsonFile = f'{name}.perf.json'
+        self.csvFile = csvFile
+
+    def read(self):
+        """ Read all the counters. Return a dict of counter name => value """
+        return {name: getattr(self.monitor, reg).value.integer for name, reg in COUNTERS.items()}
+
+    def analyze(self, counters):
+        """ Compute CPI, the per-cause stall breakdown and the cache hit rates """
+        cycles = counters['cycles']
+        retired = counters['retired']
+        report = {'test': self.name, 'counters': counters}
+        report['cpi'] = cycles / retired if retired else None
+        report['stall_cpi'] = {cause: counters[cause] / retired if retired else None for cause in STALL_CAUSES}
+        report['stall_ratio'] = {cause: counters[cause] / cycles if cycles else None for cause in STALL_CAUSES}
+        for cache in ['icache', 'dcache']:
+            access = counters[f'{cache}_hit'] + counters[f'{cache}_miss']
+            report[f'{cache}_hit_rate'] = counters[f'{cache}_hit'] / access if access else None
+        # every mispredicted branch/jump flushes the pipeline
+        branch = counters['branch']
+        report['branch_mispredict_rate'] = counters['branch_flush'] / branch if branch else None
+        return report
+
+    def report(self, finished=True):
+        """
+            Read the counters and write the report
+            finished: whether the test completed before timeout. The counters of an incomplete run are partial.
+        """
+        report = self.analyze(self.read())
+        report['finished'] = finished
+        report['hpm'] = self.hpm.dump(self._log)
+        with open(self.jsonFile, "w") as FH:
+            json.dump(report, FH, indent=2)
+        header = not os.path.exists(self.csvFile)
+        with open(self.csvFile, "a") as FH:
+            if header:
+                FH.write(",".join(['test', 'cpi'] + list(COUNTERS.keys())) + "\n")
+            cpi = f"{report['cpi']:.4f}" if report['cpi'] else ""
+            FH.write(",".join([self.name, cpi] + [str(v) for v in report['counters'].values()]) + "\n")
+        cpi = f"{report['cpi']:.3f}" if report['cpi'] else "N/A"
+        self._log.info(f"Cycles: {report['counters']['cycles']}, Retired: {report['counters']['retired']}, CPI: {cpi}")
+        return report
@@ -0,0 +1,119 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Sampling PC profiler
+# ------------------------------------------------------------------------------------------------
+
+"""
+Every N cycles the profiler samples the pc in the WB stage and the shadow call stack kept by
+tb_top (see the profiler shadow call stack in tb_top). The testbench only wakes up once per sample,
+so the overhead is small even for long programs like coremark. A stalled instruction is charged
+for the cycles it stays in WB.
+
+At the end of the test the samples are mapped to functions with the ELF symbol table and written as:
+- <test>.profile: flat profile, self and total samples per function
+- <test>.folded: folded stacks, one 'caller;callee count' line per stack, for flamegraph.pl
+
+The profiler is enabled with PROFILE=<N>, the sampling interval in cycles.
+"""
+
+import logging
+from collections import Counter
+
+import cocotb
+from cocotb.triggers import Timer, ReadOnly
+
+from ElfSymbols import ElfSymbols
+
+class Profiler:
+
+    def __init__(self, dut, name, interval, clkPeriod, elf=None):
+        """
+            @param dut: the tb_top
+            @param name: the test name, prefix of the output files
+            @param interval: sampling interval in cycles
+            @param clkPeriod: clock period in ns
+            @param elf: the program ELF file to map the samples to functions. Addresses are reported if None
+        """
+        self._log = logging.getLogger("cocotb.Profiler")
+        self.dut = dut
+        self.name = name
+        self.interval = interval
+        self.clkPeriod = clkPeriod
+        self.elf = elf
+        self.stackDepth = len(dut.prof_stack)
+        self.samples = Counter()        # (call site pc, ..., sampled pc) => count
+        self.task = None
+
+    def start(self):
+        """ Start sampling. Call before the reset is released """
+        self.task = cocotb.fork(self.sampler())
+
+    def stop(self):
+        """ Stop sampling and write the profile """
+        if self.task:
+            self.task.kill()
+            self.task = None
+        self.report()
+
+    async def sampler(self):
+        dut = self.dut
+        rst = dut.rst
+        pc = dut.prof_pc
+        depth = dut.prof_depth
+        stack = dut.prof_stack
+        period = self.interval * self.clkPeriod
+        while True:
+            await Timer(period, units="ns")
+            await ReadOnly()
+            if rst.value.integer:
+                continue
+            frames = min(depth.value.integer, self.stackDepth)
+            sample = tuple(stack[i].value.integer for i in range(frames)) + (pc.value.integer,)
+            self.samples[sample] += 1
+
+    def fold(self, symbols):
+        """ Map the samples to function stacks. Return a Counter of (function, ...) => count """
+        function = symbols.function if symbols else hex
+        stacks = Counter()
+        for sample, count in self.samples.items():
+            stacks[tuple(function(addr) for addr in sample)] += count
+        return stacks
+
+    def flat(self, stacks):
+        """ Return (self samples, total samples) per function """
+        selfCount = Counter()
+        totalCount = Counter()
+        for stack, count in stacks.items():
+            selfCount[stack[-1]] += count
+            for name in set(stack):
+                totalCount[name] += count
+        return selfCount, totalCount
+
+    def report(self):
+        symbols = ElfSymbols(self.elf) if self.elf else None
+        stacks = self.fold(symbols)
+        selfCount, totalCount = self.flat(stacks)
+        total = sum(stacks.values())
+        if not total:
+            self._log.warning("Profiler: no sample taken")
+            return
+
+        lines = [f"Flat profile of {self.name}: {total} samples, one sample every {self.interval} cycles",
+                 f"{'self %':>8} {'self':>10} {'total %':>8} {'total':>10}  function"]
+        for name, count in sorted(totalCount.items(), key=lambda f: (-selfCount[f[0]], -f[1])):
+            lines.append(f"{100 * selfCount[name] / total:8.2f} {selfCount[name]:>10} "
+                         f"{100 * count / total:8.2f} {count:>10}  {name}")
+        with open(f'{self.name}.profile', "w") as FH:
+            FH.write("\n".join(lines) + "\n")
+        with open(f'{self.name}.folded', "w") as FH:
+            for stack, count in stacks.most_common():
+                FH.write(f"{';'.join(stack)} {count}\n")
+
+        self._log.info("\n".join(lines[:22]))
+        self._log.info(f"Profile written to {self.name}.profile and {self.name}.folded")
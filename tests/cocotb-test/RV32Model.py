@@ -0,0 +1,252 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# RV32IM + Zicsr reference model
+# ------------------------------------------------------------------------------------------------
+
+"""
+Instruction level reference model of the veriRISCV core used by the lockstep co-simulation.
+
+The decode, CSR and trap rules of the core come from sdk/bsp/tools/RV32Isa.py, shared with the
+instruction set simulator. The model has no cache, so FENCE.I does nothing. Misaligned load/store
+and misaligned jump/branch target raise the misaligned exceptions.
+
+Values the model can not predict are marked as None in the retire record so the caller
+can take them from the design:
+- Loads from the IO region (address bit 31 set)
+- Reads of mcycle, minstret, the hpm counters and mip
+"""
+
+import os
+import sys
+
+# the shared architecture definition in the sdk: RV32Isa
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../sdk/bsp/tools'))
+
+import RV32Isa
+from RV32Isa import (MASK32, IO_BASE, EXC_INSTR_ADDR_MISALIGNED, EXC_ILL_INSTR, EXC_LOAD_ADDR_MISALIGNED,
+                     EXC_STORE_ADDR_MISALIGNED, MIP, CSR_COUNTERS, csrInit, decodeOp, immI, immS, immB, immJ, sext,
+                     signed, div, divu, rem, remu)
+
+# CSRs changed by the hardware: mip, the counters and their read only shadows (0xCxx)
+CSR_VOLATILE = {MIP} | set(CSR_COUNTERS) | {addr + 0x100 for addr in CSR_COUNTERS}
+
+class Retire:
+    """ Record of one instruction executed by the model """
+    __slots__ = ['pc', 'instruction', 'rd', 'value', 'exception', 'cause']
+
+    def __init__(self, pc, instruction):
+        self.pc = pc
+        self.instruction = instruction
+        self.rd = 0
+        self.value = 0
+        self.exception = False
+        self.cause = 0
+
+class RV32Model:
+
+    def __init__(self, memSize=1 << 26, resetPc=0):
+        """
+            @param memSize: main memory size in bytes. Must be power of 2
+            @param resetPc: the pc after reset
+        """
+        self.mem = bytearray(memSize)
+        self.memMask = memSize - 1
+        self.regs = [0] * 32
+        self.pc = resetPc
+        self.csr = csrInit()
+        self.mip = 0
+
+    # ---------------------------------
+    # Memory
+    # ---------------------------------
+
+    def load(self, segments):
+        """ Load the program. segments: list of (address, bytes) """
+        for addr, data in segments:
+            addr &= self.memMask
+            self.mem[addr:addr + len(data)] = data
+
+    def read(self, addr, size):
+        addr &= self.memMask
+        return int.from_bytes(self.mem[addr:addr + size], 'little')
+
+    def write(self, addr, size, value):
+        addr &= self.memMask
+        self.mem[addr:addr + size] = (value & ((1 << (size * 8)) - 1)).to_bytes(size, 'little')
+
+    # ---------------------------------
+    # CSR
+    # ---------------------------------
+
+    def csrRead(self, addr):
+        if addr == MIP:
+            return self.mip
+        return RV32Isa.csrRead(self.csr, addr)
+
+    def csrWrite(self, addr, value):
+        RV32Isa.csrWrite(self.csr, addr, value)
+
+    # ---------------------------------
+    # Trap
+    # ---------------------------------
+
+    def trap(self, cause, epc, tval, interrupt=False):
+        """ Take the trap """
+        self.pc = RV32Isa.trap(self.csr, cause, epc, tval, interrupt)
+
+    def interrupt(self, cause):
+        """ Take an interrupt at the current pc. The interrupts are asynchronous so the caller decides when """
+        self.trap(cause, self.pc, 0, interrupt=True)
+
+    def exception(self, retire, cause, tval):
+        retire.exception = True
+        retire.cause = cause
+        self.trap(cause, retire.pc, tval)
+        return retire
+
+    # ---------------------------------
+    # Execute
+    # ---------------------------------
+
+    def step(self):
+        """ Execute one instruction. Return the Retire record """
+        pc = self.pc
+        instr = self.read(pc, 4)
+        retire = Retire(pc, instr)
+        regs = self.regs
+        opcode = instr & 0x7F
+        rd = (instr >> 7) & 0x1F
+        funct3 = (instr >> 12) & 0x7
+        rs1 = regs[(instr >> 15) & 0x1F]
+        rs2 = regs[(instr >> 20) & 0x1F]
+        funct7 = instr >> 25
+        npc = (pc + 4) & MASK32
+        value = None
+        write = False
+
+        if decodeOp(instr) is None:
+            return self.exception(retire, EXC_ILL_INSTR, instr)
+
+        if opcode == 0x33:      # OP
+            write = True
+            if funct7 == 0x01:
+                value = self.muldiv(funct3, rs1, rs2)
+            else:
+                value = self.alu(funct3, rs1, rs2, funct7 == 0x20, True)
+        elif opcode == 0x13:    # OP-IMM
+            write = True
+            value = self.alu(funct3, rs1, immI(instr), (instr >> 30) & 1 and funct3 == 5, False)
+        elif opcode == 0x03:    # LOAD
+            addr = (rs1 + immI(instr)) & MASK32
+            size = 1 << (funct3 & 3)
+            if addr & (size - 1):
+                return self.exception(retire, EXC_LOAD_ADDR_MISALIGNED, addr)
+            write = True
+            if not addr & IO_BASE:
+                value = self.read(addr, size)
+                if not funct3 & 4 and size < 4:
+                    value = sext(value, size * 8)
+        elif opcode == 0x23:    # STORE
+            addr = (rs1 + immS(instr)) & MASK32
+            size = 1 << funct3
+            if addr & (size - 1):
+                return self.exception(retire, EXC_STORE_ADDR_MISALIGNED, addr)
+            if not addr & IO_BASE:
+                self.write(addr, size, rs2)
+        elif opcode == 0x63:    # BRANCH
+            if self.branch(funct3, rs1, rs2):
+                npc = (pc + immB(instr)) & MASK32
+                if npc & 0x3:
+                    return self.exception(retire, EXC_INSTR_ADDR_MISALIGNED, npc)
+        elif opcode == 0x37:    # LUI
+            write = True
+            value = instr & 0xFFFFF000
+        elif opcode == 0x17:    # AUIPC
+            write = True
+            value = (pc + (instr & 0xFFFFF000)) & MASK32
+        elif opcode == 0x6F:    # JAL
+            target = (pc + immJ(instr)) & MASK32
+            if target & 0x3:
+                return self.exception(retire, EXC_INSTR_ADDR_MISALIGNED, target)
+            write = True
+            value = npc
+            npc = target
+        elif opcode == 0x67:    # JALR
+            target = (rs1 + immI(instr)) & MASK32 & ~1
+            if target & 0x3:
+                return self.exception(retire, EXC_INSTR_ADDR_MISALIGNED, target)
+            write = True
+            value = npc
+            npc = target
+        elif opcode == 0x73:    # SYSTEM
+            if funct3 == 0:     # MRET
+                npc = RV32Isa.mret(self.csr)
+            else:
+                addr = instr >> 20
+                src = (instr >> 15) & 0x1F if funct3 & 4 else rs1
+                op = funct3 & 3
+                # CSRRW with rd = x0 does not read. CSRRS/CSRRC with rs1 = x0 does not write
+                read = op != 1 or rd != 0
+                old = self.csrRead(addr) if read else 0
+                if op == 1:
+                    self.csrWrite(addr, src)
+                elif ((instr >> 15) & 0x1F) != 0:
+                    self.csrWrite(addr, old | src if op == 2 else old & ~src)
+                write = read
+                value = None if addr in CSR_VOLATILE else old
+        # FENCE/FENCE.I do nothing
+
+        if write:
+            retire.rd = rd
+            retire.value = value
+            if rd and value is not None:
+                regs[rd] = value
+        self.pc = npc
+        return retire
+
+    def alu(self, funct3, a, b, alt, reg):
+        if funct3 == 0:
+            return (a - b) & MASK32 if alt and reg else (a + b) & MASK32
+        if funct3 == 1:
+            return (a << (b & 0x1F)) & MASK32
+        if funct3 == 2:
+            return int(signed(a) < signed(b))
+        if funct3 == 3:
+            return int(a < b)
+        if funct3 == 4:
+            return a ^ b
+        if funct3 == 5:
+            return (signed(a) >> (b & 0x1F)) & MASK32 if alt else a >> (b & 0x1F)
+        if funct3 == 6:
+            return a | b
+        return a & b
+
+    def muldiv(self, funct3, a, b):
+        if funct3 == 0:
+            return (a * b) & MASK32
+        if funct3 == 1:
+            return ((signed(a) * signed(b)) >> 32) & MASK32
+        if funct3 == 2:
+            return ((signed(a) * b) >> 32) & MASK32
+        if funct3 == 3:
+            return ((a * b) >> 32) & MASK32
+        return (div, divu, rem, remu)[funct3 - 4](a, b)
+
+    def branch(self, funct3, a, b):
+        if funct3 == 0:
+            return a == b
+        if funct3 == 1:
+            return a != b
+        if funct3 == 4:
+            return signed(a) < signed(b)
+        if funct3 == 5:
+            return signed(a) >= signed(b)
+        if funct3 == 6:
+            return a < b
+        return a >= b
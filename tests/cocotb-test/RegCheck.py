@@ -61,8 +61,14 @@ class RegCheck:
         self._log.info(f"Register read: {self.recoded_reg}")
 
     def checkRegister(self):
+        """ Check all the recorded registers and raise ValueError listing every wrong register """
+        errors = []
         for reg in self.recoded_reg:
             value = self.reg[reg].value
             if value != self.register[reg]:
-                raise ValueError(f"Wrong register data on register {reg}. Expected: {hex(self.register[reg])}, Actual: {hex(value)}")
+                errors.append(f"x{reg}: Expected: {hex(self.register[reg])}, Actual: {hex(value)}")
+        if errors:
+            message = f"Wrong register data on {len(errors)} registers:\n" + "\n".join(errors)
+            self._log.error(message)
+            raise ValueError(message)
         self._log.info("*** Register Check PASS ***")
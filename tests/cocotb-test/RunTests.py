@@ -0,0 +1,156 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Run the cocotb regression in parallel shards
+# ------------------------------------------------------------------------------------------------
+
+"""
+The verilator model is built once in the shared sim build directory.
+The test functions generated by GenTests are then split into shards and each shard is run
+by a separate simulator process in its own run directory (memory image, signature files and results.xml).
+When all the shards complete, the results.xml files are merged into a single results.xml.
+
+With COVR=1, the per-test coverage of the shards is merged into the coverage database (see Coverage.py).
+With -wave, the failed tests are re-run in a traced build with the waveform around the failure (see WaveOnFail.py).
+
+Usage:
+    python3 RunTests.py -j 8 [-wave] [SRAM=1 ...]
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+
+from GenTests import gen_tests
+from WaveOnFail import WaveOnFail
+from Coverage import CoverageDB
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+MAKEFILE = os.path.join(TEST_DIR, 'makefile')
+
+class RunTests:
+
+    def __init__(self, jobs, outDir='regression', simBuild='sim_build', results='results.xml', makeArgs=None, wave=False):
+        """
+            @param jobs: number of parallel simulator processes
+            @param outDir: directory holding the run directory of each shard
+            @param simBuild: the shared verilator build directory
+            @param results: the merged results file
+            @param makeArgs: extra make variables. Example: ['SRAM=1']
+            @param wave: re-run the failed tests in a traced build with the waveform around the failure
+        """
+        self.jobs = jobs
+        self.outDir = os.path.join(TEST_DIR, outDir)
+        self.simBuild = os.path.join(TEST_DIR, simBuild)
+        self.results = os.path.join(TEST_DIR, results)
+        self.makeArgs = makeArgs or []
+        self.wave = wave
+
+    def makeCmd(self, *args):
+        return ['make', '-f', MAKEFILE, f'SIM_BUILD={self.simBuild}'] + self.makeArgs + list(args)
+
+    def build(self):
+        """ Build the verilator model once for all the shards """
+        print("Building verilator model...")
+        subprocess.run(self.makeCmd(f'{self.simBuild}/Vtop'), cwd=TEST_DIR, check=True)
+
+    def shard(self, tests):
+        """ Split the tests into shards. Round robin so that long tests of the same type are spread out """
+        shards = [tests[i::self.jobs] for i in range(self.jobs)]
+        return [s for s in shards if s]
+
+    def shardDir(self, idx):
+        return os.path.join(self.outDir, f'shard{idx}')
+
+    def runShard(self, idx, tests):
+        """ Run a shard in its own run directory. Return the results file of the shard """
+        runDir = self.shardDir(idx)
+        os.makedirs(runDir, exist_ok=True)
+        resultFile = os.path.join(runDir, 'results.xml')
+        if os.path.exists(resultFile):
+            os.remove(resultFile)
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [TEST_DIR, env.get('PYTHONPATH')]))
+        cmd = self.makeCmd('MODULE=tests', f'TESTCASE={",".join(tests)}', f'COCOTB_RESULTS_FILE={resultFile}')
+        with open(os.path.join(runDir, 'sim.log'), 'w') as LOG:
+            subprocess.run(cmd, cwd=runDir, env=env, stdout=LOG, stderr=subprocess.STDOUT)
+        print(f"Shard {idx} completed: {len(tests)} tests")
+        return resultFile
+
+    def merge(self, resultFiles, tests):
+        """
+            Merge the results of all the shards into a single results file.
+            Tests missing from the results (e.g. simulator crash) are reported as failures.
+            Return the list of failed tests.
+        """
+        root = ET.Element("testsuites", name="results")
+        suite = ET.SubElement(root, "testsuite", name="all", package="all")
+        completed = set()
+        failed = []
+        for file in resultFiles:
+            if not os.path.exists(file):
+                continue
+            for testcase in ET.parse(file).getroot().iter('testcase'):
+                suite.append(testcase)
+                completed.add(testcase.get('name'))
+                if testcase.find('failure') is not None:
+                    failed.append(testcase.get('name'))
+        for test in tests:
+            if test not in completed:
+                testcase = ET.SubElement(suite, "testcase", name=test, classname="tests")
+                ET.SubElement(testcase, "failure", message="Test did not complete")
+                failed.append(test)
+        ET.ElementTree(root).write(self.results, encoding="UTF-8")
+        return failed
+
+    def run(self, tests):
+        if not tests:
+            print("No test to run")
+            return False
+        self.build()
+        shards = self.shard(tests)
+        print(f"Running {len(tests)} tests in {len(shards)} shards...")
+        with ThreadPoolExecutor(max_workers=len(shards)) as pool:
+            resultFiles = list(pool.map(self.runShard, range(len(shards)), shards))
+        failed = self.merge(resultFiles, tests)
+        print(f"PASS: {len(tests) - len(failed)}, FAIL: {len(failed)}")
+        for test in failed:
+            print(f"FAILED: {test}")
+        print(f"Results merged into {self.results}")
+        if 'COVR=1' in self.makeArgs or os.environ.get('COVR') == '1':
+            CoverageDB().merge([os.path.join(self.shardDir(idx), 'coverage') for idx in range(len(shards))])
+        if self.wave and failed:
+            testDir = {test: self.shardDir(idx) for idx, shard in enumerate(shards) for test in shard}
+            WaveOnFail(jobs=self.jobs, makeArgs=self.makeArgs).run([(test, testDir[test]) for test in failed])
+        return len(failed) == 0
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Run the cocotb regression in parallel shards')
+    parser.add_argument('-jobs', '-j', type=int, default=os.cpu_count(), help='Number of parallel simulator processes')
+    parser.add_argument('-gen', action='store_true', help='Regenerate tests.py before running')
+    parser.add_argument('-test', '-t', type=str, nargs='*', help='Only run the specified tests')
+    parser.add_argument('-wave', action='store_true', help='Re-run the failed tests with a waveform around the failure')
+    parser.add_argument('makeArgs', type=str, nargs='*', help='Extra make variables. Example: SRAM=1')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = cmdParser()
+    selected = [t for t in args.test or [] if '=' not in t]
+    makeArgs = args.makeArgs + [t for t in args.test or [] if '=' in t]
+    tests = gen_tests(os.path.join(TEST_DIR, 'tests.py'), write=args.gen)
+    if selected:
+        unknown = [t for t in selected if t not in tests]
+        if unknown:
+            sys.exit(f"Unknown tests (not generated in tests.py): {', '.join(unknown)}")
+        tests = [t for t in tests if t in selected]
+    runner = RunTests(args.jobs, makeArgs=makeArgs, wave=args.wave)
+    sys.exit(0 if runner.run(tests) else 1)
@@ -0,0 +1,119 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Check the arch test signature against the reference output
+# ------------------------------------------------------------------------------------------------
+
+"""
+The signature and the reference are compared as uint32 arrays in one pass (numpy if it is installed).
+Every mismatching word is reported with its address and the signature label it belongs to.
+The labels (signature_x1_0, ...) are read from the objdump file generated next to the .elf.verilog.
+"""
+
+import re
+import bisect
+import logging
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# label line in the objdump file: 00002010 <signature_x1_0>:
+LABEL_RE = re.compile(r"^([0-9a-fA-F]+) <([^>]+)>:")
+
+class SigCheck:
+    """
+    Check the signature against the reference output
+    """
+
+    def __init__(self, signature, refFile, begin, objdump=None):
+        """
+            @param signature: the signature words read from the memory
+            @param refFile: the reference output file, one hex word per line
+            @param begin: address of the first signature word
+            @param objdump: objdump file of the test, used to label the mismatches. No label if None
+        """
+        self._log = logging.getLogger("cocotb.SigCheck")
+        self.signature = signature
+        self.reference = self.loadReference(refFile)
+        self.begin = begin
+        self.labels = self.loadLabels(objdump, begin, begin + 4 * len(signature)) if objdump else []
+        self.labelAddrs = [addr for addr, _ in self.labels]
+
+    def loadReference(self, file):
+        with open(file, "r") as FH:
+            words = FH.read().split()
+        if np is not None:
+            return np.fromiter((int(w, 16) for w in words), dtype=np.uint32, count=len(words))
+        return array('I', (int(w, 16) for w in words))
+
+    def loadLabels(self, file, begin, end):
+        """ Read the labels within [begin, end). Return a sorted list of (address, label) """
+        labels = []
+        with open(file, "r") as FH:
+            for line in FH:
+                match = LABEL_RE.match(line)
+                if match:
+                    addr = int(match.group(1), 16)
+                    if begin <= addr < end:
+                        labels.append((addr, match.group(2)))
+        labels.sort()
+        return labels
+
+    def label(self, addr):
+        """ The label of an address as label+offset """
+        i = bisect.bisect_right(self.labelAddrs, addr) - 1
+        if i < 0:
+            return f"begin_signature+{hex(addr - self.begin)}"
+        base, name = self.labels[i]
+        return f"{name}+{hex(addr - base)}" if addr != base else name
+
+    def mismatchIndex(self):
+        """ Indexes of the mismatching words in the common part of the signature and the reference """
+        size = min(len(self.signature), len(self.reference))
+        if np is not None:
+            actual = np.asarray(self.signature, dtype=np.uint32)[:size]
+            return np.flatnonzero(actual != self.reference[:size]).tolist()
+        return [i for i, (a, e) in enumerate(zip(self.signature, self.reference)) if a != e]
+
+    def compare(self):
+        """ Return a list of (address, label, expected, actual). None is used for a missing word """
+        mismatches = []
+        for i in self.mismatchIndex():
+            addr = self.begin + 4 * i
+            mismatches.append((addr, self.label(addr), int(self.reference[i]), int(self.signature[i])))
+        for i in range(len(self.reference), len(self.signature)):
+            addr = self.begin + 4 * i
+            mismatches.append((addr, self.label(addr), None, int(self.signature[i])))
+        for i in range(len(self.signature), len(self.reference)):
+            addr = self.begin + 4 * i
+            mismatches.append((addr, self.label(addr), int(self.reference[i]), None))
+        return mismatches
+
+    def report(self, mismatches):
+        fmt = lambda v: "--------" if v is None else f"{v:08x}"
+        lines = [f"{len(mismatches)} signature mismatches "
+                 f"(signature {len(self.signature)} words, reference {len(self.reference)} words):"]
+        lines += [f"  {addr:08x} {label:<32} expected {fmt(exp)} actual {fmt(act)}"
+                  for addr, label, exp, act in mismatches]
+        return "\n".join(lines)
+
+    def checkSignature(self, diffFile=None):
+        """ Compare the signature. Write the report to diffFile and raise ValueError if there is any mismatch """
+        mismatches = self.compare()
+        if not mismatches:
+            self._log.info("*** Signature Check PASS ***")
+            return
+        report = self.report(mismatches)
+        if diffFile:
+            with open(diffFile, "w") as FH:
+                FH.write(report + "\n")
+        self._log.error(report)
+        raise ValueError(report)
@@ -0,0 +1,104 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Content addressed test result cache
+# ------------------------------------------------------------------------------------------------
+
+"""
+The result of a test is stored under a key hashing all of the inputs of the test:
+- The RTL files in VERILOG_SOURCES from veriRISCV_soc.mk, the include files and the testbench files
+- The define set from the environment (SRAM, BRAM2C, ICACHE, DCACHE, PARAMS, COSIM) and the cocotb makefile (MAIN_MEMORY_AW)
+  The cache parameters are part of the RTL files (veriRISCV_soc.sv, core_arch.svh)
+- The testbench python code
+- The test itself: type, timeout, .verilog image and reference file
+
+If none of them changed, the recorded result is replayed instead of running the test again.
+The cache is enabled with CACHE=1. Each entry is a small json file so parallel shards do not conflict.
+"""
+
+import os
+import glob
+import json
+import hashlib
+import logging
+import subprocess
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# environment variables that change the design or the testbench
+DEFINE_VARS = ['SIM', 'SRAM', 'BRAM2C', 'ICACHE', 'DCACHE', 'PARAMS', 'COSIM']
+
+# make snippet printing the RTL file list of the SoC
+PRINT_SOURCES = "print_sources:\n\t@echo $(VERILOG_SOURCES)\n"
+
+class TestCache:
+
+    def __init__(self, repoRoot, cacheDir=os.path.join(TEST_DIR, '.test_cache')):
+        self._log = logging.getLogger("cocotb.TestCache")
+        self.repoRoot = repoRoot
+        self.cacheDir = cacheDir
+        self._designHash = None
+        os.makedirs(self.cacheDir, exist_ok=True)
+
+    def rtlFiles(self):
+        """ Get the RTL file list from veriRISCV_soc.mk plus the include and testbench files """
+        socMk = os.path.join(self.repoRoot, 'src/rtl/soc/veriRISCV_soc.mk')
+        output = subprocess.run(['make', '-s', '-f', socMk, '-f', '-', 'print_sources', f'REPO_ROOT={self.repoRoot}'],
+                                input=PRINT_SOURCES, capture_output=True, text=True, check=True).stdout
+        files = output.split()
+        files += sorted(glob.glob(os.path.join(self.repoRoot, 'src/rtl/**/*.svh'), recursive=True))
+        files += sorted(glob.glob(os.path.join(TEST_DIR, 'tb/*.sv')))
+        return files
+
+    def designHash(self):
+        """ Hash of the design and the testbench. Computed once per simulation """
+        if self._designHash is None:
+            h = hashlib.sha256()
+            files = self.rtlFiles()
+            files += [os.path.join(TEST_DIR, f) for f in ['makefile', 'env.py', 'RegCheck.py', 'TestCache.py', 'CoSim.py', 'RV32Model.py', 'SigCheck.py']]
+            files += [os.path.join(self.repoRoot, 'sdk/bsp/tools', f) for f in ['VerilogImage.py', 'RV32Isa.py']]
+            for file in files:
+                h.update(file.encode())
+                h.update(hashFile(file).encode())
+            for var in DEFINE_VARS:
+                h.update(f"{var}={os.environ.get(var, '')}".encode())
+            self._designHash = h.hexdigest()
+        return self._designHash
+
+    def key(self, env):
+        """ Get the cache key of a test """
+        h = hashlib.sha256()
+        h.update(self.designHash().encode())
+        h.update(f"{env.name}|{env.test_type}|{env.timeout}|{env.check_result}".encode())
+        h.update(hashFile(env.ramFile).encode())
+        if env.refFile:
+            h.update(hashFile(env.refFile).encode())
+        return h.hexdigest()
+
+    def load(self, key):
+        """ Load the recorded result. Return None if the test is not in the cache """
+        file = os.path.join(self.cacheDir, f'{key}.json')
+        if not os.path.exists(file):
+            return None
+        with open(file, "r") as FH:
+            return json.load(FH)
+
+    def store(self, key, record):
+        """ Record the result of a test """
+        file = os.path.join(self.cacheDir, f'{key}.json')
+        tmp = f'{file}.{os.getpid()}'
+        with open(tmp, "w") as FH:
+            json.dump(record, FH)
+        os.replace(tmp, file)
+
+def hashFile(file):
+    h = hashlib.sha256()
+    with open(file, "rb") as FH:
+        for chunk in iter(lambda: FH.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
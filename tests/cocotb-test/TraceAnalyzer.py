@@ -0,0 +1,301 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Offline analyzer of the instruction commit trace
+# ------------------------------------------------------------------------------------------------
+
+"""
+The commit trace is written by CommitTrace.py (TRACE=1). The file starts with a header and is
+followed by one fixed size record per instruction leaving the WB stage or interrupt taken:
+
+header:     magic 'VRCT', version, record size
+record:     pc, instruction, register write data, memory address (alu out), cycle since reset,
+            destination register, flags (see FLAG_*)
+
+The analyzer reports:
+- Instruction mix by mnemonic and by class
+- Hot PCs and functions by instruction count and by cycles (cycles since the previous instruction)
+- Branch statistics: taken rate by direction, the hottest branch sites, jumps and front end redirects
+- Load-use pairs and multiply/divide instructions
+
+Usage:
+    python3 TraceAnalyzer.py coremark.trace -elf ../../sdk/software/coremark/coremark [-top 20] [-json report.json]
+"""
+
+import sys
+import json
+import struct
+import argparse
+from collections import Counter, defaultdict
+
+MAGIC = b'VRCT'
+VERSION = 1
+HEADER = struct.Struct('<4sHH')
+RECORD = struct.Struct('<IIIIIBB')
+
+FLAG_RETIRE     = 0x1
+FLAG_REG_WRITE  = 0x2
+FLAG_EXCEPTION  = 0x4
+FLAG_INTERRUPT  = 0x8
+
+# ---------------------------------
+# Decode
+# ---------------------------------
+
+BRANCH = ['beq', 'bne', None, None, 'blt', 'bge', 'bltu', 'bgeu']
+LOAD = ['lb', 'lh', 'lw', None, 'lbu', 'lhu', None, None]
+STORE = ['sb', 'sh', 'sw', None, None, None, None, None]
+OP_IMM = ['addi', 'slli', 'slti', 'sltiu', 'xori', 'srli', 'ori', 'andi']
+OP = ['add', 'sll', 'slt', 'sltu', 'xor', 'srl', 'or', 'and']
+MULDIV = ['mul', 'mulh', 'mulhsu', 'mulhu', 'div', 'divu', 'rem', 'remu']
+CSR = [None, 'csrrw', 'csrrs', 'csrrc', None, 'csrrwi', 'csrrsi', 'csrrci']
+
+CLASS = {
+    'lui': 'alu', 'auipc': 'alu', 'jal': 'jump', 'jalr': 'jump', 'mret': 'system', 'ecall': 'system',
+    'ebreak': 'system', 'fence': 'system', 'unknown': 'illegal',
+}
+CLASS.update({m: 'branch' for m in BRANCH if m})
+CLASS.update({m: 'load' for m in LOAD if m})
+CLASS.update({m: 'store' for m in STORE if m})
+CLASS.update({m: 'alu' for m in OP_IMM + OP + ['sub', 'sra', 'srai']})
+CLASS.update({m: 'mul' for m in MULDIV[:4]})
+CLASS.update({m: 'div' for m in MULDIV[4:]})
+CLASS.update({m: 'csr' for m in CSR if m})
+
+def mnemonic(instr):
+    opcode = instr & 0x7F
+    funct3 = (instr >> 12) & 0x7
+    funct7 = instr >> 25
+    name = None
+    if opcode == 0x37:
+        name = 'lui'
+    elif opcode == 0x17:
+        name = 'auipc'
+    elif opcode == 0x6F:
+        name = 'jal'
+    elif opcode == 0x67:
+        name = 'jalr'
+    elif opcode == 0x63:
+        name = BRANCH[funct3]
+    elif opcode == 0x03:
+        name = LOAD[funct3]
+    elif opcode == 0x23:
+        name = STORE[funct3]
+    elif opcode == 0x13:
+        name = 'srai' if funct3 == 5 and funct7 & 0x20 else OP_IMM[funct3]
+    elif opcode == 0x33:
+        if funct7 == 0x01:
+            name = MULDIV[funct3]
+        elif funct7 == 0x20 and funct3 in (0, 5):
+            name = 'sub' if funct3 == 0 else 'sra'
+        elif funct7 == 0:
+            name = OP[funct3]
+    elif opcode == 0x73:
+        name = {0x30200073: 'mret', 0x00000073: 'ecall', 0x00100073: 'ebreak'}.get(instr) if funct3 == 0 else CSR[funct3]
+    elif opcode == 0x0F:
+        name = 'fence'
+    return name or 'unknown'
+
+def sourceRegs(instr):
+    """ Source registers read by the instruction """
+    opcode = instr & 0x7F
+    rs1 = (instr >> 15) & 0x1F
+    rs2 = (instr >> 20) & 0x1F
+    if opcode in (0x33, 0x23, 0x63):
+        return (rs1, rs2)
+    if opcode in (0x13, 0x03, 0x67) or (opcode == 0x73 and not (instr >> 12) & 0x4):
+        return (rs1,)
+    return ()
+
+# ---------------------------------
+# Trace file
+# ---------------------------------
+
+def readTrace(file):
+    """ Read the trace file. Return a list of records (pc, instruction, writedata, address, cycle, rd, flags) """
+    with open(file, "rb") as FH:
+        data = FH.read()
+    magic, version, size = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{file} is not a commit trace version {VERSION}")
+    end = HEADER.size + (len(data) - HEADER.size) // RECORD.size * RECORD.size
+    return list(RECORD.iter_unpack(memoryview(data)[HEADER.size:end]))
+
+# ---------------------------------
+# Analyzer
+# ---------------------------------
+
+class TraceAnalyzer:
+
+    def __init__(self, records, symbols=None):
+        """
+            @param records: the trace records
+            @param symbols: ElfSymbols of the program to map the pc to functions. No mapping if None
+        """
+        self.records = records
+        self.symbols = symbols
+
+    def label(self, pc):
+        return self.symbols.label(pc) if self.symbols else hex(pc)
+
+    def function(self, pc):
+        return self.symbols.function(pc) if self.symbols else hex(pc)
+
+    def analyze(self):
+        retired = [r for r in self.records if r[6] & FLAG_RETIRE]
+        mix = Counter()
+        pcCount = Counter()
+        pcCycles = Counter()
+        exceptions = 0
+        lastCycle = retired[0][4] if retired else 0
+        for pc, instr, _, _, cycle, _, flags in retired:
+            if flags & FLAG_EXCEPTION:
+                exceptions += 1
+            else:
+                mix[mnemonic(instr)] += 1
+            pcCount[pc] += 1
+            pcCycles[pc] += cycle - lastCycle if cycle >= lastCycle else 0
+            lastCycle = cycle
+
+        classes = Counter()
+        for name, count in mix.items():
+            classes[CLASS[name]] += count
+
+        funcCount = Counter()
+        funcCycles = Counter()
+        for pc, count in pcCount.items():
+            funcCount[self.function(pc)] += count
+            funcCycles[self.function(pc)] += pcCycles[pc]
+
+        cycles = retired[-1][4] - retired[0][4] if retired else 0
+        report = {
+            'instructions': len(retired),
+            'cycles': cycles,
+            'cpi': cycles / len(retired) if retired else None,
+            'exceptions': exceptions,
+            'interrupts': sum(1 for r in self.records if r[6] & FLAG_INTERRUPT),
+            'mix': dict(mix.most_common()),
+            'classes': dict(classes.most_common()),
+            'pc_count': pcCount,
+            'pc_cycles': pcCycles,
+            'function_count': dict(funcCount.most_common()),
+            'function_cycles': dict(funcCycles.most_common()),
+        }
+        report.update(self.branchStats(retired))
+        report.update(self.hazardStats(retired))
+        return report
+
+    def branchStats(self, retired):
+        """ Taken is decided by the pc of the next instruction """
+        sites = defaultdict(lambda: [0, 0])
+        forward = [0, 0]    # executed, taken
+        backward = [0, 0]
+        jumps = 0
+        for i in range(len(retired)):
+            pc, instr, _, _, _, _, flags = retired[i]
+            if flags & FLAG_EXCEPTION:
+                continue
+            opcode = instr & 0x7F
+            if opcode in (0x6F, 0x67):
+                jumps += 1
+            if opcode != 0x63 or i + 1 == len(retired):
+                continue
+            taken = retired[i + 1][0] != (pc + 4) & 0xFFFFFFFF
+            stats = backward if instr >> 31 else forward
+            stats[0] += 1
+            stats[1] += taken
+            sites[pc][0] += 1
+            sites[pc][1] += taken
+        branches = forward[0] + backward[0]
+        taken = forward[1] + backward[1]
+        return {
+            'branches': branches,
+            'branches_taken': taken,
+            'branch_taken_rate': taken / branches if branches else None,
+            'forward_taken_rate': forward[1] / forward[0] if forward[0] else None,
+            'backward_taken_rate': backward[1] / backward[0] if backward[0] else None,
+            'jumps': jumps,
+            'redirects': taken + jumps,
+            'branch_sites': dict(sites),
+        }
+
+    def hazardStats(self, retired):
+        """ Load followed by an instruction reading the loaded register, and the multiply/divide counts """
+        loadUse = 0
+        for i in range(len(retired) - 1):
+            instr = retired[i][1]
+            rd = (instr >> 7) & 0x1F
+            if instr & 0x7F == 0x03 and rd and rd in sourceRegs(retired[i + 1][1]):
+                loadUse += 1
+        return {'load_use': loadUse}
+
+    def printReport(self, report, top=20):
+        total = report['instructions'] or 1
+        cpi = f"{report['cpi']:.3f}" if report['cpi'] else "N/A"
+        print(f"Instructions: {report['instructions']}, Cycles: {report['cycles']}, CPI: {cpi}, "
+              f"Exceptions: {report['exceptions']}, Interrupts: {report['interrupts']}")
+
+        print("\nInstruction class:")
+        for name, count in report['classes'].items():
+            print(f"  {name:<10} {count:>12} {100 * count / total:6.2f}%")
+        print("\nInstruction mix:")
+        for name, count in list(report['mix'].items())[:top]:
+            print(f"  {name:<10} {count:>12} {100 * count / total:6.2f}%")
+
+        cycles = report['cycles'] or 1
+        print("\nHot functions (cycles):")
+        for name, count in list(report['function_cycles'].items())[:top]:
+            print(f"  {name:<40} {count:>12} {100 * count / cycles:6.2f}%  instructions {report['function_count'][name]}")
+        print("\nHot PCs (cycles):")
+        for pc, count in report['pc_cycles'].most_common(top):
+            print(f"  {pc:08x} {self.label(pc):<40} {count:>12} {100 * count / cycles:6.2f}%  "
+                  f"executed {report['pc_count'][pc]}")
+
+        rate = lambda r: "N/A" if r is None else f"{100 * r:.2f}%"
+        print(f"\nBranches: {report['branches']}, taken {rate(report['branch_taken_rate'])} "
+              f"(forward {rate(report['forward_taken_rate'])}, backward {rate(report['backward_taken_rate'])})")
+        print(f"Jumps: {report['jumps']}, front end redirects: {report['redirects']} "
+              f"({100 * report['redirects'] / total:.2f}% of the instructions)")
+        print("Hot branch sites:")
+        sites = sorted(report['branch_sites'].items(), key=lambda s: -s[1][0])[:top]
+        for pc, (count, taken) in sites:
+            print(f"  {pc:08x} {self.label(pc):<40} {count:>12} taken {100 * taken / count:6.2f}%")
+
+        mul = report['classes'].get('mul', 0)
+        div = report['classes'].get('div', 0)
+        print(f"\nLoad-use pairs: {report['load_use']}, multiply: {mul}, divide: {div}")
+
+    def writeJson(self, report, file):
+        out = dict(report)
+        out['pc_count'] = {hex(pc): c for pc, c in report['pc_count'].most_common()}
+        out['pc_cycles'] = {hex(pc): c for pc, c in report['pc_cycles'].most_common()}
+        out['branch_sites'] = {hex(pc): {'executed': c, 'taken': t} for pc, (c, t) in report['branch_sites'].items()}
+        with open(file, "w") as FH:
+            json.dump(out, FH, indent=2)
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Analyze the instruction commit trace')
+    parser.add_argument('trace', type=str, help='The trace file')
+    parser.add_argument('-elf', type=str, default=None, help='The program ELF file to map the pc to symbols')
+    parser.add_argument('-top', type=int, default=20, help='Number of entries in each table')
+    parser.add_argument('-json', type=str, default=None, help='Write the full report as json')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = cmdParser()
+    symbols = None
+    if args.elf:
+        from ElfSymbols import ElfSymbols
+        symbols = ElfSymbols(args.elf)
+    analyzer = TraceAnalyzer(readTrace(args.trace), symbols)
+    report = analyzer.analyze()
+    analyzer.printReport(report, args.top)
+    if args.json:
+        analyzer.writeJson(report, args.json)
+    sys.exit(0)
@@ -0,0 +1,113 @@
+#!/usr/bin/python3
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Re-run the failed tests with a waveform dumped around the failure
+# ------------------------------------------------------------------------------------------------
+
+"""
+The regression runs without tracing. When a test fails, ENV writes <test>.fail.json with the
+cycle of the failure (counted from the reset release). This script builds a traced model once
+(WAVE=1 in its own sim build directory) and re-runs each failed test alone with the dump limited
+to the window [failure - window, failure + after] (see the windowed waveform dump in tb_top).
+The re-run finishes at the end of the window, so it always reports the test as failed.
+
+Usage:
+    python3 WaveOnFail.py -t add,sub [-window 20000] [SRAM=1 ...]
+    python3 RunTests.py -j 8 -wave
+"""
+
+import os
+import json
+import argparse
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+MAKEFILE = os.path.join(TEST_DIR, 'makefile')
+
+class WaveOnFail:
+
+    def __init__(self, window=10000, after=100, jobs=1, outDir='waves', simBuild='sim_build_wave', makeArgs=None):
+        """
+            @param window: number of cycles dumped before the failure
+            @param after: number of cycles dumped after the failure
+            @param jobs: number of tests re-run in parallel
+            @param outDir: directory holding the run directory and the waveform of each test
+            @param simBuild: the traced verilator build directory
+            @param makeArgs: extra make variables. Must match the failed run. Example: ['SRAM=1']
+        """
+        self.window = window
+        self.after = after
+        self.jobs = jobs
+        self.outDir = os.path.join(TEST_DIR, outDir)
+        self.simBuild = os.path.join(TEST_DIR, simBuild)
+        self.makeArgs = makeArgs or []
+
+    def makeCmd(self, *args):
+        return ['make', '-f', MAKEFILE, f'SIM_BUILD={self.simBuild}'] + self.makeArgs + ['WAVE=1', 'CACHE=0'] + list(args)
+
+    def build(self):
+        """ Build the traced verilator model """
+        print("Building traced verilator model...")
+        subprocess.run(self.makeCmd(f'{self.simBuild}/Vtop'), cwd=TEST_DIR, check=True)
+
+    def failureCycle(self, test, runDir):
+        """ Read the failure cycle recorded by the failed run. None if there is no record """
+        file = os.path.join(runDir, f'{test}.fail.json')
+        if not os.path.exists(file):
+            return None
+        with open(file, 'r') as FH:
+            return json.load(FH).get('cycle')
+
+    def rerun(self, test, runDir):
+        """ Re-run the test with the windowed dump. Return the waveform file """
+        cycle = self.failureCycle(test, runDir)
+        if cycle is None:
+            start, cycles = 0, 0
+            print(f"{test}: no failure cycle recorded, dumping the whole test")
+        else:
+            start = max(0, cycle - self.window)
+            cycles = cycle - start + self.after
+        waveDir = os.path.join(self.outDir, test)
+        os.makedirs(waveDir, exist_ok=True)
+        wave = os.path.join(waveDir, f'{test}.fst')
+        plusargs = f'+WAVE_FILE={wave} +WAVE_START={start} +WAVE_CYCLES={cycles}'
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(filter(None, [TEST_DIR, env.get('PYTHONPATH')]))
+        cmd = self.makeCmd('MODULE=tests', f'TESTCASE={test}', f'PLUSARGS={plusargs}',
+                           f"COCOTB_RESULTS_FILE={os.path.join(waveDir, 'results.xml')}")
+        with open(os.path.join(waveDir, 'sim.log'), 'w') as LOG:
+            subprocess.run(cmd, cwd=waveDir, env=env, stdout=LOG, stderr=subprocess.STDOUT)
+        print(f"{test}: cycles {start} - {start + cycles} dumped to {wave}")
+        return wave
+
+    def run(self, failures):
+        """ failures: list of (test, run directory of the failed run). Return the list of waveform files """
+        if not failures:
+            return []
+        self.build()
+        with ThreadPoolExecutor(max_workers=max(1, self.jobs)) as pool:
+            return list(pool.map(lambda f: self.rerun(*f), failures))
+
+def cmdParser():
+    parser = argparse.ArgumentParser(description='Re-run the failed tests with a waveform around the failure')
+    parser.add_argument('-test', '-t', type=str, nargs='+', required=True, help='The failed tests. Comma or space separated')
+    parser.add_argument('-dir', type=str, default=TEST_DIR, help='Run directory of the failed run holding <test>.fail.json')
+    parser.add_argument('-window', type=int, default=10000, help='Number of cycles dumped before the failure')
+    parser.add_argument('-after', type=int, default=100, help='Number of cycles dumped after the failure')
+    parser.add_argument('-jobs', '-j', type=int, default=1, help='Number of tests re-run in parallel')
+    parser.add_argument('makeArgs', type=str, nargs='*', help='Extra make variables. Example: SRAM=1')
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    args = cmdParser()
+    tests = [t for arg in args.test for t in arg.split(',') if t and '=' not in t]
+    makeArgs = args.makeArgs + [t for t in args.test if '=' in t]
+    waveOnFail = WaveOnFail(args.window, args.after, args.jobs, makeArgs=makeArgs)
+    waveOnFail.run([(test, args.dir) for test in tests])
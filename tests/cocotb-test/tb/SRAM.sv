@@ -46,6 +46,30 @@ module SRAM #(
         end
     endgenerate
 
+    // Testbench backdoor: the testbench writes the program image into a $readmemh file and pulses sim_load
+    // to load the whole memory in one shot instead of writing it half word by half word through the simulator.
+    // Pulsing sim_clear zeros the whole memory.
+    // Pulsing sim_dump writes the half words between sim_dump_start and sim_dump_end into a $writememh file.
+    string       sim_image;
+    string       sim_dump_file;
+    reg          sim_load = 1'b0;
+    reg          sim_clear = 1'b0;
+    reg          sim_dump = 1'b0;
+    reg [31:0]   sim_dump_start = 'b0;
+    reg [31:0]   sim_dump_end = 'b0;
+
+    initial begin
+        if (!$value$plusargs("MEMORY_IMAGE=%s", sim_image)) sim_image = "memory.hex";
+        if (!$value$plusargs("MEMORY_DUMP=%s", sim_dump_file)) sim_dump_file = "memory_dump.hex";
+    end
+
+    always @(posedge sim_dump) $writememh(sim_dump_file, sram_mem, sim_dump_start, sim_dump_end);
+
+    always @(posedge sim_load) $readmemh(sim_image, sram_mem);
+
+    always @(posedge sim_clear) begin
+        for (int j = 0; j < (1<<AW); j++) sram_mem[j] = 'b0;
+    end
 
 
 endmodule
\ No newline at end of file
@@ -0,0 +1,19 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Per test coverage: write the verilator coverage collected so far and restart from zero
+// ------------------------------------------------------------------------------------------------
+
+#include "verilated.h"
+#include "verilated_cov.h"
+
+extern "C" void coverage_save(const char* file) {
+    VerilatedCovContext* cov = Verilated::threadContextp()->coveragep();
+    cov->write(file);
+    cov->zero();
+}
@@ -0,0 +1,146 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Performance monitor for simulation
+// ------------------------------------------------------------------------------------------------
+
+/**
+
+The performance monitor passively counts the pipeline and bus events of the SoC.
+The counters are cleared on reset and read by the testbench (PerfMonitor.py) once at the end of a test,
+so there is no per-cycle overhead on the python side.
+
+Stall counters count the cycles when the corresponding HDU request is asserted.
+Multiple causes can be asserted in the same cycle.
+
+*/
+
+module perf_monitor (
+    input           clk,
+    input           rst,
+    // pipeline events
+    input           retire,
+    input           if_stall,
+    input           id_stall,
+    input           id_empty,
+    input           dbus_busy,
+    input           load_stall,
+    input           muldiv_stall,
+    input           csr_stall,
+    input           branch,
+    input           branch_flush,
+    input           trap_flush,
+    // bus events
+    input           ibus_req,
+    input           ibus_waitrequest,
+    input           dbus_req,
+    input           dbus_waitrequest,
+    input           ram_req,
+    input           ram_waitrequest,
+    // cache events
+    input           icache_hit,
+    input           icache_miss,
+    input           icache_refill,
+    input           icache_uncached,
+    input           dcache_hit,
+    input           dcache_miss,
+    input           dcache_refill,
+    input           dcache_uncached,
+    input           dcache_writeback
+);
+
+    reg [31:0]  cycle_cnt;
+    reg [31:0]  retire_cnt;
+    reg [31:0]  if_stall_cnt;
+    reg [31:0]  id_stall_cnt;
+    reg [31:0]  id_empty_cnt;
+    reg [31:0]  dbus_busy_cnt;
+    reg [31:0]  load_stall_cnt;
+    reg [31:0]  muldiv_stall_cnt;
+    reg [31:0]  csr_stall_cnt;
+    reg [31:0]  branch_cnt;
+    reg [31:0]  branch_flush_cnt;
+    reg [31:0]  trap_flush_cnt;
+    reg [31:0]  ibus_req_cnt;
+    reg [31:0]  ibus_wait_cnt;
+    reg [31:0]  dbus_req_cnt;
+    reg [31:0]  dbus_wait_cnt;
+    reg [31:0]  ram_req_cnt;
+    reg [31:0]  ram_wait_cnt;
+    reg [31:0]  icache_hit_cnt;
+    reg [31:0]  icache_miss_cnt;
+    reg [31:0]  icache_refill_cnt;
+    reg [31:0]  icache_uncached_cnt;
+    reg [31:0]  dcache_hit_cnt;
+    reg [31:0]  dcache_miss_cnt;
+    reg [31:0]  dcache_refill_cnt;
+    reg [31:0]  dcache_uncached_cnt;
+    reg [31:0]  dcache_writeback_cnt;
+
+    always @(posedge clk) begin
+        if (rst) begin
+            cycle_cnt <= 0;
+            retire_cnt <= 0;
+            if_stall_cnt <= 0;
+            id_stall_cnt <= 0;
+            id_empty_cnt <= 0;
+            dbus_busy_cnt <= 0;
+            load_stall_cnt <= 0;
+            muldiv_stall_cnt <= 0;
+            csr_stall_cnt <= 0;
+            branch_cnt <= 0;
+            branch_flush_cnt <= 0;
+            trap_flush_cnt <= 0;
+            ibus_req_cnt <= 0;
+            ibus_wait_cnt <= 0;
+            dbus_req_cnt <= 0;
+            dbus_wait_cnt <= 0;
+            ram_req_cnt <= 0;
+            ram_wait_cnt <= 0;
+            icache_hit_cnt <= 0;
+            icache_miss_cnt <= 0;
+            icache_refill_cnt <= 0;
+            icache_uncached_cnt <= 0;
+            dcache_hit_cnt <= 0;
+            dcache_miss_cnt <= 0;
+            dcache_refill_cnt <= 0;
+            dcache_uncached_cnt <= 0;
+            dcache_writeback_cnt <= 0;
+        end
+        else begin
+            cycle_cnt <= cycle_cnt + 1;
+            if (retire) retire_cnt <= retire_cnt + 1;
+            if (if_stall) if_stall_cnt <= if_stall_cnt + 1;
+            if (id_stall) id_stall_cnt <= id_stall_cnt + 1;
+            if (id_empty) id_empty_cnt <= id_empty_cnt + 1;
+            if (dbus_busy) dbus_busy_cnt <= dbus_busy_cnt + 1;
+            if (load_stall) load_stall_cnt <= load_stall_cnt + 1;
+            if (muldiv_stall) muldiv_stall_cnt <= muldiv_stall_cnt + 1;
+            if (csr_stall) csr_stall_cnt <= csr_stall_cnt + 1;
+            if (branch) branch_cnt <= branch_cnt + 1;
+            if (branch_flush) branch_flush_cnt <= branch_flush_cnt + 1;
+            if (trap_flush) trap_flush_cnt <= trap_flush_cnt + 1;
+            if (ibus_req && !ibus_waitrequest) ibus_req_cnt <= ibus_req_cnt + 1;
+            if (ibus_req && ibus_waitrequest) ibus_wait_cnt <= ibus_wait_cnt + 1;
+            if (dbus_req && !dbus_waitrequest) dbus_req_cnt <= dbus_req_cnt + 1;
+            if (dbus_req && dbus_waitrequest) dbus_wait_cnt <= dbus_wait_cnt + 1;
+            if (ram_req && !ram_waitrequest) ram_req_cnt <= ram_req_cnt + 1;
+            if (ram_req && ram_waitrequest) ram_wait_cnt <= ram_wait_cnt + 1;
+            if (icache_hit) icache_hit_cnt <= icache_hit_cnt + 1;
+            if (icache_miss) icache_miss_cnt <= icache_miss_cnt + 1;
+            if (icache_refill) icache_refill_cnt <= icache_refill_cnt + 1;
+            if (icache_uncached) icache_uncached_cnt <= icache_uncached_cnt + 1;
+            if (dcache_hit) dcache_hit_cnt <= dcache_hit_cnt + 1;
+            if (dcache_miss) dcache_miss_cnt <= dcache_miss_cnt + 1;
+            if (dcache_refill) dcache_refill_cnt <= dcache_refill_cnt + 1;
+            if (dcache_uncached) dcache_uncached_cnt <= dcache_uncached_cnt + 1;
+            if (dcache_writeback) dcache_writeback_cnt <= dcache_writeback_cnt + 1;
+        end
+    end
+
+endmodule
@@ -0,0 +1,85 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Cache unit testbench
+// ------------------------------------------------------------------------------------------------
+
+// The avalon structs of the cache are flattened so the core side and the memory side
+// can be driven by cocotb (see test_cache.py).
+
+`include "core.svh"
+
+module tb_cache #(
+    parameter CACHE_LINE_SIZE = 16,
+    parameter CACHE_SET_DEPTH = 8,
+    parameter CACHE_WAYS = 2,
+    parameter WRITE_BUFFER_DEPTH = 4
+) (
+    input                       clk,
+    input                       rst,
+
+    input                       flush,
+    input                       invalidate,
+    output                      miss,
+
+    input                       core_read,
+    input                       core_write,
+    input [`DATA_RANGE]         core_address,
+    input [`DATA_WIDTH/8-1:0]   core_byte_enable,
+    input [`DATA_RANGE]         core_writedata,
+    output [`DATA_RANGE]        core_readdata,
+    output                      core_waitrequest,
+
+    output                      mem_read,
+    output                      mem_write,
+    output [`DATA_RANGE]        mem_address,
+    output [`DATA_WIDTH/8-1:0]  mem_byte_enable,
+    output [`DATA_RANGE]        mem_writedata,
+    input [`DATA_RANGE]         mem_readdata,
+    input                       mem_waitrequest
+);
+
+    avalon_req_t    core_avn_req;
+    avalon_resp_t   core_avn_resp;
+    avalon_req_t    mem_avn_req;
+    avalon_resp_t   mem_avn_resp;
+
+    assign core_avn_req.read = core_read;
+    assign core_avn_req.write = core_write;
+    assign core_avn_req.address = core_address;
+    assign core_avn_req.byte_enable = core_byte_enable;
+    assign core_avn_req.writedata = core_writedata;
+    assign core_readdata = core_avn_resp.readdata;
+    assign core_waitrequest = core_avn_resp.waitrequest;
+
+    assign mem_read = mem_avn_req.read;
+    assign mem_write = mem_avn_req.write;
+    assign mem_address = mem_avn_req.address;
+    assign mem_byte_enable = mem_avn_req.byte_enable;
+    assign mem_writedata = mem_avn_req.writedata;
+    assign mem_avn_resp.readdata = mem_readdata;
+    assign mem_avn_resp.waitrequest = mem_waitrequest;
+
+    cache #(
+        .CACHE_LINE_SIZE    (CACHE_LINE_SIZE),
+        .CACHE_SET_DEPTH    (CACHE_SET_DEPTH),
+        .CACHE_WAYS         (CACHE_WAYS),
+        .WRITE_BUFFER_DEPTH (WRITE_BUFFER_DEPTH))
+    u_cache (
+        .clk                (clk),
+        .rst                (rst),
+        .flush              (flush),
+        .invalidate         (invalidate),
+        .miss               (miss),
+        .core_avn_req       (core_avn_req),
+        .core_avn_resp      (core_avn_resp),
+        .mem_avn_req        (mem_avn_req),
+        .mem_avn_resp       (mem_avn_resp)
+    );
+
+endmodule
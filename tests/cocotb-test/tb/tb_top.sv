@@ -9,16 +9,39 @@
 // Testbench
 // ------------------------------------------------------------------------------------------------
 
+`include "core.svh"
+
 module tb_top (
     input                   clk,
     input                   rst,
     inout [31:0]            gpio0,
     inout [31:0]            gpio1,
-    input                   uart_debug_en
+    input                   uart_debug_en,
+    input                   uart_tb_en,     // 1: the testbench drives uart_rxd instead of the loopback
+    input                   uart_tb_txd,
+    input                   debug_stall     // 1: hold the debug bus waitrequest high
 );
     parameter SRAM_AW   = 25;   // SRAM address width, a large size for riscv-arch-test
     parameter SRAM_DW   = 16;   // SRAM data width
 
+    // SoC parameters. Overridden from the command line (-G) by the cache sweep
+`ifdef USE_ICACHE
+    parameter ICACHE_LINE_SIZE  = 4;
+    parameter ICACHE_DEPTH      = 64;
+    parameter ICACHE_WAYS       = 2;
+`endif
+`ifdef USE_DCACHE
+    parameter DCACHE_LINE_SIZE  = 4;
+    parameter DCACHE_DEPTH      = 64;
+    parameter DCACHE_WAYS       = 1;
+    parameter DCACHE_WRITE_BUFFER = 8;
+`endif
+    parameter IFQ_DEPTH     = 16;
+    parameter BTB_DEPTH     = 32;
+    parameter BHT_DEPTH     = 64;
+    parameter BHT_GSHARE    = 0;
+    parameter RAS_DEPTH     = 4;
+
     `ifdef SRAM
         // the sram interface
         logic                   sram_ce_n;
@@ -44,12 +67,408 @@ module tb_top (
         .SRAM_AW    (SRAM_AW),
         .SRAM_DW    (SRAM_DW),
     `endif
+    `ifdef USE_ICACHE
+        .ICACHE_LINE_SIZE   (ICACHE_LINE_SIZE),
+        .ICACHE_DEPTH       (ICACHE_DEPTH),
+        .ICACHE_WAYS        (ICACHE_WAYS),
+    `endif
+    `ifdef USE_DCACHE
+        .DCACHE_LINE_SIZE   (DCACHE_LINE_SIZE),
+        .DCACHE_DEPTH       (DCACHE_DEPTH),
+        .DCACHE_WAYS        (DCACHE_WAYS),
+        .DCACHE_WRITE_BUFFER(DCACHE_WRITE_BUFFER),
+    `endif
+        .IFQ_DEPTH      (IFQ_DEPTH),
+        .BTB_DEPTH      (BTB_DEPTH),
+        .BHT_DEPTH      (BHT_DEPTH),
+        .BHT_GSHARE     (BHT_GSHARE),
+        .RAS_DEPTH      (RAS_DEPTH),
         .GPIO0_WIDTH    (32),
         .UART_BAUD_RATE (115200),
         .CLK_FREQ_MHZ   (50)
     ) u_veriRISCV_soc (.*);
 
-    assign uart_rxd = uart_txd;
+    assign uart_rxd = uart_tb_en ? uart_tb_txd : uart_txd;
     assign core_en  = 1'b1;
 
+    // ---------------------------------
+    // Test completion monitor
+    // ---------------------------------
+
+    // The testbench waits on these flags instead of polling the register file or the memory.
+    // - riscv-tests: RVTEST_PASS/RVTEST_FAIL write x1, x2 and x3 in order,
+    //   so the test completes when x3 is written while x1 and x2 hold the same result.
+    // - riscv-arch-test: RVMODEL_HALT writes END_SIGNATURE_PTR after BEGIN_SIGNATURE_PTR.
+
+    localparam END_SIGNATURE_PTR = 32'h3FF4;
+
+    logic           rf_write;
+    logic [4:0]     rf_regid;
+    logic [31:0]    rf_writedata;
+    logic [31:0]    rf_x1;
+    logic [31:0]    rf_x2;
+    logic           rf_pass;
+    logic           rf_fail;
+    logic           sig_write;
+
+    reg             test_reg_done;
+    reg             test_reg_pass;
+    reg             test_sig_done;
+
+    assign rf_write     = u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.reg_write;
+    assign rf_regid     = u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.reg_regid;
+    assign rf_writedata = u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.reg_writedata;
+    assign rf_x1        = u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.register_file[1];
+    assign rf_x2        = u_veriRISCV_soc.u_veriRISCV_core.u_ID.u_regfile.register_file[2];
+
+    assign rf_pass = rf_write & (rf_regid == 3) & (rf_writedata == 3)   & (rf_x1 == 1)   & (rf_x2 == 2);
+    assign rf_fail = rf_write & (rf_regid == 3) & (rf_writedata == 'hf) & (rf_x1 == 'hf) & (rf_x2 == 'hf);
+
+    assign sig_write = u_veriRISCV_soc.ram_avn_write & ~u_veriRISCV_soc.ram_avn_waitrequest &
+                       (u_veriRISCV_soc.ram_avn_address == END_SIGNATURE_PTR);
+
+    always @(posedge clk) begin
+        if (rst) begin
+            test_reg_done <= 1'b0;
+            test_reg_pass <= 1'b0;
+            test_sig_done <= 1'b0;
+        end
+        else begin
+            if (!test_reg_done && (rf_pass || rf_fail)) begin
+                test_reg_done <= 1'b1;
+                test_reg_pass <= rf_pass;
+            end
+            if (sig_write) test_sig_done <= 1'b1;
+        end
+    end
+
+    // ---------------------------------
+    // Software completion and UART monitor
+    // ---------------------------------
+
+    // - The SDK _exit is a self loop (jal x0, 0). The software test completes when it
+    //   retires in WB and the UART has sent all the characters in the tx fifo.
+    // - The characters sent by UART0 are captured when they enter the transmitter
+    //   and written to stdout and the UART_LOG file (default uart.log).
+
+    localparam EXIT_INSTRUCTION = 32'h0000006f;
+
+    logic           sw_exit;
+    logic           uart_tx_idle;
+    reg             test_sw_exit;
+    reg             test_sw_done;
+
+    assign sw_exit = u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_ctrl.valid &
+                     ~u_veriRISCV_soc.u_veriRISCV_core.wb_stall &
+                     (u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.instruction == EXIT_INSTRUCTION);
+
+    assign uart_tx_idle = u_veriRISCV_soc.uart_0.txfifo_empty & u_veriRISCV_soc.uart_0.tx_ready;
+
+    always @(posedge clk) begin
+        if (rst) begin
+            test_sw_exit <= 1'b0;
+            test_sw_done <= 1'b0;
+        end
+        else begin
+            if (sw_exit) test_sw_exit <= 1'b1;
+            if (test_sw_exit && uart_tx_idle) test_sw_done <= 1'b1;
+        end
+    end
+
+    integer uart_log;
+    string  uart_log_file;
+
+    initial begin
+        if (!$value$plusargs("UART_LOG=%s", uart_log_file)) uart_log_file = "uart.log";
+        uart_log = $fopen(uart_log_file, "w");
+    end
+
+    always @(posedge clk) begin
+        if (!rst && u_veriRISCV_soc.uart_0.txfifo_pop) begin
+            $write("%c", u_veriRISCV_soc.uart_0.txfifo_dout);
+            $fwrite(uart_log, "%c", u_veriRISCV_soc.uart_0.txfifo_dout);
+            if (u_veriRISCV_soc.uart_0.txfifo_dout == 8'h0A) $fflush(uart_log);
+        end
+    end
+
+    // ---------------------------------
+    // Co-simulation monitor
+    // ---------------------------------
+
+    // Latch the instruction leaving WB (retired or trapped) and the interrupts taken by the core.
+    // cosim_seq toggles on each event so the testbench (CoSim.py, CommitTrace.py) only wakes up once per event.
+
+    logic           wb_event;
+    logic           int_event;
+
+    reg             cosim_seq;
+    reg [31:0]      cosim_pc;
+    reg [31:0]      cosim_instruction;
+    reg             cosim_retire;
+    reg             cosim_exception;
+    reg             cosim_reg_write;
+    reg [4:0]       cosim_reg_regid;
+    reg [31:0]      cosim_reg_writedata;
+    reg             cosim_interrupt;
+    reg [30:0]      cosim_cause;
+    reg [31:0]      cosim_mem_address;
+    reg [31:0]      cosim_cycle;
+    reg [31:0]      cosim_cycle_cnt;    // cycles since the reset release
+
+    assign wb_event  = u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_ctrl.valid &
+                       ~u_veriRISCV_soc.u_veriRISCV_core.wb_stall;
+    assign int_event = u_veriRISCV_soc.u_veriRISCV_core.u_WB.u_trap_ctrl.interrupt_enter;
+
+    always @(posedge clk) begin
+        if (rst) cosim_cycle_cnt <= 0;
+        else cosim_cycle_cnt <= cosim_cycle_cnt + 1;
+    end
+
+    always @(posedge clk) begin
+        if (rst) begin
+            cosim_seq <= 1'b0;
+        end
+        else if (wb_event || int_event) begin
+            cosim_seq           <= ~cosim_seq;
+            cosim_pc            <= u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.pc;
+            cosim_instruction   <= u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.instruction;
+            cosim_retire        <= wb_event;
+            cosim_exception     <= |u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_exc;
+            cosim_reg_write     <= u_veriRISCV_soc.u_veriRISCV_core.wb_reg_write;
+            cosim_reg_regid     <= u_veriRISCV_soc.u_veriRISCV_core.wb_reg_regid;
+            cosim_reg_writedata <= u_veriRISCV_soc.u_veriRISCV_core.wb_reg_writedata;
+            cosim_interrupt     <= int_event;
+            cosim_cause         <= u_veriRISCV_soc.u_veriRISCV_core.u_WB.u_trap_ctrl.mcause_exception_code;
+            cosim_mem_address   <= u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.mem_address;
+            cosim_cycle         <= cosim_cycle_cnt;
+        end
+    end
+
+    // ---------------------------------
+    // Cache access trace
+    // ---------------------------------
+
+    // +CACHE_TRACE=<file> writes each request accepted on the core side of the instruction and data bus,
+    // one line per access: 'i <address>' fetch, 'r <address>' load, 'w <address>' store.
+    // The trace is replayed by the offline cache model (CacheModel.py).
+
+    integer         cache_trace;
+    string          cache_trace_file;
+
+    initial begin
+        cache_trace = 0;
+        if ($value$plusargs("CACHE_TRACE=%s", cache_trace_file)) cache_trace = $fopen(cache_trace_file, "w");
+    end
+
+    always @(posedge clk) begin
+        if (!rst && cache_trace != 0) begin
+            if (u_veriRISCV_soc.u_veriRISCV_core.u_IF.ibus_avalon_req.read &&
+                !u_veriRISCV_soc.u_veriRISCV_core.u_IF.ibus_avalon_resp.waitrequest)
+                $fwrite(cache_trace, "i %h\n", u_veriRISCV_soc.u_veriRISCV_core.u_IF.ibus_avalon_req.address);
+            if ((u_veriRISCV_soc.u_veriRISCV_core.u_MEM.dbus_avalon_req.read ||
+                 u_veriRISCV_soc.u_veriRISCV_core.u_MEM.dbus_avalon_req.write) &&
+                !u_veriRISCV_soc.u_veriRISCV_core.u_MEM.dbus_avalon_resp.waitrequest)
+                $fwrite(cache_trace, "%s %h\n", u_veriRISCV_soc.u_veriRISCV_core.u_MEM.dbus_avalon_req.write ? "w" : "r",
+                        u_veriRISCV_soc.u_veriRISCV_core.u_MEM.dbus_avalon_req.address);
+        end
+    end
+
+    final begin
+        if (cache_trace != 0) $fclose(cache_trace);
+    end
+
+    // ---------------------------------
+    // Profiler shadow call stack
+    // ---------------------------------
+
+    // Track the calls and returns leaving WB so the sampling profiler (Profiler.py) can read the call
+    // stack of each sample without tracing every instruction. prof_stack holds the pc of each call site.
+    // call:   jal/jalr with rd = x1/x5, trap entry (exception or interrupt)
+    // return: jalr x0 with rs1 = x1/x5, mret
+
+    localparam PROF_STACK_DEPTH = 64;
+
+    logic [31:0]    prof_pc;
+    logic [31:0]    prof_instruction;
+    logic           prof_exception;
+    logic           prof_call;
+    logic           prof_return;
+
+    reg [31:0]      prof_stack[PROF_STACK_DEPTH-1:0];
+    reg [15:0]      prof_depth;         // may exceed PROF_STACK_DEPTH, the deeper frames are not recorded
+
+    assign prof_pc          = u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.pc;
+    assign prof_instruction = u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_data.instruction;
+    assign prof_exception   = |u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_exc;
+    assign prof_call        = (wb_event & prof_exception) | int_event |
+                              (wb_event & (prof_instruction[6:0] == 7'h6F || prof_instruction[6:0] == 7'h67) &
+                               (prof_instruction[11:7] == 5'd1 || prof_instruction[11:7] == 5'd5));
+    assign prof_return      = wb_event & ~prof_exception &
+                              ((prof_instruction == 32'h30200073) |
+                               ((prof_instruction[6:0] == 7'h67) & (prof_instruction[11:7] == 5'd0) &
+                                (prof_instruction[19:15] == 5'd1 || prof_instruction[19:15] == 5'd5)));
+
+    always @(posedge clk) begin
+        if (rst) begin
+            prof_depth <= 0;
+        end
+        else if (prof_call) begin
+            if (prof_depth < PROF_STACK_DEPTH) prof_stack[prof_depth[5:0]] <= prof_pc;
+            prof_depth <= prof_depth + 1;
+        end
+        else if (prof_return && prof_depth != 0) begin
+            prof_depth <= prof_depth - 1;
+        end
+    end
+
+    // ---------------------------------
+    // Performance monitor
+    // ---------------------------------
+
+    localparam CACHE_IDLE = 0;
+
+    logic           icache_hit;
+    logic           icache_miss;
+    logic           icache_refill;
+    logic           icache_uncached;
+    logic           dcache_hit;
+    logic           dcache_miss;
+    logic           dcache_refill;
+    logic           dcache_uncached;
+    logic           dcache_writeback;
+
+`ifdef USE_ICACHE
+    assign icache_hit       = (u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.state == CACHE_IDLE) &
+                              u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.cache_hit &
+                              ~u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.non_cacheable;
+    assign icache_miss      = u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.miss;
+    assign icache_refill    = |u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.set_fill;
+    assign icache_uncached  = u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.cache_access &
+                              u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.non_cacheable &
+                              ~u_veriRISCV_soc.u_veriRISCV_core.u_instruction_cache.core_avn_resp.waitrequest;
+`else
+    assign icache_hit       = 1'b0;
+    assign icache_miss      = 1'b0;
+    assign icache_refill    = 1'b0;
+    assign icache_uncached  = 1'b0;
+`endif
+
+`ifdef USE_DCACHE
+    assign dcache_hit       = (u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.state == CACHE_IDLE) &
+                              u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.cache_hit &
+                              ~u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.non_cacheable;
+    assign dcache_miss      = u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.miss;
+    assign dcache_refill    = |u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.set_fill;
+    assign dcache_uncached  = u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.cache_access &
+                              u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.non_cacheable &
+                              ~u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.core_avn_resp.waitrequest;
+    assign dcache_writeback = u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.wb_pop &
+                              ~u_veriRISCV_soc.u_veriRISCV_core.u_data_cache.wb_empty;
+`else
+    assign dcache_hit       = 1'b0;
+    assign dcache_miss      = 1'b0;
+    assign dcache_refill    = 1'b0;
+    assign dcache_uncached  = 1'b0;
+    assign dcache_writeback = 1'b0;
+`endif
+
+    perf_monitor u_perf_monitor (
+        .clk                (clk),
+        .rst                (rst),
+        .retire             (u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_ctrl.valid &
+                             ~u_veriRISCV_soc.u_veriRISCV_core.wb_stall &
+                             ~(|u_veriRISCV_soc.u_veriRISCV_core.mem2wb_pipeline_exc)),
+        .if_stall           (u_veriRISCV_soc.u_veriRISCV_core.if_stall),
+        .id_stall           (u_veriRISCV_soc.u_veriRISCV_core.id_stall),
+        .id_empty           (~u_veriRISCV_soc.u_veriRISCV_core.if2id_pipeline_ctrl.valid),
+        .dbus_busy          (u_veriRISCV_soc.u_veriRISCV_core.lsu_dbus_busy),
+        .load_stall         (u_veriRISCV_soc.u_veriRISCV_core.hdu_load_stall_req),
+        .muldiv_stall       (u_veriRISCV_soc.u_veriRISCV_core.muldiv_stall_req),
+        .csr_stall          (u_veriRISCV_soc.u_veriRISCV_core.u_hdu.csr_stall),
+        .branch             (u_veriRISCV_soc.u_veriRISCV_core.hpm_event[`HPM_EVENT_BRANCH]),
+        .branch_flush       (u_veriRISCV_soc.u_veriRISCV_core.branch_mispredict & ~u_veriRISCV_soc.u_veriRISCV_core.lsu_dbus_busy),
+        .trap_flush         (u_veriRISCV_soc.u_veriRISCV_core.trap_take),
+        .ibus_req           (u_veriRISCV_soc.ibus_avn_read),
+        .ibus_waitrequest   (u_veriRISCV_soc.ibus_avn_waitrequest),
+        .dbus_req           (u_veriRISCV_soc.dbus_avn_read | u_veriRISCV_soc.dbus_avn_write),
+        .dbus_waitrequest   (u_veriRISCV_soc.dbus_avn_waitrequest),
+        .ram_req            (u_veriRISCV_soc.ram_avn_read | u_veriRISCV_soc.ram_avn_write),
+        .ram_waitrequest    (u_veriRISCV_soc.ram_avn_waitrequest),
+        .*
+    );
+
+    // ---------------------------------
+    // Debug bus stall injection
+    // ---------------------------------
+
+    // test_uart_host.py sets debug_stall to stall the debug bus so the uart host command fifo fills up.
+
+`ifdef COCOTB_SIM
+    always @(debug_stall) begin
+        if (debug_stall) force u_veriRISCV_soc.debug_avn_waitrequest = 1'b1;
+        else release u_veriRISCV_soc.debug_avn_waitrequest;
+    end
+`endif
+
+    // ---------------------------------
+    // Per test coverage
+    // ---------------------------------
+
+    // Compiled in with COVR=1. Pulsing cov_save writes the coverage of the test to COVERAGE_FILE
+    // (default coverage_test.dat) and clears the counters for the next test (see tb/coverage_dpi.cpp).
+
+`ifdef COVERAGE_DPI
+    import "DPI-C" function void coverage_save(input string file);
+
+    reg             cov_save = 1'b0;
+    string          cov_file;
+
+    initial begin
+        if (!$value$plusargs("COVERAGE_FILE=%s", cov_file)) cov_file = "coverage_test.dat";
+    end
+
+    always @(posedge cov_save) coverage_save(cov_file);
+`endif
+
+    // ---------------------------------
+    // Windowed waveform dump
+    // ---------------------------------
+
+    // Compiled in with WAVE=1 for the failure re-run (see WaveOnFail.py).
+    // The dump starts WAVE_START cycles after the reset release and the simulation finishes after WAVE_CYCLES
+    // cycles (0: dump till the end). The waveform is written to WAVE_FILE (default wave.fst).
+
+`ifdef WAVE_WINDOW
+    reg [31:0]      wave_cycle;
+    reg             wave_on;
+    int unsigned    wave_start;
+    int unsigned    wave_cycles;
+    string          wave_file;
+
+    import "DPI-C" function void wave_trace_on();
+
+    initial begin
+        wave_trace_on();
+        if (!$value$plusargs("WAVE_FILE=%s", wave_file)) wave_file = "wave.fst";
+        if (!$value$plusargs("WAVE_START=%d", wave_start)) wave_start = 0;
+        if (!$value$plusargs("WAVE_CYCLES=%d", wave_cycles)) wave_cycles = 0;
+        wave_on = 1'b0;
+    end
+
+    always @(posedge clk) begin
+        if (rst) wave_cycle <= 0;
+        else wave_cycle <= wave_cycle + 1;
+        if (!rst && !wave_on && wave_cycle == wave_start) begin
+            wave_on <= 1'b1;
+            $dumpfile(wave_file);
+            $dumpvars(0, tb_top);
+        end
+        // $dumpoff is not supported by verilator, end the re-run instead
+        if (wave_on && wave_cycles != 0 && wave_cycle == wave_start + wave_cycles) begin
+            $display("[TB] waveform window ends at cycle %0d, stop the simulation", wave_cycle);
+            $finish;
+        end
+    end
+`endif
+
 endmodule
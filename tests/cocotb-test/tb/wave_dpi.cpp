@@ -0,0 +1,18 @@
+// ------------------------------------------------------------------------------------------------
+// Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+// Author: Heqing Huang
+//
+// Date Created: 10/18/2026
+// ------------------------------------------------------------------------------------------------
+// veriRISCV
+// ------------------------------------------------------------------------------------------------
+// Windowed waveform dump: enable the verilator tracing for $dumpvars
+// ------------------------------------------------------------------------------------------------
+
+#include "verilated.h"
+
+// The cocotb main only enables the tracing with its own --trace dump of the whole run.
+// tb_top calls this at time 0 so its $dumpvars can open the windowed dump instead.
+extern "C" void wave_trace_on() {
+    Verilated::traceEverOn(true);
+}
@@ -0,0 +1,294 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Cache unit test
+# ------------------------------------------------------------------------------------------------
+
+"""
+Test the cache alone (tb/tb_cache.sv). The testbench drives the core side of the cache and models the
+memory side: an avalon slave with one cycle read latency and random waitrequest.
+Every read returned to the core is checked against a reference memory.
+The flush and invalidate inputs of the cache are driven as ('f',) and ('i',) requests.
+
+Usage:
+    make cache_test PARAMS="CACHE_LINE_SIZE=32 CACHE_SET_DEPTH=8 CACHE_WAYS=4"
+"""
+
+import random
+
+import cocotb
+from cocotb.triggers import FallingEdge, ReadOnly
+
+from env import startClock
+
+UNCACHED = 0x80000000
+
+def initWord(address):
+    """ Initial content of the memory """
+    return (address * 2654435761 + 0x12345678) & 0xFFFFFFFF
+
+def mergeWord(old, data, byteenable):
+    for i in range(4):
+        if byteenable >> i & 1:
+            mask = 0xFF << (8 * i)
+            old = (old & ~mask) | (data & mask)
+    return old
+
+class CacheTB:
+
+    def __init__(self, dut, waitrequest=0.0, seed=0):
+        """
+            @param dut: the tb_cache
+            @param waitrequest: probability of the memory asserting waitrequest in a cycle,
+                                or 'sram' for a memory taking a request every other cycle
+            @param seed: random seed
+        """
+        self.dut = dut
+        self.lineSize = int(dut.CACHE_LINE_SIZE.value)
+        self.depth = int(dut.CACHE_SET_DEPTH.value)
+        self.ways = int(dut.CACHE_WAYS.value)
+        self.bufferDepth = int(dut.WRITE_BUFFER_DEPTH.value)
+        self.lineWords = self.lineSize // 4
+        self.waitrequest = waitrequest
+        self.random = random.Random(seed)
+        self.memory = {}        # word address => data on the memory side
+        self.ref = {}           # word address => data seen by the core
+        self.memLog = []        # (cycle, 'r'/'w', address, data) accepted on the memory side
+        self.coreLog = []       # (cycle, 'r'/'w', address) accepted on the core side
+        self.cycle = 0
+        self.memReadAddress = None
+        self.memStalled = None  # memory request stalled by waitrequest in the last cycle
+        self.misses = 0         # cycles with the miss output asserted
+
+    async def reset(self):
+        dut = self.dut
+        await FallingEdge(dut.clk)
+        dut.rst.value = 1
+        dut.core_read.value = 0
+        dut.core_write.value = 0
+        dut.flush.value = 0
+        dut.invalidate.value = 0
+        dut.core_address.value = 0
+        dut.core_byte_enable.value = 0
+        dut.core_writedata.value = 0
+        dut.mem_readdata.value = 0
+        dut.mem_waitrequest.value = 0
+        self.misses = 0
+        for _ in range(3):
+            await FallingEdge(dut.clk)
+        dut.rst.value = 0
+
+    def memWait(self):
+        if self.waitrequest == 'sram':
+            return self.cycle % 2 == 0
+        return self.random.random() < self.waitrequest
+
+    async def run(self, ops, idle=0):
+        """
+            Run the core requests and check the read data
+            @param ops: list of ('r', address), ('w', address, data, byteenable), ('f',) or ('i',)
+            @param idle: number of idle cycles after the requests
+        """
+        dut = self.dut
+        ops = list(ops)
+        index = 0
+        expect = None
+        end = None
+        while end is None or self.cycle < end:
+            if end is None and index == len(ops) and expect is None:
+                end = self.cycle + idle
+                continue
+            await FallingEdge(dut.clk)
+            # memory side: read data of the read taken in the last cycle
+            if self.memReadAddress is not None:
+                dut.mem_readdata.value = self.memory.get(self.memReadAddress, initWord(self.memReadAddress))
+                self.memReadAddress = None
+            else:
+                dut.mem_readdata.value = self.random.getrandbits(32)
+            dut.mem_waitrequest.value = int(self.memWait())
+            # core side: the request is held until it is taken
+            op = ops[index] if index < len(ops) else None
+            dut.core_read.value = int(op is not None and op[0] == 'r')
+            dut.core_write.value = int(op is not None and op[0] == 'w')
+            dut.flush.value = int(op is not None and op[0] == 'f')
+            dut.invalidate.value = int(op is not None and op[0] == 'i')
+            if op is not None and op[0] in 'rw':
+                dut.core_address.value = op[1]
+                dut.core_writedata.value = op[2] if op[0] == 'w' else 0
+                dut.core_byte_enable.value = op[3] if op[0] == 'w' else 0xF
+            await ReadOnly()
+
+            if expect is not None:
+                address, data = expect
+                readdata = dut.core_readdata.value.integer
+                assert readdata == data, \
+                    f"Cycle {self.cycle}: read {address:08x} got {readdata:08x}, expected {data:08x}"
+                expect = None
+
+            # avalon: a request stalled by waitrequest is held until it is taken
+            request = None
+            if dut.mem_read.value or dut.mem_write.value:
+                request = (int(dut.mem_read.value), int(dut.mem_write.value), dut.mem_address.value.integer,
+                           dut.mem_writedata.value.integer if dut.mem_write.value else None,
+                           dut.mem_byte_enable.value.integer)
+            assert self.memStalled is None or request == self.memStalled, \
+                f"Cycle {self.cycle}: memory request changed while stalled, {self.memStalled} => {request}"
+            self.memStalled = request if dut.mem_waitrequest.value else None
+
+            if request is not None and not dut.mem_waitrequest.value:
+                address = dut.mem_address.value.integer & ~3
+                if dut.mem_read.value:
+                    self.memReadAddress = address
+                    self.memLog.append((self.cycle, 'r', address, None))
+                else:
+                    old = self.memory.get(address, initWord(address))
+                    data = mergeWord(old, dut.mem_writedata.value.integer, dut.mem_byte_enable.value.integer)
+                    self.memory[address] = data
+                    self.memLog.append((self.cycle, 'w', address, data))
+
+            self.misses += int(dut.miss.value)
+
+            # invalidate has no handshake
+            if op is not None and (op[0] == 'i' or not dut.core_waitrequest.value):
+                address = op[1] & ~3 if op[0] in 'rw' else None
+                if op[0] == 'r':
+                    expect = (address, self.ref.get(address, initWord(address)))
+                elif op[0] == 'w':
+                    self.ref[address] = mergeWord(self.ref.get(address, initWord(address)), op[2], op[3])
+                self.coreLog.append((self.cycle, op[0], address))
+                index += 1
+            self.cycle += 1
+
+    def lineAddress(self, tag, set, word=0):
+        return (tag * self.depth + set) * self.lineSize + word * 4
+
+    def randomOps(self, count, uncached=0.05, writes=0.3):
+        """ Random accesses to a few more lines than the cache can hold per set, with sequential runs """
+        tags = self.ways + 2
+        ops = []
+        while len(ops) < count:
+            address = self.lineAddress(self.random.randrange(tags), self.random.randrange(self.depth),
+                                       self.random.randrange(self.lineWords))
+            if self.random.random() < uncached:
+                address |= UNCACHED
+            for i in range(self.random.choice([1, 1, 2, self.lineWords])):
+                if self.random.random() < writes:
+                    ops.append(('w', address + 4 * i, self.random.getrandbits(32), self.random.randrange(1, 16)))
+                else:
+                    ops.append(('r', address + 4 * i))
+        return ops
+
+    def memReads(self, start=0):
+        return [address for cycle, op, address, _ in self.memLog[start:] if op == 'r']
+
+    def memWrites(self, start=0):
+        return {address: data for cycle, op, address, data in self.memLog[start:] if op == 'w'}
+
+@cocotb.test()
+async def cache_random(dut):
+    """ Random reads and writes with dirty evictions and uncached accesses, random memory waitrequest """
+    startClock(dut)
+    for seed, waitrequest in enumerate([0.0, 0.5, 'sram']):
+        tb = CacheTB(dut, waitrequest, seed)
+        await tb.reset()
+        await tb.run(tb.randomOps(3000))
+        # read back all the lines
+        ops = [('r', tb.lineAddress(tag, set, word)) for tag in range(tb.ways + 2)
+               for set in range(tb.depth) for word in range(tb.lineWords)]
+        await tb.run(ops)
+        writebacks = sum(1 for log in tb.memLog if log[1] == 'w')
+        # each miss refills one line
+        refills = sum(1 for log in tb.memLog if log[1] == 'r' and not log[2] & 0x80000000)
+        assert refills == tb.misses * tb.lineWords, f"{tb.misses} misses, {refills} words refilled"
+        dut._log.info(f"waitrequest={waitrequest}: {tb.cycle} cycles, {len(tb.coreLog)} requests, "
+                      f"{len(tb.memLog) - writebacks} memory reads, {writebacks} memory writes")
+
+@cocotb.test()
+async def cache_critical_word_first(dut):
+    """ The line is refilled from the critical word and the sequential reads follow the refill """
+    startClock(dut)
+    for waitrequest in [0.0, 'sram']:
+        tb = CacheTB(dut, waitrequest)
+        await tb.reset()
+        for word in range(tb.lineWords):
+            address = tb.lineAddress(1 + word // tb.depth, word % tb.depth, word)
+            start = len(tb.memLog)
+            ops = [('r', address + 4 * i) for i in range(tb.lineWords - word)]
+            await tb.run(ops, idle=tb.lineWords * 2)
+            reads = tb.memReads(start)
+            expected = [(address & ~(tb.lineSize - 1)) + 4 * ((word + i) % tb.lineWords) for i in range(tb.lineWords)]
+            assert reads == expected, f"Refill order {[hex(a) for a in reads]}, expected {[hex(a) for a in expected]}"
+            # each sequential read is taken in the same cycle as its word is requested from the memory
+            cores = [cycle for cycle, _, _ in tb.coreLog[-len(ops):]]
+            mems = [cycle for cycle, _, _, _ in tb.memLog[start:start + len(ops)]]
+            assert cores == mems, f"Core reads taken at {cores}, memory reads taken at {mems}"
+
+@cocotb.test()
+async def cache_writeback(dut):
+    """ A dirty line is written back to its own address when evicted """
+    startClock(dut)
+    tb = CacheTB(dut)
+    await tb.reset()
+    data = [tb.random.getrandbits(32) for _ in range(tb.lineWords)]
+    line = tb.lineAddress(0, 3)
+    await tb.run([('w', line + 4 * i, data[i], 0xF) for i in range(tb.lineWords)])
+    # evict the line with the other lines of the same set
+    start = len(tb.memLog)
+    await tb.run([('r', tb.lineAddress(tag, 3)) for tag in range(1, tb.ways + 1)], idle=tb.lineWords + 2)
+    writes = tb.memWrites(start)
+    assert writes == {line + 4 * i: data[i] for i in range(tb.lineWords)}, f"Write back {writes}"
+    await tb.run([('r', line + 4 * i) for i in range(tb.lineWords)])
+
+@cocotb.test()
+async def cache_write_buffer(dut):
+    """ The refill does not wait for the write back of the victim line and the uncached access waits for it """
+    startClock(dut)
+    for waitrequest in [0.0, 'sram']:
+        tb = CacheTB(dut, waitrequest)
+        await tb.reset()
+        line = tb.lineAddress(0, 5)
+        await tb.run([('w', line + 4 * i, tb.random.getrandbits(32), 0xF) for i in range(tb.lineWords)])
+        start = len(tb.memLog)
+        ops = [('r', tb.lineAddress(tag, 5)) for tag in range(1, tb.ways + 1)]
+        ops += [('w', UNCACHED | line, 0x5a5a5a5a, 0xF)]
+        await tb.run(ops)
+        log = tb.memLog[start:]
+        writes = [cycle for cycle, op, address, _ in log if op == 'w' and not address & UNCACHED]
+        reads = [cycle for cycle, op, _, _ in log if op == 'r']
+        uncached = [cycle for cycle, op, address, _ in log if address & UNCACHED]
+        assert len(writes) == tb.lineWords, f"Write back {len(writes)} words"
+        if tb.bufferDepth >= tb.lineWords:
+            assert reads[0] < writes[-1], f"Refill read at {reads[0]} waits for the write back done at {writes[-1]}"
+        assert uncached and uncached[0] > writes[-1], f"Uncached write at {uncached} before the write back {writes}"
+        # the victim line is read back after it is written into the memory
+        await tb.run([('r', line + 4 * i) for i in range(tb.lineWords)])
+
+@cocotb.test()
+async def cache_flush(dut):
+    """ flush writes back all the dirty lines and keeps them in the cache, invalidate drops all the lines """
+    startClock(dut)
+    for waitrequest in [0.0, 0.5]:
+        tb = CacheTB(dut, waitrequest, seed=1)
+        await tb.reset()
+        await tb.run(tb.randomOps(1000, uncached=0))
+        # the memory has all the writes after the flush
+        await tb.run([('f',)])
+        for address, data in tb.ref.items():
+            assert tb.memory.get(address, initWord(address)) == data, f"Flush: {address:08x} is not written back"
+        # nothing left to write back and the lines are still valid
+        start = len(tb.memLog)
+        await tb.run([('f',)])
+        assert not tb.memWrites(start), f"Second flush writes {tb.memWrites(start)}"
+        line = tb.lineAddress(0, 1)
+        await tb.run([('r', line)], idle=tb.lineWords * 4)
+        start = len(tb.memLog)
+        await tb.run([('r', line)])
+        assert not tb.memReads(start), "Read after flush misses"
+        # the line is refilled after invalidate
+        await tb.run([('i',), ('r', line)])
+        assert tb.memReads(start)[:1] == [line], f"Read after invalidate: {[hex(a) for a in tb.memReads(start)]}"
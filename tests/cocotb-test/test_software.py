@@ -31,3 +31,11 @@ async def uart_rw(dut):
 @cocotb.test()
 async def coremark(dut):
     await software_tests(dut, 'coremark', timeout=30000)
+
+@cocotb.test()
+async def fibonacci(dut):
+    await software_tests(dut, 'fibonacci', timeout=1000)
+
+@cocotb.test()
+async def hpm_counter(dut):
+    await software_tests(dut, 'hpm_counter', timeout=20000)
@@ -0,0 +1,130 @@
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 10/18/2026
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Test for the uart host burst write and baud rate command
+# ------------------------------------------------------------------------------------------------
+
+import random
+import zlib
+
+import cocotb
+from cocotb.triggers import Timer, FallingEdge
+
+from env import ENV, startClock, CLK_PERIOD
+
+# The keys are sent LSB first. See avalon_uart_host.sv
+WRITE_START_KEY = bytes([0x11, 0x11, 0x11, 0x11, 0x50, 0x50, 0x50, 0x50])
+END_KEY         = bytes([0xEE, 0xEE, 0xEE, 0xEE, 0x50, 0x50, 0x50, 0x50])
+BAUD_KEY        = bytes([0x33, 0x33, 0x33, 0x33, 0x50, 0x50, 0x50, 0x50])
+BURST_KEY       = bytes([0x44, 0x44, 0x44, 0x44, 0x50, 0x50, 0x50, 0x50])
+
+UART_DIV        = 50 * 1000000 // 115200    # CLK_FREQ_MHZ and UART_BAUD_RATE of tb_top
+FAST_DIV        = 99
+
+class UartDriver:
+    """ Drive uart_tb_txd (the uart host rx) and receive from uart_txd """
+
+    def __init__(self, dut, div):
+        self.dut = dut
+        self.setDiv(div)
+
+    def setDiv(self, div):
+        """ The uart_baud counter reloads with div + 1 and fires at 0 """
+        self.bitTime = (div + 2) * CLK_PERIOD
+
+    async def send(self, data):
+        for byte in data:
+            for bit in [0] + [(byte >> i) & 1 for i in range(8)] + [1]:
+                self.dut.uart_tb_txd.value = bit
+                await Timer(self.bitTime, units="ns")
+
+    async def recv(self, size):
+        data = bytearray()
+        for _ in range(size):
+            await FallingEdge(self.dut.uart_txd)
+            await Timer(self.bitTime * 3 // 2, units="ns")  # middle of bit 0
+            byte = 0
+            for i in range(8):
+                byte |= self.dut.uart_txd.value.integer << i
+                await Timer(self.bitTime, units="ns")
+            data.append(byte)
+        return data
+
+async def uartHostSetup(dut, name):
+    """ Reset the SoC with the testbench driving the uart host and switch to the fast baud rate """
+    env = ENV(dut, name, 'UART_HOST_TEST', '')
+    env.getMemoryConfig()
+    await env.clearMemory()
+    dut.uart_tb_en.value = 1
+    dut.uart_tb_txd.value = 1
+    dut.uart_debug_en.value = 1
+    dut.debug_stall.value = 0
+    startClock(dut)
+    await env.reset()
+
+    uart = UartDriver(dut, UART_DIV)
+    await uart.send(BAUD_KEY + FAST_DIV.to_bytes(2, 'little') + bytes(6))
+    uart.setDiv(FAST_DIV)
+    return env, uart
+
+async def checkBurst(env, burst, burstAddr, crc):
+    assert crc == zlib.crc32(burst), f"CRC mismatch. Expected {hex(zlib.crc32(burst))}. Actual {hex(crc)}"
+    data = await env.readMemory(burstAddr, burstAddr + len(burst))
+    mismatch = [hex(burstAddr + i) for i in range(0, len(burst), 4) if data[i:i+4] != burst[i:i+4]]
+    assert not mismatch, f"Burst write mismatch at {mismatch}"
+
+@cocotb.test()
+async def uart_host_burst(dut):
+    """ Switch the baud rate, then write a single word and a burst and check the memory and the CRC """
+    env, uart = await uartHostSetup(dut, 'uart_host_burst')
+
+    single = random.getrandbits(32).to_bytes(4, 'little')
+    burst = bytes(random.getrandbits(8) for _ in range(32 * 4))
+    singleAddr = 0x100
+    burstAddr = 0x200
+
+    await uart.send(WRITE_START_KEY)
+    await uart.send(singleAddr.to_bytes(4, 'little') + single)
+    await uart.send(BURST_KEY + burstAddr.to_bytes(4, 'little') + (len(burst) // 4).to_bytes(4, 'little'))
+    recv = cocotb.fork(uart.recv(4))
+    await uart.send(burst)
+    crc = int.from_bytes(await recv, 'little')
+    await uart.send(END_KEY)
+
+    assert await env.readMemory(singleAddr, singleAddr + 4) == single, "Single word write mismatch"
+    await checkBurst(env, burst, burstAddr, crc)
+
+@cocotb.test()
+async def uart_host_burst_fifo_full(dut):
+    """ Stall the bus in the middle of a burst so the command fifo fills up, no word should be lost or shifted """
+    env, uart = await uartHostSetup(dut, 'uart_host_burst_fifo_full')
+
+    burst = bytes(random.getrandbits(8) for _ in range(16 * 4))
+    burstAddr = 0x200
+    wordTime = uart.bitTime * 10 * 4
+    host = dut.u_veriRISCV_soc.u_avalon_uart_host
+
+    async def stallBus():
+        # Stall the debug bus while 3 words are received: 2 words fill the command fifo and the 3rd one has to wait
+        await Timer(wordTime * 9 // 2, units="ns")
+        dut.debug_stall.value = 1
+        await Timer(wordTime * 3, units="ns")
+        full = host.cmd_fifo_full.value.integer
+        dut.debug_stall.value = 0
+        return full
+
+    await uart.send(WRITE_START_KEY)
+    await uart.send(BURST_KEY + burstAddr.to_bytes(4, 'little') + (len(burst) // 4).to_bytes(4, 'little'))
+    recv = cocotb.fork(uart.recv(4))
+    stall = cocotb.fork(stallBus())
+    await uart.send(burst)
+    crc = int.from_bytes(await recv, 'little')
+    await uart.send(END_KEY)
+
+    assert await stall, "The command fifo did not fill up during the bus stall"
+    await checkBurst(env, burst, burstAddr, crc)
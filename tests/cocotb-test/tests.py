@@ -191,6 +191,10 @@ async def riscv_tests_sh(dut):
 async def riscv_tests_sw(dut):
     await riscv_tests(dut, 'rv32ui-p-sw')
 
+@cocotb.test()
+async def riscv_tests_fence_i(dut):
+    await riscv_tests(dut, 'rv32ui-p-fence_i')
+
 @cocotb.test()
 async def riscv_tests_mcsr(dut):
     await riscv_tests(dut, 'rv32mi-p-mcsr')
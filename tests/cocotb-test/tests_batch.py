@@ -0,0 +1,132 @@
+
+# ------------------------------------------------------------------------------------------------
+# Copyright 2022 by Heqing Huang (feipenghhq@gamil.com)
+# Author: Heqing Huang
+#
+# Date Created: 2026-10-18
+# ------------------------------------------------------------------------------------------------
+# veriRISCV
+# ------------------------------------------------------------------------------------------------
+# Batch mode: run all the tests back to back in one simulation
+# ------------------------------------------------------------------------------------------------
+
+from env import batch_tests, riscv_tests_env, riscv_arch_test_env, sanity_test_env, dedicated_tests_env
+import cocotb
+
+@cocotb.test()
+async def batch(dut):
+    envs = []
+
+    # sanity Test
+    envs.append(sanity_test_env(dut, 'logic_simple'))
+    envs.append(sanity_test_env(dut, 'logic_forward'))
+    envs.append(sanity_test_env(dut, 'load_store'))
+    envs.append(sanity_test_env(dut, 'branch'))
+    envs.append(sanity_test_env(dut, 'lui_auipc'))
+    envs.append(sanity_test_env(dut, 'load_stall'))
+    envs.append(sanity_test_env(dut, 'jal_jalr'))
+
+    # riscv-tests Test
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-jal'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-jalr'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-beq'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-bne'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-blt'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-bge'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-bltu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-bgeu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lui'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-auipc'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-addi'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-slti'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sltiu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-xori'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-ori'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-andi'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-slli'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-srli'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-srai'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-add'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sub'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sll'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-slt'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sltu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-xor'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-srl'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sra'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-or'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-and'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lb'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lbu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lh'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lhu'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-lw'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sb'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sh'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-sw'))
+    envs.append(riscv_tests_env(dut, 'rv32ui-p-fence_i'))
+    envs.append(riscv_tests_env(dut, 'rv32mi-p-mcsr'))
+    envs.append(riscv_tests_env(dut, 'rv32mi-p-csr'))
+    envs.append(riscv_tests_env(dut, 'rv32mi-p-illegal'))
+    envs.append(riscv_tests_env(dut, 'rv32mi-p-ma_addr'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-mul'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-mulh'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-mulhsu'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-mulhu'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-div'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-divu'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-rem'))
+    envs.append(riscv_tests_env(dut, 'rv32um-p-remu'))
+
+    # riscv-arch-test Test
+    envs.append(riscv_arch_test_env(dut, 'I', 'add-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'addi-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sub-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'and-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'andi-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'or-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'ori-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'xor-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'xori-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'auipc-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lui-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'beq-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'bge-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'bgeu-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'bne-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'blt-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'bltu-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'jal-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'jalr-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lb-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lbu-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lh-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lhu-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'lw-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sb-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sh-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sw-align-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sll-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'slli-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'slt-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'slti-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sltiu-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sltu-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'sra-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'srai-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'srl-01'))
+    envs.append(riscv_arch_test_env(dut, 'I', 'srli-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'mul-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'mulh-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'mulhsu-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'mulhu-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'div-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'divu-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'rem-01'))
+    envs.append(riscv_arch_test_env(dut, 'M', 'remu-01'))
+
+    # dedicated-tests Test
+    envs.append(dedicated_tests_env(dut, 'software_interrupt'))
+    envs.append(dedicated_tests_env(dut, 'timer_interrupt'))
+
+    await batch_tests(dut, envs)